@@ -0,0 +1,428 @@
+"""
+Load generator for the airdrop service: drives /airdrop and /airdrop/bulk at a target request
+rate or concurrency and reports latency percentiles, throughput and error rates per stage.
+
+A stage is one endpoint at one load level, run for `--duration` seconds. `--concurrency` levels
+keep that many requests in flight back to back; `--rps` levels start requests at a fixed rate
+whatever the response times are. Server-side stage timings sent back in a `Server-Timing`
+header are aggregated per stage as well.
+
+Without `--url`, the service is started in this process against a fake gateway and a stub LLM,
+so runs are offline and repeatable. Results are written as JSON; pass an earlier file to
+`--compare` to see how p95 latency and throughput moved.
+
+Usage:
+    python -m benchmarks.airdrop_load --concurrency 1 8 32 --duration 10 --output load.json
+    python -m benchmarks.airdrop_load --endpoints airdrop bulk --rps 20 100 --compare load.json
+    python -m benchmarks.airdrop_load --url http://localhost:5000 --sender erd1... --token BUILDO-22c0a5
+"""
+import argparse
+import asyncio
+import contextlib
+import itertools
+import json
+import os
+import random
+import socket
+import subprocess
+import sys
+import time
+from collections import Counter, defaultdict
+from dataclasses import dataclass, field
+from typing import Dict, Iterator, List, Optional
+
+import aiohttp
+
+from utils.bech32_codec import encode_bech32_addresses
+
+DEFAULT_TOKEN = "BUILDO-22c0a5"
+ENDPOINTS = ("airdrop", "bulk")
+
+
+def random_addresses(count: int) -> List[str]:
+    return encode_bech32_addresses(os.urandom(32 * count))
+
+
+def percentile(ordered: List[float], fraction: float) -> float:
+    if not ordered:
+        return 0.0
+    return ordered[min(len(ordered) - 1, int(fraction * len(ordered)))]
+
+
+def latency_summary(seconds: List[float]) -> dict:
+    ordered = sorted(seconds)
+    return {
+        "p50_ms": round(1000 * percentile(ordered, 0.50), 3),
+        "p95_ms": round(1000 * percentile(ordered, 0.95), 3),
+        "p99_ms": round(1000 * percentile(ordered, 0.99), 3),
+        "max_ms": round(1000 * (ordered[-1] if ordered else 0.0), 3),
+        "mean_ms": round(1000 * sum(ordered) / len(ordered), 3) if ordered else 0.0,
+    }
+
+
+def parse_server_timing(header: str) -> Dict[str, float]:
+    """
+    `parse;dur=1.2, gateway;dur=10.5` -> {"parse": 1.2, "gateway": 10.5}, in milliseconds.
+    """
+    timings = {}
+    for metric in filter(None, (part.strip() for part in header.split(","))):
+        name, *parameters = (piece.strip() for piece in metric.split(";"))
+        for parameter in parameters:
+            key, _, value = parameter.partition("=")
+            if key == "dur":
+                with contextlib.suppress(ValueError):
+                    timings[name] = float(value)
+    return timings
+
+
+@dataclass
+class Scenario:
+    sender: str
+    token: str
+    contract: str
+    service: str
+    chain_id: str
+    receivers: List[str]
+    amount: int
+    bulk_rows: int
+    llm_fraction: float
+    requests: Iterator[int] = field(default_factory=itertools.count)
+
+    def airdrop_request(self) -> dict:
+        receivers = " ".join(self.receivers)
+        if random.random() < self.llm_fraction:
+            # Two amounts make the prompt ambiguous, so the service falls back to the LLM; the
+            # request number keeps the prompt cache from answering every prompt after the first
+            message = (f"Send {self.amount} or {self.amount + 1} {self.token} to {receivers} "
+                       f"(airdrop #{next(self.requests)})")
+        else:
+            message = f"Send {self.amount} {self.token} to {receivers}"
+        return {
+            "method": "POST",
+            "path": "/airdrop",
+            "json": {
+                "InputMessage": message,
+                "Sender": self.sender,
+                "ContractAddress": self.contract,
+                "ServiceAddress": self.service,
+                "ChainId": self.chain_id,
+            },
+        }
+
+    def bulk_request(self) -> dict:
+        rows = "".join(f"{address},{self.amount}\n" for address in random_addresses(self.bulk_rows))
+        return {
+            "method": "POST",
+            "path": "/airdrop/bulk",
+            "params": {
+                "Sender": self.sender,
+                "TokenIdentifier": self.token,
+                "ContractAddress": self.contract,
+                "ServiceAddress": self.service,
+                "ChainId": self.chain_id,
+            },
+            "data": "address,amount\n" + rows,
+            "headers": {"Content-Type": "text/csv"},
+        }
+
+    def llm_reply(self) -> str:
+        return json.dumps({"tokenIdentifier": self.token, "amount": self.amount, "receivers": self.receivers})
+
+
+@dataclass
+class StageResult:
+    endpoint: str
+    mode: str
+    level: float
+    latencies: List[float] = field(default_factory=list)
+    statuses: Counter = field(default_factory=Counter)
+    errors: Counter = field(default_factory=Counter)
+    server_timings: Dict[str, List[float]] = field(default_factory=lambda: defaultdict(list))
+    seconds: float = 0.0
+
+    @property
+    def name(self) -> str:
+        return f"{self.endpoint}@{self.mode}={self.level:g}"
+
+    def record(self, seconds: float, status: Optional[int], error: Optional[str], timings: Dict[str, float]) -> None:
+        self.latencies.append(seconds)
+        self.statuses[str(status) if status is not None else "none"] += 1
+        if error:
+            self.errors[error] += 1
+        for name, milliseconds in timings.items():
+            self.server_timings[name].append(milliseconds / 1000)
+
+    def to_dict(self) -> dict:
+        requests_sent = len(self.latencies)
+        failed = sum(self.errors.values())
+        return {
+            "stage": self.name,
+            "endpoint": self.endpoint,
+            "mode": self.mode,
+            "level": self.level,
+            "seconds": round(self.seconds, 3),
+            "requests": requests_sent,
+            "errors": failed,
+            "error_rate": round(failed / requests_sent, 4) if requests_sent else 0.0,
+            "throughput_rps": round((requests_sent - failed) / self.seconds, 2) if self.seconds else 0.0,
+            "latency": latency_summary(self.latencies),
+            "statuses": dict(self.statuses),
+            "error_kinds": dict(self.errors),
+            "server_timing": {name: latency_summary(values) for name, values in sorted(self.server_timings.items())},
+        }
+
+
+async def send(session: aiohttp.ClientSession, base_url: str, spec: dict, result: StageResult) -> None:
+    start = time.perf_counter()
+    status, error, timings = None, None, {}
+    try:
+        async with session.request(
+                spec["method"], base_url + spec["path"], json=spec.get("json"), data=spec.get("data"),
+                params=spec.get("params"), headers=spec.get("headers"),
+        ) as response:
+            status = response.status
+            body = await response.read()
+            timings = parse_server_timing(response.headers.get("Server-Timing", ""))
+            if status >= 400:
+                error = f"HTTP {status}"
+            elif spec["path"] == "/airdrop/bulk" and b'"error"' in body:
+                error = "stream error"
+    except asyncio.TimeoutError:
+        error = "timeout"
+    except aiohttp.ClientError as e:
+        error = type(e).__name__
+    result.record(time.perf_counter() - start, status, error, timings)
+
+
+async def run_stage(session, base_url: str, build_request, result: StageResult, duration: float,
+                    max_outstanding: int) -> StageResult:
+    start = time.perf_counter()
+    deadline = start + duration
+
+    if result.mode == "concurrency":
+        async def worker():
+            while time.perf_counter() < deadline:
+                await send(session, base_url, build_request(), result)
+
+        await asyncio.gather(*(worker() for _ in range(int(result.level))))
+    else:
+        interval = 1 / result.level
+        outstanding = set()
+        next_start = start
+        while next_start < deadline:
+            await asyncio.sleep(max(0.0, next_start - time.perf_counter()))
+            next_start += interval
+            if len(outstanding) >= max_outstanding:
+                # Counted as an error instead of queueing, which would hide the overload
+                result.record(0.0, None, "client saturated", {})
+                continue
+            task = asyncio.create_task(send(session, base_url, build_request(), result))
+            outstanding.add(task)
+            task.add_done_callback(outstanding.discard)
+        await asyncio.gather(*outstanding)
+
+    result.seconds = time.perf_counter() - start
+    return result
+
+
+def print_stage(stage: dict, out=None) -> None:
+    latency = stage["latency"]
+    print(
+        f"{stage['stage']:<28} req={stage['requests']:>6}  err={100 * stage['error_rate']:5.1f}%  "
+        f"thr={stage['throughput_rps']:8.1f}/s  p50={latency['p50_ms']:8.1f}  p95={latency['p95_ms']:8.1f}  "
+        f"p99={latency['p99_ms']:8.1f} ms",
+        file=out,
+    )
+    for name, timing in stage["server_timing"].items():
+        print(f"    {name:<24} p50={timing['p50_ms']:8.1f}  p95={timing['p95_ms']:8.1f}  p99={timing['p99_ms']:8.1f} ms",
+              file=out)
+    if stage["error_kinds"]:
+        print(f"    errors: {stage['error_kinds']}", file=out)
+
+
+def compare(stages: List[dict], baseline_path: str) -> None:
+    with open(baseline_path) as file:
+        baseline = {stage["stage"]: stage for stage in json.load(file)["stages"]}
+    print(f"\nCompared with {baseline_path}:")
+    for stage in stages:
+        before = baseline.get(stage["stage"])
+        if before is None:
+            continue
+        p95_before, p95_after = before["latency"]["p95_ms"], stage["latency"]["p95_ms"]
+        throughput_before, throughput_after = before["throughput_rps"], stage["throughput_rps"]
+        print(
+            f"{stage['stage']:<28} p95 {p95_before:8.1f} -> {p95_after:8.1f} ms "
+            f"({(p95_after / p95_before - 1) * 100 if p95_before else 0:+6.1f}%)  "
+            f"thr {throughput_before:8.1f} -> {throughput_after:8.1f}/s "
+            f"({(throughput_after / throughput_before - 1) * 100 if throughput_before else 0:+6.1f}%)"
+        )
+
+
+def git_revision() -> Optional[str]:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def free_port() -> int:
+    with socket.socket() as probe:
+        probe.bind(("127.0.0.1", 0))
+        return probe.getsockname()[1]
+
+
+@contextlib.asynccontextmanager
+async def self_hosted_service(scenario: Scenario, gateway_latency: float, llm_delay: float, verbose: bool,
+                              gateways: int = 1):
+    """
+    Serves the airdrop app with Hypercorn in this event loop, wired to `gateways` fake
+    gateways and a stub LLM, and yields its base URL.
+    """
+    # The gateway and LLM addresses are read when the service modules are first imported
+    gateway_ports, llm_port = [free_port() for _ in range(gateways)], free_port()
+    os.environ["GATEWAY_URL"] = f"http://127.0.0.1:{gateway_ports[0]}"
+    os.environ["GATEWAY_URLS"] = ",".join(f"http://127.0.0.1:{port}" for port in gateway_ports)
+    os.environ["OLLAMA_HOST"] = f"http://127.0.0.1:{llm_port}"
+    if not verbose:
+        # Per-request payload logging would dominate the measurement
+        os.environ.setdefault("LOG_LEVEL", "WARNING")
+
+    from hypercorn.asyncio import serve
+    from hypercorn.config import Config
+
+    from llm_agents.stub_server import run_stub_server
+    from main import app
+    from python_files.fake_gateway import FakeGateway, run_fake_gateway
+
+    async with contextlib.AsyncExitStack() as fakes:
+        for port in gateway_ports:
+            gateway = FakeGateway(latency=gateway_latency)
+            gateway.set_account(scenario.sender, esdts={scenario.token: 10 ** 30})
+            await fakes.enter_async_context(run_fake_gateway(gateway, port=port))
+        await fakes.enter_async_context(run_stub_server(lambda prompt: scenario.llm_reply(), port=llm_port, delay=llm_delay))
+        port = free_port()
+        config = Config()
+        config.bind = [f"127.0.0.1:{port}"]
+        config.accesslog = None
+        config.errorlog = None
+        stop = asyncio.Event()
+        with open(os.devnull, "w") as devnull, contextlib.ExitStack() as stack:
+            if not verbose:
+                # Leftover prints in helper modules
+                stack.enter_context(contextlib.redirect_stdout(devnull))
+            server = asyncio.create_task(serve(app, config, shutdown_trigger=stop.wait))
+            base_url = f"http://127.0.0.1:{port}"
+            await wait_until_up(base_url)
+            try:
+                yield base_url
+            finally:
+                stop.set()
+                await server
+
+
+async def wait_until_up(base_url: str, timeout: float = 30) -> None:
+    deadline = time.perf_counter() + timeout
+    async with aiohttp.ClientSession() as session:
+        while True:
+            try:
+                async with session.options(base_url + "/airdrop") as response:
+                    if response.status < 500:
+                        return
+            except aiohttp.ClientError:
+                pass
+            if time.perf_counter() > deadline:
+                raise TimeoutError(f"Service at {base_url} did not come up within {timeout} seconds")
+            await asyncio.sleep(0.05)
+
+
+async def run(args) -> dict:
+    scenario = Scenario(
+        sender=args.sender or random_addresses(1)[0],
+        token=args.token,
+        contract=args.contract or random_addresses(1)[0],
+        service=args.service or random_addresses(1)[0],
+        chain_id=args.chain_id,
+        receivers=random_addresses(args.receivers),
+        amount=args.amount,
+        bulk_rows=args.bulk_rows,
+        llm_fraction=args.llm_fraction,
+    )
+    builders = {"airdrop": scenario.airdrop_request, "bulk": scenario.bulk_request}
+    levels = [("concurrency", level) for level in args.concurrency or []] + [("rps", level) for level in args.rps or []]
+    if not levels:
+        levels = [("concurrency", 1)]
+    # Captured before the in-process service silences stdout
+    out = sys.stdout
+
+    async with contextlib.AsyncExitStack() as stack:
+        base_url = args.url or await stack.enter_async_context(
+            self_hosted_service(scenario, args.gateway_latency, args.llm_delay, args.verbose, args.gateways)
+        )
+        connector = aiohttp.TCPConnector(limit=0)
+        session = await stack.enter_async_context(
+            aiohttp.ClientSession(connector=connector, timeout=aiohttp.ClientTimeout(total=args.timeout))
+        )
+        if args.warm_up:
+            await run_stage(session, base_url, builders[args.endpoints[0]],
+                            StageResult(args.endpoints[0], "concurrency", 1), args.warm_up, args.max_outstanding)
+
+        stages = []
+        for endpoint in args.endpoints:
+            for mode, level in levels:
+                result = await run_stage(session, base_url, builders[endpoint], StageResult(endpoint, mode, level),
+                                         args.duration, args.max_outstanding)
+                stage = result.to_dict()
+                print_stage(stage, out)
+                stages.append(stage)
+
+    return {
+        "revision": git_revision(),
+        "started_at": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+        "target": args.url or "self-hosted",
+        "python": sys.version.split()[0],
+        "settings": {
+            name: value for name, value in vars(args).items() if name not in ("output", "compare")
+        },
+        "stages": stages,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--url", help="Running service to load; by default one is started in-process")
+    parser.add_argument("--endpoints", nargs="+", choices=ENDPOINTS, default=["airdrop"])
+    parser.add_argument("--concurrency", type=int, nargs="+", help="Closed-loop stages: requests kept in flight")
+    parser.add_argument("--rps", type=float, nargs="+", help="Open-loop stages: requests started per second")
+    parser.add_argument("--duration", type=float, default=10.0, help="Seconds per stage")
+    parser.add_argument("--warm-up", type=float, default=1.0, help="Seconds of unrecorded load before the stages")
+    parser.add_argument("--timeout", type=float, default=60.0, help="Per-request timeout in seconds")
+    parser.add_argument("--max-outstanding", type=int, default=1000, help="Open-loop cap on requests in flight")
+    parser.add_argument("--receivers", type=int, default=10, help="Receivers per /airdrop prompt")
+    parser.add_argument("--bulk-rows", type=int, default=1000, help="Receivers per /airdrop/bulk upload")
+    parser.add_argument("--amount", type=int, default=1)
+    parser.add_argument("--llm-fraction", type=float, default=0.0, help="Share of prompts that need the LLM")
+    parser.add_argument("--sender")
+    parser.add_argument("--token", default=DEFAULT_TOKEN)
+    parser.add_argument("--contract")
+    parser.add_argument("--service")
+    parser.add_argument("--chain-id", default="D")
+    parser.add_argument("--gateway-latency", type=float, default=0.0, help="Fake gateway delay in seconds")
+    parser.add_argument("--gateways", type=int, default=1, help="Fake gateways served as one pool")
+    parser.add_argument("--llm-delay", type=float, default=0.0, help="Stub LLM delay in seconds")
+    parser.add_argument("--verbose", action="store_true", help="Keep the in-process service's output")
+    parser.add_argument("--output", default="airdrop_load.json")
+    parser.add_argument("--compare", help="Earlier result file to compare with")
+    args = parser.parse_args()
+
+    report = asyncio.run(run(args))
+    with open(args.output, "w") as file:
+        json.dump(report, file, indent=2)
+    print(f"\nSaved {len(report['stages'])} stage(s) to {args.output}")
+    if args.compare:
+        compare(report["stages"], args.compare)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,76 @@
+"""
+Benchmarks BatchSigner throughput against inline per-transaction signing, for a range of worker counts.
+
+Usage:
+    python -m benchmarks.batch_signing --count 20000 --workers 1 2 4 8
+"""
+import argparse
+import os
+import time
+
+from multiversx_sdk import Transaction, TransactionComputer
+
+from python_files.batch_signer import BatchSigner
+from python_files.wallet_pool import WalletPool
+from utils.bech32_codec import encode_bech32_addresses
+
+
+def make_transactions(count: int, senders: list) -> list:
+    receivers = encode_bech32_addresses(os.urandom(32 * count))
+    return [
+        Transaction(
+            sender=senders[index % len(senders)].address,
+            receiver=receiver,
+            gas_limit=50_000,
+            chain_id="D",
+            nonce=index // len(senders),
+            value=1,
+        )
+        for index, receiver in enumerate(receivers)
+    ]
+
+
+def sign_inline(transactions: list, senders: list) -> None:
+    computer = TransactionComputer()
+    for index, transaction in enumerate(transactions):
+        transaction.signature = senders[index % len(senders)].get_signer().sign(
+            computer.compute_bytes_for_signing(transaction)
+        )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--count", type=int, default=10_000)
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 2, 4, os.cpu_count() or 1])
+    parser.add_argument("--chunk-size", type=int, default=256)
+    parser.add_argument("--wallets", default=None, help="PEM folder; defaults to the repo's wallets")
+    args = parser.parse_args()
+
+    pool = WalletPool.from_folder(args.wallets) if args.wallets else WalletPool.from_folder()
+    senders = pool.wallets
+    transactions = make_transactions(args.count, senders)
+    print(f"CPUs: {os.cpu_count()}  transactions: {args.count}  senders: {len(senders)}")
+
+    start = time.perf_counter()
+    sign_inline(transactions, senders)
+    inline = time.perf_counter() - start
+    expected = [transaction.signature for transaction in transactions]
+    print(f"inline         {inline * 1000:9.1f} ms  {args.count / inline:9.0f} tx/s")
+
+    for workers in sorted(set(args.workers)):
+        for transaction in transactions:
+            transaction.signature = b""
+        with BatchSigner(workers=workers, chunk_size=args.chunk_size, min_parallel=0) as signer:
+            # Warm the pool up so process start-up is not part of the measurement
+            signer.sign(transactions[:workers * args.chunk_size], senders[0])
+            signer.sign(transactions, [senders[index % len(senders)] for index in range(len(transactions))])
+            stats = signer.last
+        assert [transaction.signature for transaction in transactions] == expected
+        print(
+            f"workers={workers:<4}  {stats.seconds * 1000:9.1f} ms  {stats.per_second:9.0f} tx/s  "
+            f"({inline / stats.seconds:4.1f}x)"
+        )
+
+
+if __name__ == "__main__":
+    main()
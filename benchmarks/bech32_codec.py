@@ -0,0 +1,58 @@
+"""
+Benchmarks bulk bech32 decoding/encoding against the per-address SDK path.
+
+Usage:
+    python -m benchmarks.bech32_codec --sizes 1000 10000 100000
+"""
+import argparse
+import os
+import time
+
+from multiversx_sdk import Address
+
+from utils import bech32_codec
+from utils.bech32_codec import decode_bech32_addresses, encode_bech32_addresses
+
+
+def sdk_decode(addresses: list) -> list:
+    hexes = []
+    for address in addresses:
+        try:
+            hexes.append(Address.from_bech32(address).hex())
+        except Exception:
+            hexes.append(None)
+    return hexes
+
+
+def best_of(repeat: int, function, *args) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        function(*args)
+        best = min(best, time.perf_counter() - start)
+    return best * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[100, 1_000, 10_000])
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    print(f"NumPy available: {bech32_codec.numpy is not None}")
+    for size in args.sizes:
+        public_keys = os.urandom(32 * size)
+        addresses = encode_bech32_addresses(public_keys)
+        assert decode_bech32_addresses(addresses).buffer == public_keys
+
+        sdk = best_of(args.repeat, sdk_decode, addresses)
+        bulk = best_of(args.repeat, decode_bech32_addresses, addresses)
+        encode = best_of(args.repeat, encode_bech32_addresses, public_keys)
+        print(
+            f"addresses={size:>7}  sdk decode={sdk:9.2f} ms  bulk decode={bulk:9.2f} ms "
+            f"({sdk / bulk:5.1f}x)  bulk encode={encode:9.2f} ms"
+        )
+
+
+if __name__ == "__main__":
+    main()
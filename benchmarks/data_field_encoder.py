@@ -0,0 +1,88 @@
+"""
+Benchmarks the deterministic smartSave data-field encoder against the AI prompt path.
+
+Usage:
+    python -m benchmarks.data_field_encoder
+    python -m benchmarks.data_field_encoder --with-llm --llm-receivers 2
+"""
+import argparse
+import asyncio
+import os
+import time
+
+from llm_agents.agents import generate_data_field_with_ai
+from utils.data_converstion import int_to_hex, string_to_hex
+from utils.transaction_data import WRAPPED_EGLD_TOKEN_IDENTIFIER, encode_smart_save_data
+
+TOKEN_IDENTIFIER = "BUILDO-22c0a5"
+AMOUNT_PER_RECEIVER = 150_000_000_000_000_000_000
+WRAPPED_EGLD_PER_RECEIVER = 10 ** 16
+
+
+def random_address_hexes(count: int) -> list:
+    return [os.urandom(32).hex() for _ in range(count)]
+
+
+def time_encoder(receiver_count: int, repeat: int) -> float:
+    """
+    Returns the best wall time, in milliseconds, of encoding one data field for `receiver_count` receivers.
+    """
+    contract_hex, service_hex = random_address_hexes(2)
+    receiver_hexes = random_address_hexes(receiver_count)
+    amounts = [AMOUNT_PER_RECEIVER] * receiver_count
+
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        encode_smart_save_data(
+            contract_hex=contract_hex,
+            service_hex=service_hex,
+            token_identifier=TOKEN_IDENTIFIER,
+            esdt_amount=AMOUNT_PER_RECEIVER * receiver_count,
+            wrapped_egld_amount=WRAPPED_EGLD_PER_RECEIVER * receiver_count,
+            receiver_hexes=receiver_hexes,
+            amounts=amounts,
+        )
+        best = min(best, time.perf_counter() - start)
+    return best * 1000
+
+
+async def time_llm(receiver_count: int) -> float:
+    """
+    Returns the wall time, in milliseconds, of one AI-generated data field for `receiver_count` receivers.
+    """
+    contract_hex, service_hex, sender_hex = random_address_hexes(3)
+    receiver_hexes = random_address_hexes(receiver_count)
+    start = time.perf_counter()
+    await generate_data_field_with_ai(
+        contract_hex=contract_hex,
+        service_hex=service_hex,
+        sender_hex=sender_hex,
+        receiver_hexes=receiver_hexes,
+        token_identifier_hex=string_to_hex(TOKEN_IDENTIFIER),
+        wrapped_egld_hex=int_to_hex(WRAPPED_EGLD_PER_RECEIVER * receiver_count),
+        esdt_amount_hex=int_to_hex(AMOUNT_PER_RECEIVER * receiver_count),
+        amounts_hex=[int_to_hex(AMOUNT_PER_RECEIVER)] * receiver_count,
+    )
+    return (time.perf_counter() - start) * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[2, 100, 1_000, 10_000])
+    parser.add_argument("--repeat", type=int, default=20)
+    parser.add_argument("--with-llm", action="store_true", help="Also time the AI prompt path (needs Ollama)")
+    parser.add_argument("--llm-receivers", type=int, default=2)
+    args = parser.parse_args()
+
+    print(f"Wrapped EGLD token: {WRAPPED_EGLD_TOKEN_IDENTIFIER}")
+    for size in args.sizes:
+        print(f"encoder  receivers={size:>6}  best={time_encoder(size, args.repeat):10.3f} ms")
+
+    if args.with_llm:
+        elapsed = asyncio.run(time_llm(args.llm_receivers))
+        print(f"llm      receivers={args.llm_receivers:>6}  wall={elapsed:10.3f} ms")
+
+
+if __name__ == "__main__":
+    main()
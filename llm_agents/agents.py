@@ -1,161 +1,67 @@
-import asyncio
 import json
-import subprocess
+import logging
+from typing import Callable, Optional
 
+from llm_agents.ollama_client import OllamaError
+from llm_agents.prompt_cache import prompt_cache
+from llm_agents.prompt_parser import fast_parse_airdrop_prompt
+from llm_agents.scheduler import BACKGROUND, INTERACTIVE, DeadlineExceeded, llm_scheduler
 from main2 import bech32_to_hex
-from utils.data_converstion import string_to_hex, int_to_hex
+from python_files.batch_planner import plan_smart_save_chunks, smart_save_gas_limit
+from python_files.constants import GAS_PRICE
+from python_files.logger import log_payload
+from python_files.metrics import llm_in_flight, span
+from utils.bech32_codec import decode_bech32_addresses
 
 
-async def execute_prompt(prompt: str) -> str:
+async def execute_prompt(prompt: str, is_valid: Optional[Callable[[str], bool]] = None,
+                         priority: int = INTERACTIVE) -> str:
     """
-    Sends a prompt to Llama 3.2 and returns the response.
+    Sends a prompt to the Ollama model through the scheduler and returns the response.
+    Responses are cached on the normalized prompt; with `is_valid`, only responses it accepts are.
+    Raises `SchedulerBusy` when the LLM queue is full.
     """
+    cached = await prompt_cache.get(prompt)
+    if cached is not None:
+        return cached
     try:
-        result = await asyncio.to_thread(
-            subprocess.run,
-            ["ollama", "run", "gemma2:27b"],
-            input=prompt,
-            text=True,
-            capture_output=True,
-            check=True
-        )
-        return result.stdout.strip()  # Return the output from the model
-    except subprocess.CalledProcessError as e:
-        return json.dumps({"error": f"AI agent error: {e.stderr.strip()}"})  # Return error as JSON
+        with llm_in_flight.track_in_progress(), span("llm"):
+            result = (await llm_scheduler.generate(prompt, priority=priority)).strip()
+    except (OllamaError, DeadlineExceeded) as e:
+        return json.dumps({"error": f"AI agent error: {str(e)}"})  # Return error as JSON
+    if is_valid is None or is_valid(result):
+        await prompt_cache.put(prompt, result)
+    return result
+
+
+def _is_json_object(response: str) -> bool:
+    try:
+        return isinstance(json.loads(response), dict)
+    except ValueError:
+        return False
 
 
 
 async def validate_bech32_addresses(addresses: list) -> bool:
     """
-    Validates an array of Bech32 addresses using Ollama.
+    Validates an array of Bech32 addresses (prefix, character set, length and checksum).
     Returns True if all addresses are valid, otherwise False.
     """
-    prompt = f"""
-        Bech32 addresses must meet the following strict rules:
-        1. Start with a human-readable part (HRP) of lowercase letters (a-z) and optionally digits (0-9). It must not start with a digit or invalid characters like '1', 'b', 'i', or 'o'.
-        2. Include exactly one separator ('1') between the HRP and data part.
-        3. The data part contains only these valid characters: 'q', 'p', 'z', 'r', 'y', '9', 'x', '8', 'g', 'f', '2', 't', 'v', 'd', 'w', '0', 's', '3', 'j', 'n', '5', '4', 'k', 'h', 'c', 'e', '6', 'm', 'u', 'a', '7'. Uppercase letters and invalid characters like 'b', 'i', 'o', or '1' (except as the separator) are not allowed.
-        4. Have a total length of 42 to 62 characters.
-        5. No leading/trailing spaces or invalid prefixes like '1' or non-alphanumeric symbols.
-        6. HRP must follow expected conventions (e.g., 'erd' for MultiversX). Invalid prefixes like '1erd' or 'xxx' are not allowed.
-        
-        Addresses to validate:
-        {addresses}
-        
-        Validate each address against the rules:
-        - Respond "True" if all addresses are valid.
-        - Respond "False" if any address is invalid.
-        
-        Your response must be a **single word**, either "True" or "False". No explanations or extra text.
-
-        """
-    response = await execute_prompt(prompt)
-    print(f"Validation response for addresses {addresses}: {response}")
-    return response.strip().lower() == "true"
-
+    result = decode_bech32_addresses(addresses)
+    if not result.all_valid:
+        log_payload("Invalid Bech32 addresses:", result.errors, level=logging.WARNING)
+    return result.all_valid
 
 
-
-
-async def fetch_address_details(host: str, address: str) -> dict:
-    """
-    Fetches the address details by building the URL with AI and executing the curl command.
-    """
-    prompt = f"""
-    Build a valid URL to fetch address details for "{address}" from the host "{host}".
-    Example: {host}/address/{address}. Pls return only the URL without any additional text
-    """
-    try:
-        # Get the URL from the AI prompt
-        url = await execute_prompt(prompt)
-        print(f"Constructed URL for address details: {url}")
-
-        # Execute the curl command
-        result = await asyncio.to_thread(
-            subprocess.run,
-            ["curl", url.strip()],
-            text=True,
-            capture_output=True,
-            check=True
-        )
-        return json.loads(result.stdout.strip())  # Parse the JSON response
-    except subprocess.CalledProcessError as e:
-        return {"error": f"Failed to fetch address details: {e.stderr.strip()}"}
-    except json.JSONDecodeError:
-        return {"error": "Failed to parse address details response."}
-
-
-async def fetch_esdt_details(host: str, address: str) -> dict:
+async def generate_data_field_with_ai(
+        contract_hex, service_hex, sender_hex, receiver_hexes, token_identifier_hex, wrapped_egld_hex, esdt_amount_hex,
+        amounts_hex
+) -> str:
     """
-    Fetches the ESDT token details by building the URL with AI and executing the curl command.
+    Asks the AI agent to assemble the MultiESDTNFTTransfer data field.
+    Kept as the reference path for benchmarking against `encode_smart_save_data`.
     """
     prompt = f"""
-    Construct a valid URL to fetch ESDT token details. 
-    The URL must adhere to the following rules:
-    1. It should use the provided host and address parameters.
-    2. The format must be: {host}/address/{address}/esdt.
-    3. Only output the URL. Do not include any additional text or explanations.
-    
-    Input:
-    - Host: {host}
-    - Address: {address}
-    
-    Output:
-    A single valid URL.
-    """
-    try:
-        # Get the URL from the AI prompt
-        url = await execute_prompt(prompt)
-        print(f"Constructed URL for ESDT details: {url}")
-
-        # Execute the curl command
-        result = await asyncio.to_thread(
-            subprocess.run,
-            ["curl", url.strip()],
-            text=True,
-            capture_output=True,
-            check=True
-        )
-        return json.loads(result.stdout.strip())  # Parse the JSON response
-    except subprocess.CalledProcessError as e:
-        return {"error": f"Failed to fetch ESDT details: {e.stderr.strip()}"}
-    except json.JSONDecodeError:
-        return {"error": "Failed to parse ESDT details response."}
-
-
-async def create_multi_esdt_transfer_transaction(
-        chain_id, sender, receivers, token_identifier, esdt_amount, contract_address, nonce, service_address, amounts
-):
-    """
-    Creates a MultiESDTNFTTransfer transaction JSON using an AI agent.
-    Dynamically generates the data field for all receivers and amounts.
-    """
-    try:
-        # Convert Bech32 fields to Hex
-        contract_hex = bech32_to_hex(contract_address)
-        service_hex = bech32_to_hex(service_address)
-        sender_hex = bech32_to_hex(sender)
-        receiver_hexes = [bech32_to_hex(receiver) for receiver in receivers]
-        gas_limit = max(1_500_000 * len(receivers), 10_000_000)
-        gas_price = 1000000000
-
-        if not contract_hex or not service_hex or not sender_hex or None in receiver_hexes:
-            return {"error": "Failed to convert Bech32 to Hex for one or more addresses"}
-
-        # Calculate wrapped EGLD dynamically
-        wrapped_egld = int(0.01 * len(receivers) * (10 ** 18))
-        wrapped_egld_hex = int_to_hex(wrapped_egld)
-
-        # Convert token identifier and amounts to Hex
-        token_identifier_hex = string_to_hex(token_identifier)
-        esdt_amount_hex = int_to_hex(int(esdt_amount))
-        amounts_hex = [int_to_hex(int(amount)) for amount in amounts]
-
-        if None in [token_identifier_hex, wrapped_egld_hex, esdt_amount_hex] or None in amounts_hex:
-            return {"error": "Failed to convert values to Hex"}
-
-        # Generate the data dynamically using AI agents
-        prompt = f"""
         You are tasked with generating a MultiESDTNFTTransfer transaction.
         - Use the contract address: {contract_hex}
         - Use the service address: {service_hex}
@@ -177,47 +83,70 @@ async def create_multi_esdt_transfer_transaction(
 
         Only return the constructed 'data' field, no explanations or additional text.
         """
-        # Execute the AI prompt
-        response = await execute_prompt(prompt)
-        data_field = response.strip()
-
-        # Construct the transaction object
-        transaction = {
-            "nonce": nonce,
-            "value": "0",
-            "receiver": sender,  # Contract interaction typically uses sender as receiver
-            "sender": sender,
-            "senderUsername": "",
-            "receiverUsername": "",
-            "gasPrice": gas_price,
-            "gasLimit": gas_limit,
-            "data": data_field,
-            "chainID": chain_id,
-            "version": 2,
-            "options": 0,
-            "guardian": "",
-            "signature": "",
-            "guardianSignature": "",
-            "relayer": "",
-            "relayerSignature": ""
-        }
-
-        # Log the generated transaction
-        print("Generated Transaction:", transaction)
-        return transaction
-
-    except Exception as e:
-        print(f"Error creating transaction: {str(e)}")
-        return {"error": f"Failed to create transaction: {str(e)}"}
+    response = await execute_prompt(prompt, priority=BACKGROUND)
+    return response.strip()
+
+
+def build_multi_esdt_transfer_transaction(chain_id, sender, nonce, data_field, receiver_count) -> dict:
+    """
+    Wraps a smartSave data field into an unsigned MultiESDTNFTTransfer transaction JSON.
+    """
+    return {
+        "nonce": nonce,
+        "value": "0",
+        "receiver": sender,  # Contract interaction typically uses sender as receiver
+        "sender": sender,
+        "senderUsername": "",
+        "receiverUsername": "",
+        "gasPrice": GAS_PRICE,
+        "gasLimit": smart_save_gas_limit(receiver_count, len(data_field)),
+        "data": data_field,
+        "chainID": chain_id,
+        "version": 2,
+        "options": 0,
+        "guardian": "",
+        "signature": "",
+        "guardianSignature": "",
+        "relayer": "",
+        "relayerSignature": ""
+    }
+
+
+def plan_multi_esdt_transfer_transactions(sender, receivers, token_identifier, contract_address, service_address,
+                                          amounts):
+    """
+    Splits an airdrop into smartSave chunks that each fit into one transaction.
+    Returns the list of chunks, or an error JSON.
+    """
+    contract_hex = bech32_to_hex(contract_address)
+    service_hex = bech32_to_hex(service_address)
+    sender_hex = bech32_to_hex(sender)
+    decoded_receivers = decode_bech32_addresses(receivers)
+
+    if not contract_hex or not service_hex or not sender_hex:
+        return {"error": "Failed to convert Bech32 to Hex for one or more addresses"}
+    if not decoded_receivers.all_valid:
+        invalid = {receivers[index]: reason for index, reason in list(decoded_receivers.errors.items())[:10]}
+        return {"error": f"Invalid receiver addresses ({len(decoded_receivers.errors)}): {invalid}"}
+    receiver_hexes = decoded_receivers.hexes()
+
+    try:
+        return plan_smart_save_chunks(contract_hex, service_hex, token_identifier, receiver_hexes, amounts)
+    except ValueError as e:
+        return {"error": f"Failed to plan transactions: {str(e)}"}
 
 
 async def user_prompt_to_json(user_prompt: str) -> any:
     """
     Converts the user prompt into a JSON format with correctly extracted values.
+    Prompts the grammar can parse confidently never reach the LLM.
     """
-    """
-    Converts the user prompt into a JSON format with correctly extracted values.
-    """
+    parsed = fast_parse_airdrop_prompt(user_prompt)
+    if parsed is not None:
+        return json.dumps(parsed)
+
+    # Surrounding whitespace would otherwise give resends of the same message different cache keys
+    user_prompt = user_prompt.strip()
     prompt = f"""
     Convert the following prompt into a valid JSON format. Extract the `tokenIdentifier`, `amount`, and `receivers`. 
     Use the following example for guidance:
@@ -237,6 +166,6 @@ async def user_prompt_to_json(user_prompt: str) -> any:
     
     Only return the JSON, without any additional explanation. For the user's prompt: "{user_prompt}", generate the corresponding JSON output without json markers.
     """
-    response = await execute_prompt(prompt)
-    print("response: " + response)
+    response = await execute_prompt(prompt, is_valid=_is_json_object)
+    log_payload("response:", response)
     return response
@@ -0,0 +1,138 @@
+import asyncio
+import json
+import os
+from typing import AsyncIterator, Optional
+
+import aiohttp
+
+OLLAMA_HOST = os.getenv("OLLAMA_HOST", "http://localhost:11434")
+OLLAMA_MODEL = os.getenv("OLLAMA_MODEL", "gemma2:27b")
+# How long Ollama keeps the model loaded after the last request (Ollama duration string)
+OLLAMA_KEEP_ALIVE = os.getenv("OLLAMA_KEEP_ALIVE", "30m")
+OLLAMA_MAX_CONCURRENCY = int(os.getenv("OLLAMA_MAX_CONCURRENCY", "4"))
+OLLAMA_POOL_SIZE = int(os.getenv("OLLAMA_POOL_SIZE", "16"))
+OLLAMA_TIMEOUT_IN_SEC = float(os.getenv("OLLAMA_TIMEOUT_IN_SEC", "300"))
+
+
+class OllamaError(Exception):
+    pass
+
+
+class OllamaClient:
+    """
+    Async client for the Ollama HTTP API.
+
+    All calls share one keep-alive connection pool, and a semaphore caps how many
+    generations are in flight so concurrent requests queue instead of thrashing the model.
+    """
+
+    def __init__(
+            self,
+            host: str = OLLAMA_HOST,
+            model: str = OLLAMA_MODEL,
+            keep_alive: str = OLLAMA_KEEP_ALIVE,
+            max_concurrency: int = OLLAMA_MAX_CONCURRENCY,
+            pool_size: int = OLLAMA_POOL_SIZE,
+            timeout: float = OLLAMA_TIMEOUT_IN_SEC,
+    ) -> None:
+        self.host = host.rstrip("/")
+        self.model = model
+        self.keep_alive = keep_alive
+        self.max_concurrency = max_concurrency
+        self.pool_size = pool_size
+        self.timeout = aiohttp.ClientTimeout(total=timeout)
+        self._session: Optional[aiohttp.ClientSession] = None
+        self._semaphore: Optional[asyncio.Semaphore] = None
+
+    def _get_session(self) -> aiohttp.ClientSession:
+        if self._session is None or self._session.closed:
+            connector = aiohttp.TCPConnector(limit=self.pool_size, keepalive_timeout=60)
+            self._session = aiohttp.ClientSession(connector=connector, timeout=self.timeout)
+            self._semaphore = asyncio.Semaphore(self.max_concurrency)
+        return self._session
+
+    def _payload(self, prompt: str, stream: bool, options: Optional[dict]) -> dict:
+        payload = {
+            "model": self.model,
+            "prompt": prompt,
+            "stream": stream,
+            "keep_alive": self.keep_alive,
+        }
+        if options:
+            payload["options"] = options
+        return payload
+
+    @staticmethod
+    async def _read_json(response: aiohttp.ClientResponse) -> dict:
+        """
+        Decodes a response body, raising `OllamaError` for error statuses and for bodies that
+        are not a JSON object, such as the HTML or plain-text pages of a proxy in front of Ollama.
+        """
+        text = await response.text()
+        try:
+            body = json.loads(text)
+        except ValueError:
+            body = None
+        if response.status != 200:
+            error = body.get("error") if isinstance(body, dict) else None
+            raise OllamaError(error or f"HTTP {response.status}: {text[:200]}")
+        if not isinstance(body, dict):
+            raise OllamaError(f"Ollama returned a response that is not a JSON object: {text[:200]}")
+        return body
+
+    async def generate(self, prompt: str, options: Optional[dict] = None) -> str:
+        """
+        Runs a single generation and returns the full response text.
+        """
+        session = self._get_session()
+        async with self._semaphore:
+            try:
+                async with session.post(
+                        f"{self.host}/api/generate", json=self._payload(prompt, False, options)
+                ) as response:
+                    body = await self._read_json(response)
+                    return body.get("response", "")
+            except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+                raise OllamaError(f"Ollama request failed: {e!r}") from e
+
+    async def stream(self, prompt: str, options: Optional[dict] = None) -> AsyncIterator[str]:
+        """
+        Yields response tokens as Ollama produces them.
+        """
+        session = self._get_session()
+        async with self._semaphore:
+            try:
+                async with session.post(
+                        f"{self.host}/api/generate", json=self._payload(prompt, True, options)
+                ) as response:
+                    if response.status != 200:
+                        await self._read_json(response)
+                    async for line in response.content:
+                        if not line.strip():
+                            continue
+                        try:
+                            chunk = json.loads(line)
+                        except ValueError:
+                            raise OllamaError(f"Ollama streamed a line that is not JSON: {line[:200]!r}") from None
+                        if chunk.get("error"):
+                            raise OllamaError(chunk["error"])
+                        if chunk.get("response"):
+                            yield chunk["response"]
+                        if chunk.get("done"):
+                            return
+            except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+                raise OllamaError(f"Ollama request failed: {e!r}") from e
+
+    async def warm_up(self) -> None:
+        """
+        Loads the model into memory; Ollama treats an empty prompt as a load request.
+        """
+        await self.generate("")
+
+    async def close(self) -> None:
+        if self._session is not None and not self._session.closed:
+            await self._session.close()
+        self._session = None
+
+
+ollama_client = OllamaClient()
@@ -0,0 +1,194 @@
+import asyncio
+import hashlib
+import os
+import re
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from typing import Optional, Tuple
+
+from llm_agents.ollama_client import OLLAMA_MODEL
+from llm_agents.prompt_parser import BECH32_CHARSET
+from python_files.logger import logger
+from python_files.metrics import registry
+
+PROMPT_CACHE_MAX_ENTRIES = int(os.getenv("PROMPT_CACHE_MAX_ENTRIES", "10000"))
+PROMPT_CACHE_MAX_BYTES = int(os.getenv("PROMPT_CACHE_MAX_BYTES", str(64 * 1024 * 1024)))
+PROMPT_CACHE_TTL_IN_SEC = float(os.getenv("PROMPT_CACHE_TTL_IN_SEC", str(24 * 3600)))
+# Optional SQLite file keeping results across restarts
+PROMPT_CACHE_PATH = os.getenv("PROMPT_CACHE_PATH")
+PROMPT_CACHE_MAX_ROWS = int(os.getenv("PROMPT_CACHE_MAX_ROWS", "100000"))
+
+_ADDRESS = re.compile(rf"erd1[{BECH32_CHARSET}]{{58}}", re.IGNORECASE)
+_WHITESPACE = re.compile(r"\s+")
+
+cache_lookups = registry.counter("prompt_cache_lookups_total", "Prompt cache lookups by result", ["result"])
+cache_entries = registry.gauge("prompt_cache_entries", "Prompt results held in memory")
+
+
+def normalize_prompt(prompt: str) -> str:
+    """
+    Folds whitespace and case, and replaces the addresses with a hash of the address list,
+    so retries and resends of the same message map to one key however they are formatted.
+    """
+    addresses = [address.lower() for address in _ADDRESS.findall(prompt)]
+    text = _WHITESPACE.sub(" ", _ADDRESS.sub("<address>", prompt)).strip().casefold()
+    if addresses:
+        digest = hashlib.sha256(",".join(addresses).encode()).hexdigest()
+        text += f" <addresses:{len(addresses)}:{digest}>"
+    return text
+
+
+class PromptCache:
+    """
+    LRU cache of LLM results keyed on the normalized prompt.
+
+    Keys are built from the full prompt sent to the model, template included, and scoped by
+    the model name, so changing the template or the model invalidates every earlier result.
+    Memory use is capped by entry count and by total result size; with a `path`, results are
+    also kept in SQLite, read back on a memory miss and dropped on open when they were
+    produced by another model.
+    """
+
+    def __init__(
+            self,
+            model: str = OLLAMA_MODEL,
+            max_entries: int = PROMPT_CACHE_MAX_ENTRIES,
+            max_bytes: int = PROMPT_CACHE_MAX_BYTES,
+            ttl: float = PROMPT_CACHE_TTL_IN_SEC,
+            path: Optional[str] = PROMPT_CACHE_PATH,
+            max_rows: int = PROMPT_CACHE_MAX_ROWS,
+    ) -> None:
+        self.model = model
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self.max_rows = max_rows
+        self.hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._entries: "OrderedDict[str, Tuple[str, float]]" = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self._db: Optional[sqlite3.Connection] = None
+        if path:
+            self._open(path)
+
+    def _open(self, path: str) -> None:
+        self._db = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS prompt_results "
+            "(key TEXT PRIMARY KEY, model TEXT NOT NULL, result TEXT NOT NULL, created_at REAL NOT NULL)"
+        )
+        self._db.execute("CREATE INDEX IF NOT EXISTS prompt_results_created_at ON prompt_results (created_at)")
+        stale = self._db.execute("DELETE FROM prompt_results WHERE model != ?", (self.model,)).rowcount
+        if stale:
+            logger.info(f"Dropped {stale} cached prompt result(s) from other models")
+
+    def key(self, prompt: str) -> str:
+        return hashlib.sha256(f"{self.model}\0{normalize_prompt(prompt)}".encode()).hexdigest()
+
+    def _get_memory(self, key: str) -> Optional[str]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            result, created_at = entry
+            if time.time() - created_at > self.ttl:
+                self._remove(key)
+                return None
+            self._entries.move_to_end(key)
+            return result
+
+    def _put_memory(self, key: str, result: str, created_at: float) -> None:
+        with self._lock:
+            if key in self._entries:
+                self._remove(key)
+            self._entries[key] = (result, created_at)
+            self._bytes += len(result)
+            while self._entries and (len(self._entries) > self.max_entries or self._bytes > self.max_bytes):
+                self._remove(next(iter(self._entries)))
+                self.evictions += 1
+            cache_entries.set(len(self._entries))
+
+    def _remove(self, key: str) -> None:
+        result, _ = self._entries.pop(key)
+        self._bytes -= len(result)
+
+    def _get_disk(self, key: str) -> Optional[Tuple[str, float]]:
+        with self._lock:
+            row = self._db.execute(
+                "SELECT result, created_at FROM prompt_results WHERE key = ?", (key,)
+            ).fetchone()
+        if row is None or time.time() - row[1] > self.ttl:
+            return None
+        return row
+
+    def _put_disk(self, key: str, result: str, created_at: float) -> None:
+        with self._lock:
+            self._db.execute(
+                "INSERT OR REPLACE INTO prompt_results (key, model, result, created_at) VALUES (?, ?, ?, ?)",
+                (key, self.model, result, created_at),
+            )
+            self._db.execute(
+                "DELETE FROM prompt_results WHERE key IN "
+                "(SELECT key FROM prompt_results ORDER BY created_at DESC LIMIT -1 OFFSET ?)",
+                (self.max_rows,),
+            )
+
+    async def get(self, prompt: str) -> Optional[str]:
+        key = self.key(prompt)
+        result = self._get_memory(key)
+        if result is not None:
+            self.hits += 1
+            cache_lookups.inc(result="hit")
+            return result
+        if self._db is not None:
+            row = await asyncio.to_thread(self._get_disk, key)
+            if row is not None:
+                self.disk_hits += 1
+                cache_lookups.inc(result="disk_hit")
+                self._put_memory(key, *row)
+                return row[0]
+        self.misses += 1
+        cache_lookups.inc(result="miss")
+        return None
+
+    async def put(self, prompt: str, result: str) -> None:
+        key = self.key(prompt)
+        created_at = time.time()
+        self._put_memory(key, result, created_at)
+        if self._db is not None:
+            await asyncio.to_thread(self._put_disk, key, result, created_at)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+            cache_entries.set(0)
+            if self._db is not None:
+                self._db.execute("DELETE FROM prompt_results")
+
+    def stats(self) -> dict:
+        lookups = self.hits + self.disk_hits + self.misses
+        return {
+            "hits": self.hits,
+            "diskHits": self.disk_hits,
+            "misses": self.misses,
+            "hitRate": (self.hits + self.disk_hits) / lookups if lookups else 0.0,
+            "evictions": self.evictions,
+            "entries": len(self._entries),
+            "bytes": self._bytes,
+        }
+
+    def close(self) -> None:
+        with self._lock:
+            if self._db is not None:
+                self._db.close()
+                self._db = None
+
+
+prompt_cache = PromptCache()
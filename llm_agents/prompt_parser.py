@@ -0,0 +1,151 @@
+import re
+from collections import Counter
+from dataclasses import dataclass, field
+from decimal import Decimal, InvalidOperation
+from typing import List, Optional
+
+BECH32_CHARSET = "qpzry9x8gf2tvdw0s3jn54khce6mua7l"
+
+AMOUNT_UNITS = {
+    "k": 10 ** 3,
+    "thousand": 10 ** 3,
+    "m": 10 ** 6,
+    "mil": 10 ** 6,
+    "million": 10 ** 6,
+    "b": 10 ** 9,
+    "bn": 10 ** 9,
+    "billion": 10 ** 9,
+}
+
+# A single pass over the message; alternatives are tried in order at every position,
+# so digits inside addresses and token identifiers are never picked up as amounts.
+_SCANNER = re.compile(
+    rf"(?P<address>\berd1[{BECH32_CHARSET}]{{58}}\b)"
+    r"|(?P<malformed>\berd1\w+)"
+    r"|(?P<token>\b[A-Z0-9]{3,10}-[0-9a-f]{6}\b)"
+    r"|(?P<count>(?<![\w.,])\d+)\s+(?=(?i:addresses|address|receivers|recipients|wallets|accounts)\b)"
+    r"|(?P<amount>(?<![\w.,])(?:\d{1,3}(?:,\d{3})+|\d+)(?:\.\d+)?)"
+    r"(?:\s*(?P<unit>(?i:thousand|million|billion|mil|bn|k|m|b)))?(?![\w-])"
+)
+
+
+@dataclass
+class ParsedPrompt:
+    token_identifier: Optional[str] = None
+    amount: Optional[int] = None
+    receivers: List[str] = field(default_factory=list)
+    ambiguities: List[str] = field(default_factory=list)
+
+    @property
+    def is_confident(self) -> bool:
+        return not self.ambiguities
+
+    def to_json(self) -> dict:
+        return {
+            "tokenIdentifier": self.token_identifier,
+            "amount": self.amount,
+            "receivers": self.receivers,
+        }
+
+
+class ParserStats:
+    """
+    Counts how often the fast path answered a prompt and why it fell back to the LLM.
+    """
+
+    def __init__(self) -> None:
+        self.hits = 0
+        self.misses = 0
+        self.miss_reasons = Counter()
+
+    def record(self, parsed: ParsedPrompt) -> None:
+        if parsed.is_confident:
+            self.hits += 1
+        else:
+            self.misses += 1
+            self.miss_reasons.update(parsed.ambiguities)
+
+    def snapshot(self) -> dict:
+        return {"hits": self.hits, "misses": self.misses, "miss_reasons": dict(self.miss_reasons)}
+
+
+parser_stats = ParserStats()
+
+
+def _to_amount(number: str, unit: Optional[str]) -> Optional[int]:
+    """
+    Converts `1,000`, `2.5k` or `3 million` to an integer amount; returns None for fractional results.
+    """
+    try:
+        value = Decimal(number.replace(",", ""))
+    except InvalidOperation:
+        return None
+    if unit:
+        value *= AMOUNT_UNITS[unit.lower()]
+    if value != value.to_integral_value():
+        return None
+    return int(value)
+
+
+def parse_airdrop_prompt(message: str) -> ParsedPrompt:
+    """
+    Extracts the token identifier, amount per receiver and receivers from an airdrop message.
+
+    Example input:
+    "Send 1 BUILDO-22c0a5 to the following addresses erd1a9wdz7..., erd139adwt..."
+
+    Anything the grammar cannot resolve unambiguously is listed in `ambiguities`.
+    """
+    parsed = ParsedPrompt()
+    token_identifiers = []
+    amounts = []
+    counts = []
+
+    for match in _SCANNER.finditer(message or ""):
+        kind = match.lastgroup if match.lastgroup != "unit" else "amount"
+        if kind == "address":
+            parsed.receivers.append(match.group("address"))
+        elif kind == "malformed":
+            parsed.ambiguities.append("malformed_address")
+        elif kind == "token":
+            if match.group("token") not in token_identifiers:
+                token_identifiers.append(match.group("token"))
+        elif kind == "count":
+            counts.append(int(match.group("count")))
+        else:
+            amount = _to_amount(match.group("amount"), match.group("unit"))
+            if amount is None:
+                parsed.ambiguities.append("fractional_amount")
+            elif amount not in amounts:
+                amounts.append(amount)
+
+    if len(token_identifiers) == 1:
+        parsed.token_identifier = token_identifiers[0]
+    else:
+        parsed.ambiguities.append("no_token_identifier" if not token_identifiers else "multiple_token_identifiers")
+
+    if len(amounts) == 1:
+        parsed.amount = amounts[0]
+        if parsed.amount == 0:
+            parsed.ambiguities.append("zero_amount")
+    elif not amounts:
+        parsed.ambiguities.append("no_amount")
+    else:
+        parsed.ambiguities.append("multiple_amounts")
+
+    if not parsed.receivers:
+        parsed.ambiguities.append("no_receivers")
+    if any(count != len(parsed.receivers) for count in counts):
+        parsed.ambiguities.append("receiver_count_mismatch")
+
+    return parsed
+
+
+def fast_parse_airdrop_prompt(message: str) -> Optional[dict]:
+    """
+    Returns the airdrop JSON when the message parses with confidence, otherwise None
+    so the caller can fall back to the LLM. Every call is recorded in `parser_stats`.
+    """
+    parsed = parse_airdrop_prompt(message)
+    parser_stats.record(parsed)
+    return parsed.to_json() if parsed.is_confident else None
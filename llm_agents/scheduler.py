@@ -0,0 +1,218 @@
+import asyncio
+import heapq
+import itertools
+import json
+import math
+import os
+import time
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional, Tuple
+
+from llm_agents.ollama_client import OLLAMA_MAX_CONCURRENCY, OllamaClient, ollama_client
+from python_files.logger import logger
+from python_files.metrics import registry
+
+# Lower runs first
+INTERACTIVE = 0
+BACKGROUND = 1
+PRIORITY_NAMES = {INTERACTIVE: "interactive", BACKGROUND: "background"}
+
+LLM_QUEUE_SIZE = int(os.getenv("LLM_QUEUE_SIZE", "64"))
+LLM_INTERACTIVE_TIMEOUT_IN_SEC = float(os.getenv("LLM_INTERACTIVE_TIMEOUT_IN_SEC", "120"))
+LLM_BACKGROUND_TIMEOUT_IN_SEC = float(os.getenv("LLM_BACKGROUND_TIMEOUT_IN_SEC", "600"))
+DEFAULT_TIMEOUTS = {INTERACTIVE: LLM_INTERACTIVE_TIMEOUT_IN_SEC, BACKGROUND: LLM_BACKGROUND_TIMEOUT_IN_SEC}
+
+queue_depth = registry.gauge("llm_queue_depth", "LLM generations waiting for a slot", ["priority"])
+scheduled_total = registry.counter(
+    "llm_scheduled_total", "LLM generations by outcome (run, coalesced, rejected, expired)", ["priority", "outcome"]
+)
+queue_wait_seconds = registry.histogram("llm_queue_wait_seconds", "Time generations waited for a slot", ["priority"])
+
+
+class SchedulerError(Exception):
+    pass
+
+
+class SchedulerBusy(SchedulerError):
+    def __init__(self, message: str, retry_after: int) -> None:
+        super().__init__(message)
+        self.retry_after = retry_after
+
+
+class DeadlineExceeded(SchedulerError):
+    pass
+
+
+@dataclass(order=True)
+class _Job:
+    priority: int
+    sequence: int
+    deadline: float = field(compare=False)
+    key: Tuple[str, str] = field(compare=False)
+    prompt: str = field(compare=False)
+    options: Optional[dict] = field(compare=False)
+    future: asyncio.Future = field(compare=False)
+    queued_at: float = field(compare=False, default_factory=time.monotonic)
+
+
+class LLMScheduler:
+    """
+    Single entry point for LLM generations, so concurrent requests queue instead of
+    fighting over one model.
+
+    At most `max_concurrency` generations run at a time. Waiting ones are taken by priority,
+    interactive before background, then in arrival order. A caller that asks for a prompt
+    already queued or running gets the same result instead of a second generation; Ollama
+    has no multi-prompt API, so coalescing identical prompts is the only batching done.
+    Every call has a deadline, and a generation whose deadline passes while it waits is
+    dropped without running. When `max_queue` generations are already waiting, `generate`
+    raises `SchedulerBusy` with a retry-after estimate instead of queueing.
+    """
+
+    def __init__(
+            self,
+            client: OllamaClient = ollama_client,
+            max_concurrency: int = OLLAMA_MAX_CONCURRENCY,
+            max_queue: int = LLM_QUEUE_SIZE,
+            timeouts: Optional[Dict[int, float]] = None,
+    ) -> None:
+        self.client = client
+        self.max_concurrency = max(1, max_concurrency)
+        self.max_queue = max_queue
+        self.timeouts = {**DEFAULT_TIMEOUTS, **(timeouts or {})}
+        # Exponentially weighted average generation time, for the retry-after estimate
+        self.average_seconds = 1.0
+        self._queue: List[_Job] = []
+        self._jobs: Dict[Tuple[str, str], _Job] = {}
+        self._sequence = itertools.count()
+        self._wakeup: Optional[asyncio.Event] = None
+        self._workers: List[asyncio.Task] = []
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+
+    @property
+    def queued(self) -> int:
+        return len(self._queue)
+
+    def _start(self) -> None:
+        loop = asyncio.get_running_loop()
+        if self._loop is not loop:
+            # First use, or a new event loop (scripts calling asyncio.run more than once)
+            self._loop = loop
+            self._queue, self._jobs, self._workers = [], {}, []
+        if not self._workers:
+            self._wakeup = asyncio.Event()
+            self._workers = [asyncio.create_task(self._work()) for _ in range(self.max_concurrency)]
+
+    def retry_after(self) -> int:
+        return max(1, math.ceil(self.average_seconds * (len(self._queue) + 1) / self.max_concurrency))
+
+    async def generate(self, prompt: str, priority: int = INTERACTIVE, timeout: Optional[float] = None,
+                       options: Optional[dict] = None) -> str:
+        """
+        Runs `prompt` through the model, or joins an identical generation already scheduled,
+        and returns the response text. Raises `DeadlineExceeded` after `timeout` seconds.
+        """
+        self._start()
+        timeout = self.timeouts[priority] if timeout is None else timeout
+        deadline = time.monotonic() + timeout
+        key = (prompt, json.dumps(options, sort_keys=True) if options else "")
+        name = PRIORITY_NAMES.get(priority, str(priority))
+
+        job = self._jobs.get(key)
+        if job is not None:
+            scheduled_total.inc(priority=name, outcome="coalesced")
+            if priority < job.priority and not job.future.done() and job in self._queue:
+                # An interactive caller joined a background generation: move it up
+                self._requeue(job, priority, deadline)
+            job.deadline = max(job.deadline, deadline)
+        else:
+            if len(self._queue) >= self.max_queue:
+                scheduled_total.inc(priority=name, outcome="rejected")
+                raise SchedulerBusy(f"LLM queue is full ({self.max_queue} waiting)", self.retry_after())
+            job = _Job(priority, next(self._sequence), deadline, key, prompt, options,
+                       asyncio.get_running_loop().create_future())
+            self._jobs[key] = job
+            heapq.heappush(self._queue, job)
+            queue_depth.inc(priority=name)
+            self._wakeup.set()
+
+        try:
+            return await asyncio.wait_for(asyncio.shield(job.future), max(0.0, deadline - time.monotonic()))
+        except asyncio.TimeoutError:
+            raise DeadlineExceeded(f"LLM generation did not finish within {timeout:g} seconds") from None
+
+    def _requeue(self, job: _Job, priority: int, deadline: float) -> None:
+        self._queue.remove(job)
+        heapq.heapify(self._queue)
+        queue_depth.dec(priority=PRIORITY_NAMES.get(job.priority, str(job.priority)))
+        job.priority, job.sequence = priority, next(self._sequence)
+        job.deadline = max(job.deadline, deadline)
+        heapq.heappush(self._queue, job)
+        queue_depth.inc(priority=PRIORITY_NAMES.get(priority, str(priority)))
+
+    async def _next_job(self) -> _Job:
+        while not self._queue:
+            self._wakeup.clear()
+            await self._wakeup.wait()
+        job = heapq.heappop(self._queue)
+        name = PRIORITY_NAMES.get(job.priority, str(job.priority))
+        queue_depth.dec(priority=name)
+        queue_wait_seconds.observe(time.monotonic() - job.queued_at, priority=name)
+        return job
+
+    async def _work(self) -> None:
+        while True:
+            job = await self._next_job()
+            name = PRIORITY_NAMES.get(job.priority, str(job.priority))
+            remaining = job.deadline - time.monotonic()
+            if remaining <= 0:
+                scheduled_total.inc(priority=name, outcome="expired")
+                self._finish(job, exception=DeadlineExceeded("LLM generation expired while queued"))
+                continue
+
+            scheduled_total.inc(priority=name, outcome="run")
+            start = time.monotonic()
+            try:
+                result = await asyncio.wait_for(self.client.generate(job.prompt, job.options), remaining)
+            except asyncio.TimeoutError:
+                self._finish(job, exception=DeadlineExceeded("LLM generation ran past its deadline"))
+            except asyncio.CancelledError:
+                self._finish(job, exception=SchedulerError("LLM scheduler stopped"))
+                raise
+            except Exception as e:
+                self._finish(job, exception=e)
+            else:
+                self.average_seconds = 0.8 * self.average_seconds + 0.2 * (time.monotonic() - start)
+                self._finish(job, result=result)
+
+    def _finish(self, job: _Job, result: Optional[str] = None, exception: Optional[BaseException] = None) -> None:
+        self._jobs.pop(job.key, None)
+        if job.future.done():
+            return
+        if exception is not None:
+            job.future.set_exception(exception)
+            # Nobody may be waiting any more; do not log "exception was never retrieved"
+            job.future.exception()
+        else:
+            job.future.set_result(result)
+
+    def stats(self) -> dict:
+        return {
+            "queued": len(self._queue),
+            "scheduled": len(self._jobs),
+            "averageSeconds": round(self.average_seconds, 3),
+        }
+
+    async def close(self) -> None:
+        for worker in self._workers:
+            worker.cancel()
+        await asyncio.gather(*self._workers, return_exceptions=True)
+        self._workers = []
+        for job in self._queue:
+            queue_depth.dec(priority=PRIORITY_NAMES.get(job.priority, str(job.priority)))
+            self._finish(job, exception=SchedulerError("LLM scheduler stopped"))
+        self._queue.clear()
+        logger.info("LLM scheduler stopped")
+
+
+llm_scheduler = LLMScheduler()
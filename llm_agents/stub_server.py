@@ -0,0 +1,85 @@
+"""
+Minimal stand-in for the Ollama HTTP API, so the LLM layer can be exercised offline.
+
+Usage:
+    python -m llm_agents.stub_server --port 11434 --reply True
+"""
+import argparse
+import asyncio
+import json
+from contextlib import asynccontextmanager
+from typing import Callable, Optional
+
+from aiohttp import web
+
+Responder = Callable[[str], str]
+
+
+def create_stub_app(responder: Optional[Responder] = None, delay: float = 0.0) -> web.Application:
+    """
+    Builds an app answering /api/generate with `responder(prompt)`.
+    Streaming requests receive the reply word by word as NDJSON chunks.
+    """
+    responder = responder or (lambda prompt: "")
+    app = web.Application()
+    app["requests"] = []
+
+    async def generate(request: web.Request) -> web.StreamResponse:
+        payload = await request.json()
+        prompt = payload.get("prompt", "")
+        app["requests"].append(payload)
+        if delay:
+            await asyncio.sleep(delay)
+        reply = responder(prompt)
+
+        if not payload.get("stream", True):
+            return web.json_response(
+                {"model": payload.get("model"), "response": reply, "done": True}
+            )
+
+        response = web.StreamResponse(headers={"Content-Type": "application/x-ndjson"})
+        await response.prepare(request)
+        for token in reply.split(" "):
+            chunk = {"model": payload.get("model"), "response": token + " ", "done": False}
+            await response.write(json.dumps(chunk).encode() + b"\n")
+        await response.write(json.dumps({"model": payload.get("model"), "response": "", "done": True}).encode() + b"\n")
+        await response.write_eof()
+        return response
+
+    async def tags(request: web.Request) -> web.Response:
+        return web.json_response({"models": []})
+
+    app.router.add_post("/api/generate", generate)
+    app.router.add_get("/api/tags", tags)
+    return app
+
+
+@asynccontextmanager
+async def run_stub_server(responder: Optional[Responder] = None, host: str = "127.0.0.1", port: int = 0,
+                          delay: float = 0.0):
+    """
+    Serves the stub in the current event loop and yields its base URL.
+    """
+    runner = web.AppRunner(create_stub_app(responder, delay))
+    await runner.setup()
+    site = web.TCPSite(runner, host, port)
+    await site.start()
+    bound_port = site._server.sockets[0].getsockname()[1]
+    try:
+        yield f"http://{host}:{bound_port}"
+    finally:
+        await runner.cleanup()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=11434)
+    parser.add_argument("--reply", default="", help="Fixed reply returned for every prompt")
+    parser.add_argument("--delay", type=float, default=0.0, help="Seconds to wait before answering")
+    args = parser.parse_args()
+    web.run_app(create_stub_app(lambda prompt: args.reply, args.delay), host=args.host, port=args.port)
+
+
+if __name__ == "__main__":
+    main()
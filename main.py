@@ -1,121 +1,517 @@
+import asyncio
 import json
+from collections import deque
+from pathlib import Path
+from typing import Awaitable, Callable, List, Optional, Tuple
 
 from multiversx_sdk import Address
-from quart import Quart, request, jsonify
+from quart import Quart, Request, Response, request, jsonify, stream_with_context
 from quart_cors import cors
-from llm_agents.agents import fetch_address_details, fetch_esdt_details, validate_bech32_addresses, \
-    create_multi_esdt_transfer_transaction, user_prompt_to_json
+from llm_agents.agents import user_prompt_to_json, plan_multi_esdt_transfer_transactions, \
+    build_multi_esdt_transfer_transaction
+from llm_agents.ollama_client import ollama_client
+from llm_agents.prompt_cache import prompt_cache
+from llm_agents.scheduler import SchedulerBusy, llm_scheduler
+from llm_agents.prompt_parser import parser_stats
+
+from python_files.account_cache import account_state_cache
+from python_files.config import AIRDROP_STAGE_TIMEOUTS_IN_SEC, BULK_MAX_UPLOAD_IN_BYTES, JOB_STORE_PATH, \
+    SIGNER_PEM_PATH, provider
+from python_files.broadcaster import BroadcastQueueFull, TransactionBroadcaster
+from python_files.gateway_client import GatewayError, close_gateway_clients, gateway_client
+from python_files.batch_planner import SmartSaveBatcher, SmartSaveChunk
+from python_files.http_client import http_metrics
+from python_files.jobs import JobManager, JobQueueFull, MemoryJobStore, SqliteJobStore
+from python_files.logger import log_payload, logger
+from python_files.metrics import registry, server_timing_header, span, start_request_spans
+from python_files.nonce_manager import nonce_manager
+from python_files.stage_graph import Stage, StageTimeout, run_stages
+from main2 import bech32_to_hex
+from utils.bech32_codec import decode_bech32_addresses
+from utils.receiver_stream import detect_format, iter_receiver_rows, iter_row_blocks
+
+
+class AirdropRequest(Request):
+    """
+    Request whose body limit is BULK_MAX_UPLOAD_IN_BYTES for /airdrop/bulk uploads. Quart fixes
+    the limit when the request is created, before any view runs, so it is raised here.
+    """
+
+    def __init__(self, method, scheme, path, *args, **kwargs):
+        if path == "/airdrop/bulk":
+            kwargs["max_content_length"] = BULK_MAX_UPLOAD_IN_BYTES
+        super().__init__(method, scheme, path, *args, **kwargs)
 
-from python_files.config import provider
 
 app = Quart("SmartAirdrop")
+app.request_class = AirdropRequest
 app = cors(app, allow_origin="*")
 
-@app.route('/airdrop', methods=['OPTIONS', 'POST'])
-async def airdrop():
-    if request.method == 'OPTIONS':
-        return _build_cors_preflight_response()
+requests_total = registry.counter("http_requests_total", "Requests answered by the service", ["route", "status"])
+requests_in_flight = registry.gauge("http_requests_in_flight", "Requests currently being handled")
+
+# Awaited by `run_airdrop` with each completed stage and its details
+ProgressCallback = Callable[[str, dict], Awaitable[None]]
 
+# Service mode: sign and broadcast with the configured wallet instead of returning unsigned transactions
+broadcaster = TransactionBroadcaster(Path(SIGNER_PEM_PATH)) if SIGNER_PEM_PATH else None
+
+
+@app.before_serving
+async def warm_up_llm():
     try:
-        # Get input parameters from the POST request
-        data = await request.get_json()
-        print("Received input data:", data)
+        await ollama_client.warm_up()
+    except Exception as e:
+        logger.warning(f"Could not warm up the LLM: {e}")
 
-        u_prompt = data.get("InputMessage")
-        print(u_prompt)
-        json_user_prompt = await user_prompt_to_json(u_prompt)
-        json_user_prompt = json.loads(json_user_prompt)
 
-        amount_per_receiver = int(json_user_prompt.get("amount", 0))
-        receivers = json_user_prompt.get("receivers", "")
-        amounts = [amount_per_receiver] * len(receivers)
-        esdt_amount = len(receivers) * amount_per_receiver
+@app.before_serving
+async def start_broadcaster():
+    if broadcaster is not None:
+        await broadcaster.start()
 
 
+@app.before_serving
+async def start_job_workers():
+    await job_manager.start()
 
-        sender = data.get("Sender", "")
-        # receivers = ["erd1ysrfrcysz54460rhmvqm43rn7jmugkh2zl5eahmywn9yap55hfkq0sjqzy", "erd1smmxpkzp0s9udp28yxd9wvxrjl58267h3glq20pctxdk0h747fpq8lal97"]
 
-        # token_identifier = "TKN-1a2b3c"
-        token_identifier = json_user_prompt.get("tokenIdentifier", "")
-        contract_address = data.get("ContractAddress", "")
-        service_address = data.get("ServiceAddress", "")
-        chain_id = data.get("ChainId", "")
-        host = "https://devnet-gateway.multiversx.com"
-        # print(f"Host: {host}, Sender: {sender}, Receivers: {receivers}, Token: {token_identifier}, Amount: {amount}")
+@app.after_serving
+async def close_http_clients():
+    await job_manager.close()
+    if broadcaster is not None:
+        await broadcaster.close()
+    await llm_scheduler.close()
+    await ollama_client.close()
+    prompt_cache.close()
+    await close_gateway_clients()
 
-        # Validate addresses (sender and receivers)
-        # print("Validating Bech32 addresses...")
-        # all_addresses = receivers + [sender]
-        # are_all_valid = await validate_bech32_addresses(all_addresses)
-        #
-        #
-        # if not bool(are_all_valid):
-        #     print("Address validation failed. Some addresses are invalid.")
-        #     return jsonify({"error": "One or more addresses are invalid"}), 400
 
+@app.before_request
+async def start_request_metrics():
+    start_request_spans()
+    requests_in_flight.inc()
+    # Torn down once per context: a streamed response has a second one, see `stream_request`
+    request.open_contexts = 1
 
-        # # Fetch Address Details
-        print(f"Fetching address details for {sender}")
-        address_details = await fetch_address_details(host, sender)
-        print("Fetched Address Details:", address_details)
 
-        # address_details = {'data': {'account': {'address': 'erd138cn6lupfdgn3euh29acrrnp5l8g5vy9ax249zp0j8wd03k3y42qttsz8g', 'nonce': 1025, 'balance': '597563760000000000', 'username': '', 'code': '', 'codeHash': None, 'rootHash': '3Zt4TxfQ9P3viFo5yJejXfdsZ6RZeoftLsKb4GSyYZ8=', 'codeMetadata': None, 'developerReward': '0', 'ownerAddress': ''}, 'blockInfo': {'nonce': 967104, 'hash': 'af05df13cd04ef3c3f5cf0b65c748434fb3e6f3876ee21e93437fb6679555937', 'rootHash': '33f564b8c45f90a49f49a95b0f23217abd3d10c3230dad138f62a356a0f42bd2'}}, 'error': '', 'code': 'successful'}
+@app.after_request
+async def finish_request_metrics(response):
+    rule = request.url_rule.rule if request.url_rule is not None else "unmatched"
+    requests_total.inc(route=rule, status=str(response.status_code))
+    timing = server_timing_header()
+    if timing:
+        response.headers["Server-Timing"] = timing
+    return response
 
-        # Validate balance in address details
-        account_data = address_details.get("data", {}).get("account", {})
-        address_balance = int(account_data.get("balance", "0"))
-        nonce = address_details.get("data").get("account").get("nonce")
 
-        # if address_balance <= 0:
-        #     print("Insufficient EGLD balance.")
-        #     return jsonify({"error": "Sender's EGLD balance is insufficient (must be greater than 0)"}), 400
+@app.teardown_request
+async def release_request_metrics(exception):
+    request.open_contexts -= 1
+    if request.open_contexts == 0:
+        requests_in_flight.dec()
+
+
+def stream_request(func):
+    """
+    `stream_with_context` for views: the request stays in flight until its stream ends, when
+    the copied request context is torn down, instead of when the view returns.
+    """
+    request.open_contexts += 1
+    return stream_with_context(func)
+
+
+def _collect_service_metrics():
+    """
+    Exports the stats kept by the prompt parser, the caches and the HTTP clients.
+    """
+    parser = parser_stats.snapshot()
+    cache = account_state_cache.stats()
+    endpoints = http_metrics.snapshot()
+    return [
+        ("prompt_parser_hits_total", "counter", "Prompts answered by the grammar",
+         [("prompt_parser_hits_total", {}, parser["hits"])]),
+        ("prompt_parser_misses_total", "counter", "Prompts sent to the LLM, by reason",
+         [("prompt_parser_misses_total", {"reason": reason}, count) for reason, count in parser["miss_reasons"].items()]),
+        ("account_cache_hits_total", "counter", "Account state cache hits",
+         [("account_cache_hits_total", {}, cache["hits"])]),
+        ("account_cache_misses_total", "counter", "Account state cache misses",
+         [("account_cache_misses_total", {}, cache["misses"])]),
+        ("account_cache_evictions_total", "counter", "Account state cache evictions",
+         [("account_cache_evictions_total", {}, cache["evictions"])]),
+        ("account_cache_entries", "gauge", "Account state cache entries",
+         [("account_cache_entries", {}, cache["entries"])]),
+        ("prompt_cache_hit_ratio", "gauge", "Share of LLM prompts answered from the prompt cache",
+         [("prompt_cache_hit_ratio", {}, prompt_cache.stats()["hitRate"])]),
+        ("upstream_http_requests_total", "counter", "Outgoing HTTP requests, by endpoint",
+         [("upstream_http_requests_total", {"endpoint": endpoint}, stats["count"]) for endpoint, stats in endpoints.items()]),
+        ("upstream_http_errors_total", "counter", "Failed outgoing HTTP requests, by endpoint",
+         [("upstream_http_errors_total", {"endpoint": endpoint}, stats["errors"]) for endpoint, stats in endpoints.items()]),
+        ("upstream_http_latency_seconds", "summary", "Outgoing HTTP request latency over recent requests",
+         [("upstream_http_latency_seconds", {"endpoint": endpoint, "quantile": quantile}, stats[key] / 1000)
+          for endpoint, stats in endpoints.items() for quantile, key in (("0.5", "p50_ms"), ("0.95", "p95_ms"))]),
+    ]
+
+
+registry.add_collector(_collect_service_metrics)
+
+
+@app.route('/metrics', methods=['GET'])
+async def metrics():
+    return Response(registry.render(), mimetype="text/plain; version=0.0.4")
 
-        # Fetch ESDT Details
-        print(f"Fetching ESDT details for {sender}")
-        esdt_details = await fetch_esdt_details(host, sender)
-        print("Fetched ESDT Details:", esdt_details)
 
-        # Parse the ESDT data
-        # esdt_details = {'data': {'blockInfo': {'hash': '16074bffd3900da8428e41c759b3f89f707b4db5ceda36c7962f432cf1416991', 'nonce': 967105, 'rootHash': '33f564b8c45f90a49f49a95b0f23217abd3d10c3230dad138f62a356a0f42bd2'}, 'esdts': {'SNOW-13d1ef': {'balance': '99999999969000', 'tokenIdentifier': 'SNOW-13d1ef', 'type': 'FungibleESDT'}, 'TKN-1a2b3c': {'balance': '100000000000000', 'tokenIdentifier': 'SNOW-896a35', 'type': 'FungibleESDT'}, 'SNOW-ed984b': {'balance': '100000000000000', 'tokenIdentifier': 'SNOW-ed984b', 'type': 'FungibleESDT'}, 'WINTER-994654': {'balance': '9000000000000000', 'tokenIdentifier': 'WINTER-994654', 'type': 'FungibleESDT'}}}, 'error': '', 'code': 'successful'}
+@app.route('/airdrop', methods=['OPTIONS', 'POST'])
+async def airdrop():
+    if request.method == 'OPTIONS':
+        return _build_cors_preflight_response()
 
-        esdt_data = esdt_details.get("data", {}).get("esdts", {})
-        print("Parsed ESDT Data:", esdt_data)
-        sender_token = esdt_data.get(token_identifier)
+    # Get input parameters from the POST request
+    data = await request.get_json()
+    log_payload("Received input data:", data)
+    body, status, headers = await run_airdrop(data)
+    return jsonify(body), status, headers
+
+
+class AirdropRejected(Exception):
+    """
+    Ends an airdrop early with an error response.
+    """
+
+    def __init__(self, message: str, status: int, headers: Optional[dict] = None) -> None:
+        super().__init__(message)
+        self.status = status
+        self.headers = headers or {}
+
+
+async def run_airdrop(data: dict, progress: Optional[ProgressCallback] = None) -> Tuple[dict, int, dict]:
+    """
+    Turns an `/airdrop` request body into its transactions, or in service mode their hashes.
+    Returns the response body, HTTP status and headers; `progress` is awaited with each
+    completed stage and its details.
+
+    The stages run as a dependency graph: the sender lookup only needs `Sender`, so it runs
+    while the prompt is parsed, and planning starts once both are done.
+    """
+    async def report(stage: str, **details) -> None:
+        if progress is not None:
+            await progress(stage, details)
+
+    u_prompt = data.get("InputMessage")
+    sender = data.get("Sender", "")
+    contract_address = data.get("ContractAddress", "")
+    service_address = data.get("ServiceAddress", "")
+    chain_id = data.get("ChainId", "")
+    if broadcaster is not None:
+        sender = sender or broadcaster.address
+        if sender != broadcaster.address:
+            return {"error": f"This service only signs for {broadcaster.address}"}, 400, {}
+
+    async def parse():
+        if not isinstance(u_prompt, str) or not u_prompt.strip():
+            raise AirdropRejected("InputMessage is required", 400)
+        try:
+            json_user_prompt = json.loads(await user_prompt_to_json(u_prompt))
+        except SchedulerBusy as e:
+            logger.warning(f"Rejected airdrop: {e}")
+            raise AirdropRejected(str(e), 503, {"Retry-After": str(e.retry_after)})
+        except ValueError:
+            raise AirdropRejected("The AI agent did not return valid JSON", 502) from None
+        if not isinstance(json_user_prompt, dict):
+            raise AirdropRejected("The AI agent did not return a JSON object", 502)
+        if json_user_prompt.get("error"):
+            error = str(json_user_prompt["error"])
+            # "AI agent error" means the LLM could not be reached or did not answer in time;
+            # any other error is the model refusing the prompt
+            raise AirdropRejected(error, 502 if error.startswith("AI agent error") else 400)
+        receivers = json_user_prompt.get("receivers")
+        if not isinstance(receivers, list) or not receivers:
+            raise AirdropRejected("No receivers found in the prompt", 400)
+        try:
+            json_user_prompt["amount"] = int(json_user_prompt.get("amount", 0))
+        except (TypeError, ValueError):
+            raise AirdropRejected(f"Invalid amount: {json_user_prompt.get('amount')!r}", 400) from None
+        await report("parse", receivers=len(receivers), tokenIdentifier=json_user_prompt.get("tokenIdentifier", ""))
+        return json_user_prompt
+
+    async def sender_state():
+        # Fetch Address and ESDT Details concurrently
+        logger.info(f"Fetching address and ESDT details for {sender}")
+        try:
+            state = await gateway_client.fetch_sender_state(sender)
+        except GatewayError as e:
+            logger.error(f"Failed to fetch sender details: {e}")
+            raise AirdropRejected(f"Failed to fetch sender details: {str(e)}", 502)
+        log_payload("Fetched Address Details:", state.account)
+        log_payload("Parsed ESDT Data:", state.esdts.esdts)
+        await report("sender_state", nonce=state.account.nonce)
+        return state
+
+    async def plan(parse, sender_state):
+        amount_per_receiver = parse["amount"]
+        receivers = parse["receivers"]
+        amounts = [amount_per_receiver] * len(receivers)
+        token_identifier = parse.get("tokenIdentifier", "")
 
+        sender_token = sender_state.esdts.get(token_identifier)
         if not sender_token:
-            print(f"Token {token_identifier} not found for sender {sender}.")
-            return jsonify({"error": f"Token {token_identifier} not found for sender {sender}"}), 400
+            logger.warning(f"Token {token_identifier} not found for sender {sender}.")
+            raise AirdropRejected(f"Token {token_identifier} not found for sender {sender}", 400)
+        logger.info(f"Sender's Token Balance: {sender_token.balance}")
+
+        # Create MultiESDTNFTTransfer Transactions, as many as the gas and data-size limits require
+        logger.info("Creating MultiESDTNFTTransfer transactions...")
+        chunks = plan_multi_esdt_transfer_transactions(sender=sender, receivers=receivers, token_identifier=token_identifier, contract_address=contract_address, service_address=service_address, amounts=amounts)
+        if isinstance(chunks, dict):
+            # Invalid addresses or amounts in the request
+            logger.warning(f"Failed to create transaction: {chunks['error']}")
+            raise AirdropRejected(chunks["error"], 400)
+        if not chunks:
+            raise AirdropRejected("The airdrop has no transactions to send", 400)
+        await report("plan", transactions=len(chunks), tokenBalance=str(sender_token.balance))
+        return chunks
+
+    async def nonce(plan, sender_state):
+        # Reserve consecutive nonces locally so concurrent airdrops from this sender don't reuse them
+        return await nonce_manager.allocate(sender, count=len(plan), observed_nonce=sender_state.account.nonce)
+
+    async def build(plan, nonce):
+        transactions = [
+            build_multi_esdt_transfer_transaction(chain_id, sender, nonce + index, chunk.encode_data(), len(chunk.receiver_hexes))
+            for index, chunk in enumerate(plan)
+        ]
+        log_payload(f"Final Response Data: {len(transactions)} transaction(s)", transactions)
+        await report("build", firstNonce=nonce, transactions=len(transactions))
+        return transactions
+
+    async def broadcast(build):
+        return await _broadcast_response(build)
+
+    stages = [
+        Stage("parse", parse),
+        Stage("sender_state", sender_state),
+        Stage("plan", plan, ("parse", "sender_state")),
+        Stage("nonce", nonce, ("plan", "sender_state")),
+        Stage("build", build, ("plan", "nonce")),
+    ]
+    if broadcaster is not None:
+        stages.append(Stage("broadcast", broadcast, ("build",)))
+    for stage in stages:
+        stage.timeout = AIRDROP_STAGE_TIMEOUTS_IN_SEC.get(stage.name)
+
+    try:
+        results = await run_stages(stages)
+    except AirdropRejected as e:
+        return {"error": str(e)}, e.status, e.headers
+    except StageTimeout as e:
+        logger.error(f"Airdrop timed out: {e}")
+        return {"error": str(e)}, 504, {}
+    except Exception as e:
+        logger.exception(f"Unexpected error: {e}")
+        return {"error": f"Unexpected error: {str(e)}"}, 500, {}
 
-        sender_balance = int(sender_token.get("balance", "0"))
-        print(f"Sender's Token Balance: {sender_balance}")
+    if broadcaster is not None:
+        return results["broadcast"]
+    transactions = results["build"]
+    if len(transactions) == 1:
+        return transactions[0], 200, {}
+    return {"transactions": transactions}, 200, {}
 
-        # if sender_balance < esdt_amount:
-        #     print("Insufficient token balance for the airdrop.")
-        #     return jsonify({"error": "Insufficient token balance for the airdrop"}), 400
 
+# Background airdrops (POST /airdrop/jobs); a SQLite store lets every worker process answer for every job
+job_manager = JobManager(run_airdrop, SqliteJobStore(JOB_STORE_PATH) if JOB_STORE_PATH else MemoryJobStore())
 
-        # Create MultiESDTNFTTransfer Transaction
-        print("Creating MultiESDTNFTTransfer transaction...")
-        # esdt_amount = 300000000000000000000
-        # service_address = "erd1h7yfpy2zzc4g0jl0j7zyg7ggl80g9a5mmssckv9r3n0a7s868h0q4dszch"
-        # contract_address = "erd1tvz9hk4lzsn57rltj7r06n9vjxtpr30f3n52tujuvznl37zhd8vq5uzxxx"
-        # amounts = [150000000000000000000,150000000000000000000]
-        transaction = await create_multi_esdt_transfer_transaction(chain_id=chain_id,esdt_amount=esdt_amount, service_address=service_address, amounts=amounts, sender=sender, receivers=receivers, token_identifier=token_identifier, contract_address=contract_address, nonce=nonce)
 
-        if "error" in transaction:
-            print("Failed to create transaction:", transaction["error"])
-            return jsonify({"error": transaction["error"]}), 500
+@app.route('/airdrop/jobs', methods=['OPTIONS', 'POST'])
+async def submit_airdrop_job():
+    """
+    Queues an `/airdrop` request body as a background job and answers at once with its id.
+    Follow it with `GET /airdrop/jobs/<id>` or the `GET /airdrop/jobs/<id>/events` stream.
+    """
+    if request.method == 'OPTIONS':
+        return _build_cors_preflight_response()
 
-        # Prepare response
-        transaction
-        print("Final Response Data:", transaction)
+    data = await request.get_json()
+    if not isinstance(data, dict):
+        return jsonify({"error": "Expected a JSON object"}), 400
+    try:
+        job = await job_manager.submit(data)
+    except JobQueueFull as e:
+        logger.warning(f"Rejected airdrop job: {e}")
+        return jsonify({"error": str(e)}), 503, {"Retry-After": "5"}
+    return jsonify({"id": job.id, "status": job.status}), 202, {"Location": f"/airdrop/jobs/{job.id}"}
+
+
+@app.route('/airdrop/jobs/<job_id>', methods=['GET'])
+async def get_airdrop_job(job_id):
+    job = await job_manager.get(job_id)
+    if job is None:
+        return jsonify({"error": f"Job {job_id} not found"}), 404
+    return jsonify(job.to_dict())
+
+
+@app.route('/airdrop/jobs/<job_id>/events', methods=['GET'])
+async def airdrop_job_events(job_id):
+    """
+    Server-sent events for a job: `status`, one `stage` per completed stage and a final
+    `result` with the transactions, or their hashes in service mode. Reconnecting clients
+    resume after the `Last-Event-ID` header or the `after` query parameter.
+    """
+    if await job_manager.get(job_id) is None:
+        return jsonify({"error": f"Job {job_id} not found"}), 404
+    try:
+        after = int(request.headers.get("Last-Event-ID") or request.args.get("after") or 0)
+    except ValueError:
+        return jsonify({"error": "Last-Event-ID must be an event sequence number"}), 400
+
+    @stream_request
+    async def sse_lines():
+        async for event in job_manager.events(job_id, after):
+            if event is None:
+                yield ": keep-alive\n\n"
+                continue
+            sequence, name, data = event
+            yield f"id: {sequence}\nevent: {name}\ndata: {json.dumps(data)}\n\n"
+
+    response = Response(sse_lines(), mimetype="text/event-stream")
+    response.headers["Cache-Control"] = "no-cache"
+    # The stream lasts as long as the job
+    response.timeout = None
+    return response
 
-        return transaction
 
-    except Exception as e:
-        print("Unexpected error:", str(e))
-        return jsonify({"error": f"Unexpected error: {str(e)}"}), 500
+@app.route('/airdrop/bulk', methods=['OPTIONS', 'POST'])
+async def airdrop_bulk():
+    """
+    Streams an airdrop from a CSV (`address,amount`) or JSONL (`{"address", "amount"}`) upload.
+    Airdrop parameters come from the query string; the response is NDJSON with one line per
+    transaction as soon as its chunk is full, one line per rejected row and a final summary.
+    In service mode the transaction lines are replaced by `{"nonce", "hash"}` lines once broadcast.
+
+    The upload is parsed as it arrives, but Quart does not slow the client down: whatever has not
+    been read yet, e.g. while the broadcast queue is full, is kept in memory. Uploads are therefore
+    capped at BULK_MAX_UPLOAD_IN_BYTES (see `AirdropRequest`) instead of the app-wide limit.
+    """
+    if request.method == 'OPTIONS':
+        return _build_cors_preflight_response()
+
+    args = request.args
+    sender = args.get("Sender", "")
+    token_identifier = args.get("TokenIdentifier", "")
+    contract_address = args.get("ContractAddress", "")
+    service_address = args.get("ServiceAddress", "")
+    chain_id = args.get("ChainId", "")
+
+    try:
+        upload_format = detect_format(request.content_type, args.get("Format"))
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+
+    contract_hex = bech32_to_hex(contract_address)
+    service_hex = bech32_to_hex(service_address)
+    if broadcaster is not None:
+        sender = sender or broadcaster.address
+        if sender != broadcaster.address:
+            return jsonify({"error": f"This service only signs for {broadcaster.address}"}), 400
+    if not token_identifier or not chain_id or not contract_hex or not service_hex or not bech32_to_hex(sender):
+        return jsonify({"error": "Sender, TokenIdentifier, ContractAddress, ServiceAddress and ChainId are required"}), 400
+
+    try:
+        with span("sender_state"):
+            sender_state = await gateway_client.fetch_sender_state(sender)
+    except GatewayError as e:
+        return jsonify({"error": f"Failed to fetch sender details: {str(e)}"}), 502
+    if not sender_state.esdts.get(token_identifier):
+        return jsonify({"error": f"Token {token_identifier} not found for sender {sender}"}), 400
+
+    # In service mode, transactions being broadcast, oldest first, with their hash futures
+    broadcasting = deque()
+
+    async def transaction_lines(chunk: SmartSaveChunk) -> List[str]:
+        nonce = await nonce_manager.allocate(sender, observed_nonce=sender_state.account.nonce)
+        data_field = chunk.encode_data()
+        transaction = build_multi_esdt_transfer_transaction(chain_id, sender, nonce, data_field, len(chunk.receiver_hexes))
+        if broadcaster is None:
+            return [json.dumps(transaction) + "\n"]
+        # Waits while the broadcast queue is full; the rest of the upload meanwhile accumulates in memory
+        broadcasting.append((transaction, await broadcaster.submit(transaction)))
+        lines = []
+        while broadcasting and broadcasting[0][1].done():
+            lines.append(_broadcast_line(*broadcasting.popleft()))
+        return lines
+
+    @stream_request
+    async def ndjson_lines():
+        batcher = SmartSaveBatcher(contract_hex, service_hex, token_identifier)
+        summary = {"transactions": 0, "receivers": 0, "esdtAmount": 0, "rejectedRows": 0}
+        try:
+            async for block in iter_row_blocks(iter_receiver_rows(request.body, upload_format)):
+                parsed_rows = []
+                for row in block:
+                    if row.error:
+                        summary["rejectedRows"] += 1
+                        yield json.dumps({"line": row.line, "error": row.error}) + "\n"
+                    else:
+                        parsed_rows.append(row)
+
+                decoded = decode_bech32_addresses([row.address for row in parsed_rows])
+                for index, (row, receiver_hex) in enumerate(zip(parsed_rows, decoded.hexes())):
+                    if receiver_hex is None:
+                        summary["rejectedRows"] += 1
+                        yield json.dumps({"line": row.line, "error": f"invalid address: {decoded.errors[index]}"}) + "\n"
+                        continue
+                    summary["receivers"] += 1
+                    summary["esdtAmount"] += row.amount
+                    chunk = batcher.add(receiver_hex, row.amount)
+                    if chunk:
+                        summary["transactions"] += 1
+                        for line in await transaction_lines(chunk):
+                            yield line
+
+            chunk = batcher.flush()
+            if chunk:
+                summary["transactions"] += 1
+                for line in await transaction_lines(chunk):
+                    yield line
+            while broadcasting:
+                transaction, future = broadcasting.popleft()
+                await asyncio.wait([future])
+                yield _broadcast_line(transaction, future)
+        except Exception as e:
+            logger.exception(f"Bulk airdrop aborted: {e}")
+            yield json.dumps({"error": f"Bulk airdrop aborted: {str(e)}"}) + "\n"
+            return
+        summary["esdtAmount"] = str(summary["esdtAmount"])
+        yield json.dumps({"summary": summary}) + "\n"
+
+    response = Response(ndjson_lines(), mimetype="application/x-ndjson")
+    # Large uploads take longer to parse and broadcast than the default response timeout
+    response.timeout = None
+    return response
+
+
+async def _broadcast_response(transactions):
+    """
+    Signs and sends the airdrop transactions, answering with their hashes in nonce order.
+    """
+    try:
+        outcomes = await broadcaster.broadcast(transactions)
+    except BroadcastQueueFull as e:
+        raise AirdropRejected(str(e), 503, {"Retry-After": "1"})
+
+    results = [
+        {"nonce": transaction["nonce"], "error": str(outcome)} if isinstance(outcome, Exception)
+        else {"nonce": transaction["nonce"], "hash": outcome}
+        for transaction, outcome in zip(transactions, outcomes)
+    ]
+    failed = any("error" in result for result in results)
+    return {"hashes": [result.get("hash") for result in results], "results": results}, 502 if failed else 200, {}
+
+
+def _broadcast_line(transaction, future) -> str:
+    if future.exception() is not None:
+        return json.dumps({"nonce": transaction["nonce"], "error": str(future.exception())}) + "\n"
+    return json.dumps({"nonce": transaction["nonce"], "hash": future.result()}) + "\n"
 
 
 def _build_cors_preflight_response():
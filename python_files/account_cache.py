@@ -0,0 +1,166 @@
+import asyncio
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from functools import lru_cache
+from typing import Any, Awaitable, Callable, Dict, Hashable, Optional
+
+from multiversx_sdk import Address
+
+from python_files.config import ACCOUNT_CACHE_MAX_ENTRIES, ACCOUNT_CACHE_TTL_IN_SEC, address_computer
+
+UNKNOWN_SHARD = -1
+
+
+@lru_cache(maxsize=ACCOUNT_CACHE_MAX_ENTRIES)
+def shard_of(address: str) -> int:
+    try:
+        return address_computer.get_shard_of_address(Address.new_from_bech32(address))
+    except Exception:
+        return UNKNOWN_SHARD
+
+
+@dataclass
+class _Entry:
+    value: Any
+    shard: int
+    block_nonce: int
+    expires_at: float
+
+
+class AccountStateCache:
+    """
+    LRU cache for account lookups (nonce, balance, ESDTs) keyed by `(kind, address)`.
+
+    An entry is served while its TTL has not run out and no newer block of its address' shard
+    has been observed than the one it was read at; gateway answers carry `blockInfo.nonce`,
+    so every fetch also advances the block this cache considers current for that shard.
+    Concurrent misses for the same key share a single in-flight fetch.
+    """
+
+    def __init__(
+            self,
+            max_entries: int = ACCOUNT_CACHE_MAX_ENTRIES,
+            ttl: float = ACCOUNT_CACHE_TTL_IN_SEC,
+            clock: Callable[[], float] = time.monotonic,
+    ) -> None:
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.clock = clock
+        self.latest_block_nonces: Dict[int, int] = {}
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._entries: "OrderedDict[Hashable, _Entry]" = OrderedDict()
+        self._lock = threading.Lock()
+        # Striped locks keep sync coalescing bounded in memory regardless of how many addresses are seen
+        self._key_locks = [threading.Lock() for _ in range(64)]
+        self._in_flight: Dict[Hashable, asyncio.Future] = {}
+
+    def observe_block(self, block_nonce: Optional[int], shard: int) -> None:
+        if block_nonce and block_nonce > self.latest_block_nonces.get(shard, 0):
+            self.latest_block_nonces[shard] = block_nonce
+
+    def get(self, key: Hashable) -> Optional[Any]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            if entry.expires_at <= self.clock() or entry.block_nonce < self.latest_block_nonces.get(entry.shard, 0):
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return entry.value
+
+    def put(self, key: Hashable, value: Any, block_nonce: int = 0) -> None:
+        shard = shard_of(key[1])
+        with self._lock:
+            self.observe_block(block_nonce, shard)
+            block_nonce = block_nonce or self.latest_block_nonces.get(shard, 0)
+            self._entries[key] = _Entry(value, shard, block_nonce, self.clock() + self.ttl)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def invalidate_address(self, address: str) -> None:
+        with self._lock:
+            for key in [key for key in self._entries if key[1] == address]:
+                del self._entries[key]
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+    def _lookup(self, key: Hashable) -> Optional[Any]:
+        value = self.get(key)
+        if value is None:
+            self.misses += 1
+        else:
+            self.hits += 1
+        return value
+
+    async def get_or_fetch(
+            self,
+            key: Hashable,
+            fetch: Callable[[], Awaitable[Any]],
+            block_nonce_of: Callable[[Any], int],
+    ) -> Any:
+        """
+        Returns the cached value for `key` or awaits `fetch()`; callers missing on the same
+        key at the same time await one shared fetch.
+        """
+        value = self._lookup(key)
+        if value is not None:
+            return value
+
+        in_flight = self._in_flight.get(key)
+        if in_flight is not None:
+            return await asyncio.shield(in_flight)
+
+        future = asyncio.get_running_loop().create_future()
+        self._in_flight[key] = future
+        try:
+            value = await fetch()
+            self.put(key, value, block_nonce_of(value))
+            future.set_result(value)
+            return value
+        except Exception as e:
+            future.set_exception(e)
+            # Mark the exception as retrieved when nobody else was waiting on it
+            future.exception()
+            raise
+        except BaseException:
+            future.cancel()
+            raise
+        finally:
+            del self._in_flight[key]
+
+    def get_or_fetch_sync(self, key: Hashable, fetch: Callable[[], Any], block_nonce_of: Callable[[Any], int]) -> Any:
+        """
+        Blocking twin of `get_or_fetch` for the requests-based helpers.
+        """
+        value = self._lookup(key)
+        if value is not None:
+            return value
+
+        with self._key_locks[hash(key) % len(self._key_locks)]:
+            # Another thread may have filled the entry while we waited for the lock
+            value = self.get(key)
+            if value is None:
+                value = fetch()
+                self.put(key, value, block_nonce_of(value))
+        return value
+
+    def stats(self) -> dict:
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "entries": len(self._entries),
+            "latest_block_nonces": dict(self.latest_block_nonces),
+        }
+
+
+account_state_cache = AccountStateCache()
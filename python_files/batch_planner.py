@@ -0,0 +1,160 @@
+from dataclasses import dataclass, field
+from typing import Iterable, List, Optional, Sequence, Tuple
+
+from python_files.constants import (
+    GAS_COST_MOVE_BALANCE,
+    GAS_COST_PER_BYTE,
+    GAS_COST_PER_SMART_SAVE_RECEIVER,
+    MAX_GAS_LIMIT_PER_TX,
+    MAX_TX_DATA_LENGTH,
+    MIN_SMART_SAVE_GAS_LIMIT,
+    WRAPPED_EGLD_FEE_PER_RECEIVER,
+)
+from utils.transaction_data import (
+    ADDRESS_HEX_LENGTH,
+    encode_smart_save_data,
+    int_to_even_hex,
+    smart_save_header_arguments,
+)
+
+# Upper bound for an encoded BigUint total, so the header size is known before the totals are
+MAX_AMOUNT_HEX_LENGTH = 64
+
+
+def smart_save_gas_limit(receiver_count: int, data_length: int) -> int:
+    """
+    Gas for a smartSave call: the data field is paid per byte, then each receiver's transfer.
+    """
+    return max(
+        GAS_COST_MOVE_BALANCE + GAS_COST_PER_BYTE * data_length + GAS_COST_PER_SMART_SAVE_RECEIVER * receiver_count,
+        MIN_SMART_SAVE_GAS_LIMIT,
+    )
+
+
+@dataclass
+class SmartSaveChunk:
+    contract_hex: str
+    service_hex: str
+    token_identifier: str
+    receiver_hexes: List[str] = field(default_factory=list)
+    amounts: List[int] = field(default_factory=list)
+
+    @property
+    def esdt_amount(self) -> int:
+        return sum(self.amounts)
+
+    @property
+    def wrapped_egld_amount(self) -> int:
+        return WRAPPED_EGLD_FEE_PER_RECEIVER * len(self.receiver_hexes)
+
+    def encode_data(self) -> str:
+        return encode_smart_save_data(
+            contract_hex=self.contract_hex,
+            service_hex=self.service_hex,
+            token_identifier=self.token_identifier,
+            esdt_amount=self.esdt_amount,
+            wrapped_egld_amount=self.wrapped_egld_amount,
+            receiver_hexes=self.receiver_hexes,
+            amounts=self.amounts,
+        )
+
+
+class SmartSaveBatcher:
+    """
+    Packs receivers into smartSave transactions that stay under the gas and data-size limits.
+
+    Rows are added one at a time; `add` returns a full chunk as soon as the next row would
+    not fit, so arbitrarily long receiver streams are planned with one chunk in memory.
+    """
+
+    def __init__(
+            self,
+            contract_hex: str,
+            service_hex: str,
+            token_identifier: str,
+            max_gas_limit: int = MAX_GAS_LIMIT_PER_TX,
+            max_data_length: int = MAX_TX_DATA_LENGTH,
+    ) -> None:
+        self.contract_hex = contract_hex
+        self.service_hex = service_hex
+        self.token_identifier = token_identifier
+        self.max_gas_limit = max_gas_limit
+        self.max_data_length = max_data_length
+
+        worst_case_amount = 16 ** MAX_AMOUNT_HEX_LENGTH - 1
+        header = smart_save_header_arguments(
+            contract_hex, token_identifier, worst_case_amount, worst_case_amount, service_hex
+        )
+        self.header_length = len("@".join(header))
+        self._chunk = self._new_chunk()
+        self._data_length = self.header_length
+
+    def _new_chunk(self) -> SmartSaveChunk:
+        return SmartSaveChunk(self.contract_hex, self.service_hex, self.token_identifier)
+
+    def _fits(self, receiver_count: int, data_length: int) -> bool:
+        return (
+                data_length <= self.max_data_length
+                and smart_save_gas_limit(receiver_count, data_length) <= self.max_gas_limit
+        )
+
+    def add(self, receiver_hex: str, amount: int) -> Optional[SmartSaveChunk]:
+        """
+        Adds a receiver; returns the previous chunk when it had to be closed to make room.
+        """
+        if len(receiver_hex) != ADDRESS_HEX_LENGTH:
+            raise ValueError(f"Invalid receiver hex {receiver_hex!r}")
+        amount = int(amount)
+        # "@<receiver>@<amount>"
+        pair_length = 2 + ADDRESS_HEX_LENGTH + len(int_to_even_hex(amount))
+
+        closed = None
+        if not self._fits(len(self._chunk.receiver_hexes) + 1, self._data_length + pair_length):
+            if not self._chunk.receiver_hexes:
+                raise ValueError("A single receiver does not fit into one transaction")
+            closed = self._chunk
+            self._chunk = self._new_chunk()
+            self._data_length = self.header_length
+            if not self._fits(1, self._data_length + pair_length):
+                raise ValueError("A single receiver does not fit into one transaction")
+
+        self._chunk.receiver_hexes.append(receiver_hex)
+        self._chunk.amounts.append(amount)
+        self._data_length += pair_length
+        return closed
+
+    def flush(self) -> Optional[SmartSaveChunk]:
+        """
+        Returns the chunk being filled, if it has any receivers, and starts a new one.
+        """
+        if not self._chunk.receiver_hexes:
+            return None
+        closed = self._chunk
+        self._chunk = self._new_chunk()
+        self._data_length = self.header_length
+        return closed
+
+    def plan(self, rows: Iterable[Tuple[str, int]]) -> List[SmartSaveChunk]:
+        chunks = [chunk for chunk in (self.add(receiver_hex, amount) for receiver_hex, amount in rows) if chunk]
+        last = self.flush()
+        if last:
+            chunks.append(last)
+        return chunks
+
+
+def plan_smart_save_chunks(
+        contract_hex: str,
+        service_hex: str,
+        token_identifier: str,
+        receiver_hexes: Sequence[str],
+        amounts: Sequence[int],
+        max_gas_limit: int = MAX_GAS_LIMIT_PER_TX,
+        max_data_length: int = MAX_TX_DATA_LENGTH,
+) -> List[SmartSaveChunk]:
+    """
+    Splits an airdrop into as few smartSave transactions as the limits allow, keeping receiver order.
+    """
+    if len(receiver_hexes) != len(amounts):
+        raise ValueError(f"Got {len(receiver_hexes)} receivers but {len(amounts)} amounts")
+    batcher = SmartSaveBatcher(contract_hex, service_hex, token_identifier, max_gas_limit, max_data_length)
+    return batcher.plan(zip(receiver_hexes, amounts))
@@ -0,0 +1,190 @@
+import asyncio
+import multiprocessing
+import time
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass
+from typing import Dict, List, Optional, Sequence, Tuple, Union
+
+from multiversx_sdk import Transaction, TransactionComputer, UserSecretKey, UserSigner
+
+from python_files.config import BATCH_SIGNING_CHUNK_SIZE, BATCH_SIGNING_MIN_PARALLEL, SIGNING_WORKERS
+from python_files.logger import logger
+
+# Signers built by a signing process so far, by secret key; senders repeat across chunks
+_worker_signers: Dict[bytes, UserSigner] = {}
+
+
+def _signer_for(secret_key: bytes) -> UserSigner:
+    signer = _worker_signers.get(secret_key)
+    if signer is None:
+        signer = _worker_signers[secret_key] = UserSigner(UserSecretKey(secret_key))
+    return signer
+
+
+def _sign_chunk(secret_keys: List[bytes], items: List[Tuple[int, Transaction]]) -> List[bytes]:
+    """
+    Signs `(sender index into secret_keys, transaction)` pairs and returns the signatures in
+    the same order. Transactions with the hash-signing option get their hash signed, as the
+    node expects. Runs inside a signing process, or inline for small batches.
+    """
+    computer = TransactionComputer()
+    signers = [_signer_for(secret_key) for secret_key in secret_keys]
+    return [
+        signers[sender].sign(computer.compute_bytes_for_verifying(transaction))
+        for sender, transaction in items
+    ]
+
+
+@dataclass
+class SigningStats:
+    transactions: int = 0
+    chunks: int = 0
+    seconds: float = 0.0
+
+    @property
+    def per_second(self) -> float:
+        return self.transactions / self.seconds if self.seconds else 0.0
+
+    def to_dict(self) -> dict:
+        return {
+            "transactions": self.transactions,
+            "chunks": self.chunks,
+            "seconds": round(self.seconds, 6),
+            "perSecond": round(self.per_second, 1),
+        }
+
+
+class BatchSigner:
+    """
+    Signs many prepared `Transaction`s, from any number of senders, across a pool of processes.
+
+    The batch is cut into chunks of `chunk_size` transactions that are handed out to
+    `workers` spawned processes; each chunk carries the secret keys of its own senders only.
+    Signatures are set on the given transactions, in their original order. Batches smaller
+    than `min_parallel` are signed inline, where starting work in other processes would cost
+    more than it saves. `last` and `total` hold the throughput of the last batch and of all
+    batches so far.
+
+    Senders are `Wallet`s, `PooledWallet`s or anything else with `get_signer()`. `sign` blocks
+    until the batch is signed; `sign_async` awaits it, so the event loop keeps serving meanwhile.
+    """
+
+    def __init__(
+            self,
+            workers: int = SIGNING_WORKERS,
+            chunk_size: int = BATCH_SIGNING_CHUNK_SIZE,
+            min_parallel: int = BATCH_SIGNING_MIN_PARALLEL,
+    ) -> None:
+        self.workers = max(1, workers)
+        self.chunk_size = max(1, chunk_size)
+        self.min_parallel = min_parallel
+        self.last = SigningStats()
+        self.total = SigningStats()
+        self._pool: Optional[ProcessPoolExecutor] = None
+
+    def _get_pool(self) -> ProcessPoolExecutor:
+        if self._pool is None:
+            self._pool = ProcessPoolExecutor(
+                max_workers=self.workers,
+                mp_context=multiprocessing.get_context("spawn"),
+            )
+        return self._pool
+
+    def _chunks(self, transactions: Sequence[Transaction], secret_keys: List[bytes]) -> list:
+        chunks = []
+        for start in range(0, len(transactions), self.chunk_size):
+            positions: Dict[bytes, int] = {}
+            items = []
+            for transaction, secret_key in zip(transactions[start:start + self.chunk_size],
+                                               secret_keys[start:start + self.chunk_size]):
+                items.append((positions.setdefault(secret_key, len(positions)), transaction))
+            chunks.append((list(positions), items))
+        return chunks
+
+    def _prepare(self, transactions: Sequence[Transaction], senders) -> list:
+        if not isinstance(senders, (list, tuple)):
+            senders = [senders] * len(transactions)
+        if len(senders) != len(transactions):
+            raise ValueError(f"Got {len(senders)} sender(s) for {len(transactions)} transaction(s)")
+
+        # Senders repeat, so each wallet's key is read once
+        keys_by_sender: Dict[int, bytes] = {}
+        secret_keys = []
+        for sender in senders:
+            secret_key = keys_by_sender.get(id(sender))
+            if secret_key is None:
+                secret_key = keys_by_sender[id(sender)] = sender.get_signer().secret_key.buffer
+            secret_keys.append(secret_key)
+        return self._chunks(transactions, secret_keys)
+
+    def _inline(self, transactions: Sequence[Transaction]) -> bool:
+        return len(transactions) < self.min_parallel or self.workers == 1
+
+    def sign(self, transactions: Sequence[Transaction], senders) -> List[Transaction]:
+        """
+        Signs `transactions` in place and returns them. `senders` is one wallet signing every
+        transaction, or a sequence with the sender of each transaction.
+        """
+        start = time.perf_counter()
+        chunks = self._prepare(transactions, senders)
+        if self._inline(transactions):
+            signature_chunks = [_sign_chunk(keys, items) for keys, items in chunks]
+        else:
+            pool = self._get_pool()
+            futures = [pool.submit(_sign_chunk, keys, items) for keys, items in chunks]
+            signature_chunks = [future.result() for future in futures]
+        return self._finish(transactions, chunks, signature_chunks, start)
+
+    async def sign_async(self, transactions: Sequence[Transaction], senders) -> List[Transaction]:
+        """
+        `sign` for the event loop: chunks are awaited instead of blocking on the pool.
+        """
+        start = time.perf_counter()
+        chunks = self._prepare(transactions, senders)
+        if self._inline(transactions):
+            signature_chunks = [_sign_chunk(keys, items) for keys, items in chunks]
+        else:
+            loop = asyncio.get_running_loop()
+            pool = self._get_pool()
+            signature_chunks = await asyncio.gather(
+                *(loop.run_in_executor(pool, _sign_chunk, keys, items) for keys, items in chunks)
+            )
+        return self._finish(transactions, chunks, signature_chunks, start)
+
+    def _finish(self, transactions: Sequence[Transaction], chunks: list, signature_chunks: list,
+                start: float) -> List[Transaction]:
+        for transaction, signature in zip(transactions, (s for chunk in signature_chunks for s in chunk)):
+            transaction.signature = signature
+
+        self.last = SigningStats(len(transactions), len(chunks), time.perf_counter() - start)
+        self.total.transactions += self.last.transactions
+        self.total.chunks += self.last.chunks
+        self.total.seconds += self.last.seconds
+        logger.info(
+            f"Signed {self.last.transactions} transaction(s) in {self.last.chunks} chunk(s), "
+            f"{self.last.per_second:.0f} tx/s"
+        )
+        return list(transactions)
+
+    def close(self) -> None:
+        if self._pool is not None:
+            self._pool.shutdown(wait=True)
+            self._pool = None
+
+    def __enter__(self) -> "BatchSigner":
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+
+def sign_transactions(
+        transactions: Sequence[Transaction],
+        senders: Union[object, Sequence[object]],
+        workers: int = SIGNING_WORKERS,
+) -> List[Transaction]:
+    """
+    One-off `BatchSigner.sign`, with a pool that lives only for this batch.
+    """
+    with BatchSigner(workers=workers) as signer:
+        return signer.sign(transactions, senders)
@@ -0,0 +1,280 @@
+import asyncio
+from pathlib import Path
+from typing import List, Optional, Union
+
+from multiversx_sdk import Transaction, TransactionsConverter
+
+from python_files.batch_signer import BatchSigner
+from python_files.config import (
+    BROADCAST_BATCH_SIZE,
+    BROADCAST_FLUSH_INTERVAL_IN_SEC,
+    BROADCAST_MAX_IN_FLIGHT,
+    BROADCAST_QUEUE_SIZE,
+    SIGNING_WORKERS,
+)
+from python_files.gateway_client import (
+    GatewayClient,
+    GatewayConnectError,
+    GatewayError,
+    GatewayUnavailable,
+    gateway_client,
+)
+from python_files.logger import logger
+from python_files.nonce_manager import NonceManager, nonce_manager
+from python_files.wallet import Wallet
+
+
+class BroadcastError(Exception):
+    pass
+
+
+class BroadcastQueueFull(BroadcastError):
+    pass
+
+
+def _transaction_from_json(fields: dict) -> Transaction:
+    """
+    Builds a `Transaction` from an unsigned transaction JSON, as returned by `/airdrop`.
+    """
+    return Transaction(
+        sender=fields["sender"],
+        receiver=fields["receiver"],
+        gas_limit=int(fields["gasLimit"]),
+        chain_id=fields["chainID"],
+        nonce=int(fields["nonce"]),
+        value=int(fields.get("value") or 0),
+        gas_price=int(fields["gasPrice"]),
+        data=(fields.get("data") or "").encode(),
+        version=int(fields.get("version", 2)),
+        options=int(fields.get("options", 0)),
+    )
+
+
+class TransactionBroadcaster:
+    """
+    Signs prepared transactions with one PEM wallet and submits them in batches through
+    the gateway's `/transaction/send-multiple`.
+
+    Transactions wait in a bounded queue: `submit` blocks while it is full, which pushes
+    back on the producer, and `submit_nowait` raises `BroadcastQueueFull` instead. A
+    background task drains the queue into batches of up to `batch_size`, signs each batch
+    with a `BatchSigner` over `signing_workers` processes and sends it, keeping up to `max_in_flight`
+    batches on the wire. Every submitted transaction gets a future resolving to its hash.
+    Nonces of transactions the node rejects, and of batches it refused or that could not reach
+    it, are released back to the nonce manager. When a batch may have reached the
+    node without an answer, such as on a timeout, they may already be used: the nonce manager
+    is then resynced from the chain once the batches sent before it are settled.
+    """
+
+    def __init__(
+            self,
+            pem_path: Path,
+            gateway: GatewayClient = gateway_client,
+            nonces: NonceManager = nonce_manager,
+            queue_size: int = BROADCAST_QUEUE_SIZE,
+            batch_size: int = BROADCAST_BATCH_SIZE,
+            flush_interval: float = BROADCAST_FLUSH_INTERVAL_IN_SEC,
+            max_in_flight: int = BROADCAST_MAX_IN_FLIGHT,
+            signing_workers: int = SIGNING_WORKERS,
+    ) -> None:
+        self.wallet = Wallet.from_pem_text(Path(pem_path).read_text())
+        self.address = self.wallet.address
+        self.gateway = gateway
+        self.nonces = nonces
+        self.queue_size = queue_size
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.max_in_flight = max_in_flight
+        self.signing_workers = max(1, signing_workers)
+        # A full batch is split across every signing process
+        self.signer = BatchSigner(workers=self.signing_workers, chunk_size=-(-batch_size // self.signing_workers))
+        self.converter = TransactionsConverter()
+        self.sent = 0
+        self.rejected = 0
+        self._queue: Optional[asyncio.Queue] = None
+        self._worker: Optional[asyncio.Task] = None
+        self._in_flight: Optional[asyncio.Semaphore] = None
+        self._batches: set = set()
+        # Batches waiting for the others to settle before resyncing
+        self._resyncing: set = set()
+
+    async def start(self) -> None:
+        if self._worker is not None:
+            return
+        self._queue = asyncio.Queue(maxsize=self.queue_size)
+        self._in_flight = asyncio.Semaphore(self.max_in_flight)
+        self._worker = asyncio.create_task(self._run())
+        logger.info(f"Broadcasting as {self.address} with {self.signing_workers} signing worker(s)")
+
+    def _check(self, transaction: dict) -> None:
+        if self._worker is None:
+            raise BroadcastError("Broadcaster is not started")
+        if transaction.get("sender") != self.address:
+            raise BroadcastError(f"Cannot sign for {transaction.get('sender')}, the signer is {self.address}")
+
+    async def submit(self, transaction: dict) -> asyncio.Future:
+        """
+        Queues an unsigned transaction, waiting for room in the queue, and returns a future for its hash.
+        """
+        self._check(transaction)
+        future = asyncio.get_running_loop().create_future()
+        await self._queue.put((transaction, future))
+        return future
+
+    def submit_nowait(self, transaction: dict) -> asyncio.Future:
+        self._check(transaction)
+        future = asyncio.get_running_loop().create_future()
+        try:
+            self._queue.put_nowait((transaction, future))
+        except asyncio.QueueFull:
+            raise BroadcastQueueFull(f"Broadcast queue is full ({self.queue_size} transactions)") from None
+        return future
+
+    async def broadcast(self, transactions: List[dict]) -> List[Union[str, BroadcastError]]:
+        """
+        Signs and sends `transactions`, returning each one's hash or the error that stopped it.
+        Raises `BroadcastQueueFull` without queueing anything when they do not all fit.
+        """
+        if self._queue is not None and self._queue.maxsize - self._queue.qsize() < len(transactions):
+            raise BroadcastQueueFull(f"Broadcast queue is full ({self.queue_size} transactions)")
+        futures = [self.submit_nowait(transaction) for transaction in transactions]
+        return await asyncio.gather(*futures, return_exceptions=True)
+
+    async def _next_batch(self) -> list:
+        batch = [await self._queue.get()]
+        deadline = asyncio.get_running_loop().time() + self.flush_interval
+        while len(batch) < self.batch_size:
+            if not self._queue.empty():
+                batch.append(self._queue.get_nowait())
+                continue
+            timeout = deadline - asyncio.get_running_loop().time()
+            if timeout <= 0:
+                break
+            try:
+                batch.append(await asyncio.wait_for(self._queue.get(), timeout))
+            except asyncio.TimeoutError:
+                break
+            except asyncio.CancelledError:
+                self._fail([future for _, future in batch], BroadcastError("Broadcaster stopped"))
+                raise
+        return batch
+
+    async def _run(self) -> None:
+        while True:
+            batch = await self._next_batch()
+            try:
+                await self._in_flight.acquire()
+            except asyncio.CancelledError:
+                self._fail([future for _, future in batch], BroadcastError("Broadcaster stopped"))
+                raise
+            task = asyncio.create_task(self._sign_and_send(batch))
+            self._batches.add(task)
+            task.add_done_callback(self._batches.discard)
+
+    async def _sign(self, transactions: List[dict]) -> List[dict]:
+        """
+        Signs unsigned transaction JSONs and returns them in the gateway format (base64 data, hex signature).
+        """
+        signed = await self.signer.sign_async([_transaction_from_json(fields) for fields in transactions], self.wallet)
+        return [self.converter.transaction_to_dictionary(transaction) for transaction in signed]
+
+    async def _sign_and_send(self, batch: list) -> None:
+        futures = [future for _, future in batch]
+        transactions = [transaction for transaction, _ in batch]
+        try:
+            signed = await self._sign(transactions)
+        except Exception as e:
+            self._in_flight.release()
+            self._broadcast_failed(futures, e)
+            await self._release(transactions)
+            return
+        try:
+            hashes = await self.gateway.send_transactions(signed)
+        except Exception as e:
+            self._broadcast_failed(futures, e)
+            if isinstance(e, GatewayConnectError) or (
+                    isinstance(e, GatewayError) and not isinstance(e, GatewayUnavailable)):
+                # The batch never reached the node, or the node refused it as a whole
+                await self._release(transactions)
+            else:
+                # E.g. a timeout or a 5xx answer once the batch was sent: some of it may be in the mempool
+                await self._resync()
+            return
+        finally:
+            self._in_flight.release()
+
+        rejected = []
+        for index, (transaction, future) in enumerate(batch):
+            tx_hash = hashes.get(index)
+            if tx_hash is None:
+                rejected.append(transaction)
+                self._fail([future], BroadcastError(f"Transaction with nonce {transaction['nonce']} was rejected"))
+            elif not future.done():
+                future.set_result(tx_hash)
+        self.sent += len(batch) - len(rejected)
+        self.rejected += len(rejected)
+        logger.info(f"Broadcast {len(batch) - len(rejected)}/{len(batch)} transaction(s) from {self.address}")
+        if rejected:
+            await self._release(rejected)
+
+    def _broadcast_failed(self, futures: List[asyncio.Future], e: Exception) -> None:
+        error = BroadcastError(f"Broadcast of {len(futures)} transaction(s) failed: {e}")
+        logger.error(str(error))
+        self._fail(futures, error)
+
+    @staticmethod
+    def _fail(futures: List[asyncio.Future], error: BroadcastError) -> None:
+        for future in futures:
+            if not future.done():
+                future.set_exception(error)
+
+    async def _release(self, transactions: List[dict]) -> None:
+        """
+        Releases the nonces of `transactions`, one range per run of consecutive nonces.
+        """
+        nonces = sorted(int(transaction["nonce"]) for transaction in transactions)
+        start = nonces[0]
+        for previous, nonce in zip(nonces, nonces[1:] + [None]):
+            if nonce != previous + 1:
+                await self.nonces.release(self.address, start, previous + 1)
+                start = nonce
+
+    async def _resync(self) -> None:
+        """
+        Restarts the nonces from the chain's view once the batches sent before this one are
+        settled, as the fate of a batch that reached the node is unknown. Batches waiting to
+        resync themselves are not waited for, so two of them never wait for each other.
+        """
+        current = asyncio.current_task()
+        self._resyncing.add(current)
+        try:
+            await asyncio.gather(*(self._batches - self._resyncing), return_exceptions=True)
+            await self.nonces.resync(self.address)
+        except Exception as e:
+            logger.error(f"Could not resync the nonces of {self.address}: {e}")
+        finally:
+            self._resyncing.discard(current)
+
+    def stats(self) -> dict:
+        return {
+            "queued": self._queue.qsize() if self._queue is not None else 0,
+            "batchesInFlight": len(self._batches),
+            "sent": self.sent,
+            "rejected": self.rejected,
+        }
+
+    async def close(self) -> None:
+        """
+        Stops taking batches, lets in-flight ones finish and fails whatever is still queued.
+        """
+        if self._worker is None:
+            return
+        self._worker.cancel()
+        await asyncio.gather(self._worker, return_exceptions=True)
+        await asyncio.gather(*self._batches, return_exceptions=True)
+        pending = []
+        while not self._queue.empty():
+            pending.append(self._queue.get_nowait()[1])
+        self._fail(pending, BroadcastError("Broadcaster stopped"))
+        await asyncio.to_thread(self.signer.close)
+        self._worker = None
@@ -1,16 +1,22 @@
+import asyncio
 import json
 import time
+from typing import Dict, Iterable
 
 import requests
 
+from python_files.account_cache import account_state_cache
 from python_files.config import DEFAULT_PROXY, rounds_per_epoch
 from python_files.constants import *
+from python_files.gateway_client import GatewayClient
+from python_files.http_client import http_client
 from python_files.logger import logger
+from python_files.tx_tracker import TransactionTracker
 
 
 def get_status_of_tx(tx_hash: str) -> str:
     logger.info(f"Checking transaction status for hash: {tx_hash}")
-    response = requests.get(f"{DEFAULT_PROXY}/transaction/{tx_hash}/process-status")
+    response = http_client.get(f"{DEFAULT_PROXY}/transaction/{tx_hash}/process-status")
     response.raise_for_status()
     parsed = response.json()
 
@@ -29,10 +35,11 @@ def send_egld_to_address(egld_amount, erd_address):
 
     details_list = [details]
     json_structure = json.dumps(details_list)
-    response = requests.post(
+    response = http_client.post(
         f"{DEFAULT_PROXY}/simulator/set-state", data=json_structure
     )
     response.raise_for_status()
+    account_state_cache.invalidate_address(erd_address)
     response_data = response.json()
     logger.info(
         f"Transfer response: {response_data.get('message', 'Balance updated successfully')}"
@@ -42,10 +49,12 @@ def send_egld_to_address(egld_amount, erd_address):
 
 def add_blocks(nr_of_blocks):
     logger.info(f"Requesting generation of {nr_of_blocks} blocks")
-    response = requests.post(
+    response = http_client.post(
         f"{DEFAULT_PROXY}/simulator/generate-blocks/{nr_of_blocks}"
     )
     response.raise_for_status()
+    # Processed blocks may have changed any account; the new block nonce is not known here
+    account_state_cache.clear()
     logger.info(
         f"Generated {nr_of_blocks} blocks; Response status: {response.status_code}"
     )
@@ -53,20 +62,21 @@ def add_blocks(nr_of_blocks):
 
 
 def get_block() -> int:
-    response = requests.get(f"{DEFAULT_PROXY}/network/status/0")
+    response = http_client.get(f"{DEFAULT_PROXY}/network/status/0")
     response.raise_for_status()
     parsed = response.json()
 
     general_data = parsed.get("data")
     general_status = general_data.get("status")
     nonce = general_status.get("erd_nonce")
+    account_state_cache.observe_block(nonce, shard=0)
     logger.info(f"Current block nonce: {nonce}")
     return nonce
 
 
 def add_blocks_until_epoch_reached(epoch_to_be_reached: int):
     logger.info(f"Generating blocks until epoch {epoch_to_be_reached} is reached")
-    req = requests.post(
+    req = http_client.post(
         f"{DEFAULT_PROXY}/simulator/generate-blocks-until-epoch-reached/{str(epoch_to_be_reached)}"
     )
     req.raise_for_status()
@@ -75,43 +85,58 @@ def add_blocks_until_epoch_reached(epoch_to_be_reached: int):
     return req.text
 
 
+def add_blocks_until_txs_fully_executed(tx_hashes: Iterable[str]) -> Dict[str, str]:
+    """
+    Generates blocks until none of the transactions is pending any more, then returns their statuses.
+    All hashes are checked together: one block and one batch of status queries per round.
+    """
+    tx_hashes = list(tx_hashes)
+    logger.info(f"Checking status of {len(tx_hashes)} transaction(s)")
+
+    async def track() -> Dict[str, str]:
+        # A private client, since its session only lives as long as this event loop
+        gateway = GatewayClient(DEFAULT_PROXY, cache=account_state_cache)
+        tracker = TransactionTracker(gateway, simulator=True, min_interval=WAIT_UNTIL_API_REQUEST_IN_SEC)
+        try:
+            return await tracker.wait_for(tx_hashes)
+        finally:
+            await tracker.close()
+            await gateway.close()
+
+    return asyncio.run(track())
+
+
 def add_blocks_until_tx_fully_executed(tx_hash) -> str:
-    logger.info(f"Checking status of transaction {tx_hash}")
-    counter = 0
-
-    while counter < MAX_NUM_OF_BLOCKS_UNTIL_TX_SHOULD_BE_EXECUTED:
-        add_blocks(1)
-        counter += 1
-
-        time.sleep(WAIT_UNTIL_API_REQUEST_IN_SEC)
-        tx_status = get_status_of_tx(tx_hash)
-        if tx_status == "pending":
-            logger.info(f"Transaction {tx_hash} still pending after {counter} blocks")
-        else:
-            logger.info(f"Transaction {tx_hash} executed after {counter} blocks")
-            return tx_status
-    raise Exception(
-        f"Transaction {tx_hash} not executed within {MAX_NUM_OF_BLOCKS_UNTIL_TX_SHOULD_BE_EXECUTED} blocks."
-    )
+    return add_blocks_until_txs_fully_executed([tx_hash])[tx_hash]
 
 
-def is_chain_online() -> bool:
+def is_chain_online(timeout: float = 60) -> bool:
+    """
+    Probes the network status until the chain answers: right away, then backing off
+    from 50ms up to 1s between attempts, for at most `timeout` seconds.
+    """
+    deadline = time.monotonic() + timeout
+    delay = 0.05
     while True:
-        time.sleep(1)
         try:
-            response = requests.get(f"{DEFAULT_PROXY}/network/status/0")
+            # Not through the shared client: this loop does its own retrying
+            response = requests.get(f"{DEFAULT_PROXY}/network/status/0", timeout=2)
             response.raise_for_status()
             logger.info("Chain is online")
             return True
-        except requests.exceptions.ConnectionError as e:
-            logger.warning("Chain not started yet: ConnectionError")
+        except (requests.exceptions.ConnectionError, requests.exceptions.Timeout):
+            logger.debug("Chain not started yet")
         except Exception as e:
             logger.error(f"Unexpected error when checking chain status: {str(e)}")
             raise
+        if time.monotonic() + delay > deadline:
+            raise TimeoutError(f"Chain at {DEFAULT_PROXY} not online within {timeout} seconds")
+        time.sleep(delay)
+        delay = min(delay * 2, 1)
 
 
 def add_blocks_until_last_block_of_current_epoch() -> str:
-    response = requests.get(f"{DEFAULT_PROXY}/network/status/4294967295")
+    response = http_client.get(f"{DEFAULT_PROXY}/network/status/4294967295")
     response.raise_for_status()
     parsed = response.json()
 
@@ -141,7 +166,7 @@ def force_move_to_epoch(epoch_to_be_reached: int):
     logger.info(f"Forcing epoch change until epoch {epoch_to_be_reached} is reached")
 
     # Get the current network status
-    response = requests.get(f"{DEFAULT_PROXY}/network/status/0")
+    response = http_client.get(f"{DEFAULT_PROXY}/network/status/0")
     response.raise_for_status()
     parsed = response.json()
 
@@ -151,10 +176,11 @@ def force_move_to_epoch(epoch_to_be_reached: int):
 
     # Check if the current epoch is less than the target epoch
     if current_epoch < epoch_to_be_reached:
-        req = requests.post(
+        req = http_client.post(
             f"{DEFAULT_PROXY}/simulator/force-epoch-change?targetEpoch={str(epoch_to_be_reached)}"
         )
         req.raise_for_status()  # Raise an error if the request fails
+        account_state_cache.clear()
         logger.info(f"Epoch {epoch_to_be_reached} reached")
         return req.text
     else:
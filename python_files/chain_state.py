@@ -0,0 +1,250 @@
+"""
+Account state helpers for the chain simulator: snapshots, and bulk seeding from records or fixture files.
+
+Usage:
+    python -m python_files.chain_state seed accounts.csv --chunk-size 2000
+"""
+import argparse
+import csv
+import itertools
+import json
+import os
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple, Union
+
+from python_files.account_cache import account_state_cache
+from python_files.config import DEFAULT_PROXY
+from python_files.constants import SET_STATE_CHUNK_SIZE
+from python_files.http_client import http_client
+from python_files.logger import logger
+from utils.bech32_codec import ADDRESS_LENGTH, encode_bech32_addresses
+
+# Account fields that /simulator/set-state accepts back exactly as /address/{address} returns them
+_STATE_FIELDS = ("nonce", "balance", "code", "codeHash", "rootHash", "codeMetadata", "ownerAddress", "developerReward")
+
+
+def get_account_state(address: str, proxy: str = DEFAULT_PROXY) -> dict:
+    """
+    Reads an account, including contract code and storage, in the `/simulator/set-state` format.
+    """
+    response = http_client.get(f"{proxy}/address/{address}")
+    response.raise_for_status()
+    account = response.json()["data"]["account"]
+
+    response = http_client.get(f"{proxy}/address/{address}/keys")
+    response.raise_for_status()
+    keys = response.json()["data"].get("pairs") or {}
+
+    state = {"address": address, "keys": keys}
+    state.update({name: account[name] for name in _STATE_FIELDS if account.get(name) not in (None, "")})
+    state["balance"] = str(state.get("balance", "0"))
+    return state
+
+
+def set_account_states(states: List[dict], proxy: str = DEFAULT_PROXY) -> None:
+    """
+    Replaces the given accounts wholesale; storage keys missing from a state are removed.
+    """
+    if not states:
+        return
+    response = http_client.post(f"{proxy}/simulator/set-state-overwrite", json=states)
+    response.raise_for_status()
+    for state in states:
+        account_state_cache.invalidate_address(state["address"])
+
+
+class ChainStateSnapshot:
+    """
+    Remembers the state of a set of accounts on the chain simulator and puts it back on demand.
+
+    A restore is one `/simulator/set-state-overwrite` call, so tests can share a single
+    simulator and still each start from the same accounts. Addresses registered with `track`
+    after the capture are reset to an empty account on restore. Chain-wide state such as the
+    current epoch or block is not part of a snapshot.
+    """
+
+    def __init__(self, proxy: str = DEFAULT_PROXY) -> None:
+        self.proxy = proxy
+        self.states: Dict[str, dict] = {}
+        self.tracked: set = set()
+
+    def capture(self, addresses: Iterable[str]) -> "ChainStateSnapshot":
+        for address in addresses:
+            self.states[address] = get_account_state(address, self.proxy)
+        logger.info(f"Captured the state of {len(self.states)} account(s)")
+        return self
+
+    def track(self, address: str) -> None:
+        if address not in self.states:
+            self.tracked.add(address)
+
+    def restore(self) -> None:
+        empty = [{"address": address, "nonce": 0, "balance": "0", "keys": {}} for address in self.tracked]
+        set_account_states(list(self.states.values()) + empty, self.proxy)
+        logger.info(f"Restored the state of {len(self.states) + len(empty)} account(s)")
+
+
+ESDT_KEY_PREFIX = b"ELRONDesdt"
+
+
+def _varint(value: int) -> bytes:
+    encoded = bytearray()
+    while value > 0x7F:
+        encoded.append((value & 0x7F) | 0x80)
+        value >>= 7
+    encoded.append(value)
+    return bytes(encoded)
+
+
+def esdt_storage_pair(token_identifier: str, amount: int) -> Tuple[str, str]:
+    """
+    Storage key and value, both hex, holding a fungible ESDT balance in an account's trie.
+    The value is the protobuf ESDigitalToken with only its `Value` field (2) set, a big
+    integer written as a sign byte followed by the big-endian magnitude.
+    """
+    magnitude = int(amount).to_bytes((int(amount).bit_length() + 7) // 8, "big")
+    value = b"\x00" + magnitude
+    return (ESDT_KEY_PREFIX + token_identifier.encode()).hex(), (b"\x12" + _varint(len(value)) + value).hex()
+
+
+def parse_esdt_storage_pair(key: str, value: str) -> Optional[Tuple[str, int]]:
+    """
+    Inverse of `esdt_storage_pair`; returns None for keys that are not fungible ESDT balances.
+    """
+    key_bytes, value_bytes = bytes.fromhex(key), bytes.fromhex(value)
+    if not key_bytes.startswith(ESDT_KEY_PREFIX) or value_bytes[:1] != b"\x12":
+        return None
+    length, shift, position = 0, 0, 1
+    while True:
+        length |= (value_bytes[position] & 0x7F) << shift
+        shift += 7
+        position += 1
+        if not value_bytes[position - 1] & 0x80:
+            break
+    # Skip the sign byte
+    magnitude = value_bytes[position + 1:position + length]
+    return key_bytes[len(ESDT_KEY_PREFIX):].decode(), int.from_bytes(magnitude, "big")
+
+
+@dataclass
+class AccountSeed:
+    address: str
+    balance: int = 0
+    esdts: Dict[str, int] = field(default_factory=dict)
+    nonce: Optional[int] = None
+
+    def to_state(self) -> dict:
+        state = {"address": self.address, "balance": str(int(self.balance))}
+        if self.nonce is not None:
+            state["nonce"] = int(self.nonce)
+        if self.esdts:
+            state["keys"] = dict(esdt_storage_pair(identifier, amount) for identifier, amount in self.esdts.items())
+        return state
+
+
+SeedRecord = Union[AccountSeed, dict, tuple]
+
+
+def _to_seed(record: SeedRecord) -> AccountSeed:
+    if isinstance(record, AccountSeed):
+        return record
+    if isinstance(record, dict):
+        return AccountSeed(
+            address=record["address"],
+            balance=int(record.get("balance") or 0),
+            esdts={identifier: int(amount) for identifier, amount in (record.get("esdts") or {}).items()},
+            nonce=None if record.get("nonce") in (None, "") else int(record["nonce"]),
+        )
+    return AccountSeed(*record)
+
+
+def seed_accounts(
+        records: Iterable[SeedRecord],
+        chunk_size: int = SET_STATE_CHUNK_SIZE,
+        proxy: str = DEFAULT_PROXY,
+) -> int:
+    """
+    Sets the balance, ESDT balances and nonce of many accounts with one `/simulator/set-state`
+    call per `chunk_size` records. Records are `AccountSeed`s, dicts with the same fields or
+    `(address, balance, esdts, nonce)` tuples, and are consumed lazily, so generators of any
+    size work. Existing storage keys of the seeded accounts are kept. Returns the number seeded.
+    """
+    seeded = 0
+    states = (_to_seed(record).to_state() for record in records)
+    while True:
+        chunk = list(itertools.islice(states, chunk_size))
+        if not chunk:
+            break
+        response = http_client.post(f"{proxy}/simulator/set-state", json=chunk)
+        response.raise_for_status()
+        for state in chunk:
+            account_state_cache.invalidate_address(state["address"])
+        seeded += len(chunk)
+        logger.info(f"Seeded {seeded} account(s)")
+    return seeded
+
+
+def _parse_esdts_column(value: str) -> Dict[str, int]:
+    """
+    `TKN-1a2b3c=100;WEGLD-a28c59=5` -> {"TKN-1a2b3c": 100, "WEGLD-a28c59": 5}
+    """
+    esdts = {}
+    for pair in filter(None, (part.strip() for part in (value or "").split(";"))):
+        identifier, amount = pair.split("=", 1)
+        esdts[identifier.strip()] = int(amount)
+    return esdts
+
+
+def load_account_seeds(path: Union[str, Path]) -> Iterator[AccountSeed]:
+    """
+    Reads seed records from a fixture file, lazily where the format allows:
+    - `.csv` with an `address,balance,nonce,esdts` header (nonce and esdts optional,
+      esdts as `TOKEN=amount;TOKEN=amount`)
+    - `.jsonl` with one `{"address", "balance", "esdts", "nonce"}` object per line
+    - `.json` with a list of such objects, or `{"accounts": [...]}`
+    """
+    path = Path(path)
+    suffix = path.suffix.lower()
+    with open(path, newline="") as file:
+        if suffix == ".csv":
+            for row in csv.DictReader(file):
+                yield _to_seed({**row, "esdts": _parse_esdts_column(row.get("esdts", ""))})
+        elif suffix in (".jsonl", ".ndjson"):
+            for line in file:
+                if line.strip():
+                    yield _to_seed(json.loads(line))
+        elif suffix == ".json":
+            content = json.load(file)
+            for record in content["accounts"] if isinstance(content, dict) else content:
+                yield _to_seed(record)
+        else:
+            raise ValueError(f"Unsupported seed file {path}; use .csv, .jsonl or .json")
+
+
+def random_account_seeds(count: int, balance: int = 0, esdts: Optional[Dict[str, int]] = None) -> Iterator[AccountSeed]:
+    """
+    Seeds for `count` fresh random addresses, for load-test scenarios.
+    """
+    block = 1024
+    for start in range(0, count, block):
+        size = min(block, count - start)
+        for address in encode_bech32_addresses(os.urandom(size * ADDRESS_LENGTH)):
+            yield AccountSeed(address, balance, dict(esdts or {}))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    subparsers = parser.add_subparsers(dest="command", required=True)
+    seed = subparsers.add_parser("seed", help="Seed accounts from a .csv, .jsonl or .json fixture")
+    seed.add_argument("path")
+    seed.add_argument("--chunk-size", type=int, default=SET_STATE_CHUNK_SIZE)
+    seed.add_argument("--proxy", default=DEFAULT_PROXY)
+    args = parser.parse_args()
+
+    seeded = seed_accounts(load_account_seeds(args.path), chunk_size=args.chunk_size, proxy=args.proxy)
+    print(f"Seeded {seeded} account(s) on {args.proxy}")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,3 +1,5 @@
+import os
+
 from multiversx_sdk import (
     AccountTransactionsFactory,
     AddressComputer,
@@ -19,12 +21,17 @@ PROXY_OVH_P04 = "http://51.89.62.131:8080"
 PROXY_OVH_P06 = "http://51.89.16.187:8080"
 PROXY_MVX_FRA = "http://49.51.171.106:8080"
 
-PROXY_CHAIN_SIMULATOR = "http://localhost:8085"
+# Each pytest-xdist worker (gw0, gw1, ...) runs its own simulator on the next port
+CHAIN_SIMULATOR_BASE_PORT = int(os.getenv("CHAIN_SIMULATOR_PORT", "8085"))
+CHAIN_SIMULATOR_PORT = CHAIN_SIMULATOR_BASE_PORT + int(os.getenv("PYTEST_XDIST_WORKER", "gw0")[2:] or 0)
+PROXY_CHAIN_SIMULATOR = f"http://localhost:{CHAIN_SIMULATOR_PORT}"
+# Set USE_CHAIN_SIMULATOR=1 (the test suite does) to point the helpers at the local simulator
+USE_CHAIN_SIMULATOR = os.getenv("USE_CHAIN_SIMULATOR") == "1"
 
 
 # Change this for other network
-PROXY_URL = PROXY_PUBLIC_DEVNET
-DEFAULT_PROXY = PROXY_PUBLIC_DEVNET
+PROXY_URL = PROXY_CHAIN_SIMULATOR if USE_CHAIN_SIMULATOR else PROXY_PUBLIC_DEVNET
+DEFAULT_PROXY = PROXY_CHAIN_SIMULATOR if USE_CHAIN_SIMULATOR else PROXY_PUBLIC_DEVNET
 # Get Chain ID
 provider = ProxyNetworkProvider(PROXY_URL)
 # CHAIN_ID = "1"  # Internal Test Network
@@ -32,6 +39,76 @@ provider = ProxyNetworkProvider(PROXY_URL)
 CHAIN_ID = "D"  # Chain Simulator
 METACHAIN_ID = "4294967295"
 
+# Shared HTTP client for the chain helpers (chain_commander, Wallet); the gateway client reuses its async twin
+HTTP_POOL_SIZE = 32
+HTTP_CONNECT_TIMEOUT_IN_SEC = 3
+# Simulator calls such as forcing an epoch change can take a while
+HTTP_READ_TIMEOUT_IN_SEC = 120
+HTTP_MAX_RETRIES = 3
+HTTP_RETRY_BACKOFF_IN_SEC = 0.2
+
+# Gateway used by the airdrop service; point GATEWAY_URL at a local fake gateway for offline runs
+GATEWAY_URL = os.getenv("GATEWAY_URL", DEFAULT_PROXY)
+GATEWAY_TIMEOUT_IN_SEC = 10
+GATEWAY_MAX_RETRIES = 3
+GATEWAY_RETRY_BACKOFF_IN_SEC = 0.2
+GATEWAY_POOL_SIZE = 32
+# Several comma-separated gateways of the same network (e.g. the PROXY_* nodes above) are used as one pool:
+# each is probed in the background, reads go to the fastest healthy one and slow reads are hedged
+GATEWAY_URLS = [url.strip() for url in os.getenv("GATEWAY_URLS", GATEWAY_URL).split(",") if url.strip()]
+GATEWAY_PROBE_INTERVAL_IN_SEC = 5
+GATEWAY_PROBE_TIMEOUT_IN_SEC = 2
+# A node is unhealthy after this many consecutive failures, or when its block nonce lags the best node by more
+GATEWAY_UNHEALTHY_AFTER_FAILURES = 3
+GATEWAY_MAX_BLOCK_LAG = 5
+# A read is also sent to the next node when the first has not answered after max(min delay, factor * its average latency)
+GATEWAY_HEDGE_MIN_DELAY_IN_SEC = 0.25
+GATEWAY_HEDGE_LATENCY_FACTOR = 3
+
+# Account state (nonce, balance, ESDTs) cache; entries also expire when a newer block is observed
+ACCOUNT_CACHE_MAX_ENTRIES = 10_000
+ACCOUNT_CACHE_TTL_IN_SEC = 2
+
+# Optional JSON file where allocated nonces are persisted between restarts
+NONCE_STORE_PATH = os.getenv("NONCE_STORE_PATH")
+# Optional SQLite file through which worker processes share nonce allocations (needed for more than one
+# worker); it also persists them between restarts, in place of NONCE_STORE_PATH
+NONCE_DB_PATH = os.getenv("NONCE_DB_PATH")
+# Unsigned mode: the service cannot know whether returned transactions are ever broadcast, so a sender's
+# reserved nonces are given out again from the chain nonce once nothing was reserved for this long
+NONCE_LEASE_TTL_IN_SEC = 60
+
+# /airdrop stage timeouts; stages not listed only do CPU work and cannot be interrupted
+AIRDROP_STAGE_TIMEOUTS_IN_SEC = {"parse": 150, "sender_state": 15, "nonce": 15, "broadcast": 120}
+
+# POST /airdrop/bulk uploads larger than this are refused; Quart keeps the part of the upload not read yet in
+# memory, so this also bounds what a stalled bulk airdrop can buffer
+BULK_MAX_UPLOAD_IN_BYTES = int(os.getenv("BULK_MAX_UPLOAD_IN_BYTES", str(256 * 1024 * 1024)))
+
+# Production serving (serve.py): Hypercorn bind address and worker processes; more than one needs NONCE_DB_PATH
+# and JOB_STORE_PATH
+SERVICE_BIND = os.getenv("SERVICE_BIND", "0.0.0.0:5000")
+SERVICE_WORKERS = int(os.getenv("SERVICE_WORKERS", "1"))
+
+# Airdrop jobs (POST /airdrop/jobs): concurrent workers, jobs waiting before submissions are refused,
+# finished jobs kept for status queries, and an optional SQLite file sharing jobs between worker processes
+JOB_WORKERS = int(os.getenv("JOB_WORKERS", "4"))
+JOB_QUEUE_SIZE = int(os.getenv("JOB_QUEUE_SIZE", "1000"))
+JOB_MAX_STORED = int(os.getenv("JOB_MAX_STORED", "10000"))
+JOB_STORE_PATH = os.getenv("JOB_STORE_PATH")
+JOB_EVENTS_POLL_IN_SEC = 1.0
+
+# Service mode: with a signer PEM configured, the service signs and broadcasts the airdrop itself
+SIGNER_PEM_PATH = os.getenv("SIGNER_PEM_PATH")
+SIGNING_WORKERS = int(os.getenv("SIGNING_WORKERS", os.cpu_count() or 1))
+BROADCAST_QUEUE_SIZE = 10_000
+BROADCAST_BATCH_SIZE = 100
+BROADCAST_FLUSH_INTERVAL_IN_SEC = 0.05
+BROADCAST_MAX_IN_FLIGHT = 4
+# Batch signing: transactions per work item sent to a signing process, and the batch size below which signing stays inline
+BATCH_SIGNING_CHUNK_SIZE = 256
+BATCH_SIGNING_MIN_PARALLEL = 64
+
 
 # TEMP
 OBSERVER_META = "http://localhost:55802"
@@ -52,6 +129,13 @@ num_waiting_validators_meta = "6"
 
 rounds_per_epoch = "50"
 
+# Chain simulator output: recent raw lines and parsed selection entries are kept in memory;
+# with a spill path, raw lines also go to a fixed-size memory-mapped ring file
+SIMULATOR_LOG_BUFFER_LINES = 20_000
+SIMULATOR_LOG_MAX_SELECTIONS = 100_000
+SIMULATOR_LOG_SPILL_PATH = os.getenv("SIMULATOR_LOG_SPILL_PATH")
+SIMULATOR_LOG_SPILL_SIZE = 64 * 1024 * 1024
+
 config = TransactionsFactoryConfig(CHAIN_ID)
 transfer_transactions_factory = TransferTransactionsFactory(config)
 account_transactions_factory = AccountTransactionsFactory(config)
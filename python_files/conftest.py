@@ -1,5 +1,9 @@
+import os
 from pathlib import Path
 
+# Must be set before config is imported, so every helper talks to this worker's simulator
+os.environ.setdefault("USE_CHAIN_SIMULATOR", "1")
+
 import pytest
 from multiversx_sdk import SmartContractTransactionsFactory, Transaction
 from multiversx_sdk.abi import Abi
@@ -13,6 +17,7 @@ from constants import (
 )
 from chain_commander import force_move_to_epoch, is_chain_online, add_blocks_until_tx_fully_executed
 from chain_simulator import ChainSimulator
+from chain_state import ChainStateSnapshot
 from wallet import Wallet
 from logger import logger
 
@@ -32,12 +37,18 @@ def send_transaction_and_check_for_success(transaction: Transaction) -> str:
     assert add_blocks_until_tx_fully_executed(tx_hash) == "success"
     return tx_hash
 
-@pytest.fixture(scope="function")
+@pytest.fixture(scope="session")
 def blockchain():
+    """
+    One simulator for the whole session (per xdist worker, each on its own port).
+    """
     chain_simulator = ChainSimulator(CHAIN_SIMULATOR_FOLDER)
     chain_simulator.start()
-    yield chain_simulator
-    chain_simulator.stop()
+    try:
+        assert is_chain_online()
+        yield chain_simulator
+    finally:
+        chain_simulator.stop()
 
 
 @pytest.fixture
@@ -45,14 +56,23 @@ def epoch(request):
     return request.param
 
 
-@pytest.fixture(scope="function")
-def deployed_smart_contract_address(blockchain):
+@pytest.fixture
+def chain_snapshot(blockchain):
     """
-    Fixture to deploy a smart contract using MultiversX SDK with predefined settings.
-    Returns the deployed contract address.
+    Captures accounts on request and restores them after the test:
+    `chain_snapshot.capture([address, ...])` before changing them.
     """
-    assert is_chain_online()
+    snapshot = ChainStateSnapshot()
+    yield snapshot
+    snapshot.restore()
+
 
+@pytest.fixture(scope="session")
+def smart_contract_deployment(blockchain):
+    """
+    Deploys the contract once per session and snapshots the deployer and contract accounts.
+    Returns the contract address and the snapshot.
+    """
     CONTRACT_WASM = "answer.wasm"
     CONTRACT_ABI = "adder.abi.json"
     EGLD_AMOUNT = "1000000000000000000"  # 1 EGLD
@@ -89,4 +109,16 @@ def deployed_smart_contract_address(blockchain):
         deployment_nonce=deploy_transaction.nonce,
     )
     logger.info(f"Deployed Smart Contract Address: {contract_address.to_bech32()}")
+    snapshot = ChainStateSnapshot().capture([sender_wallet.address, contract_address.to_bech32()])
+    return contract_address, snapshot
+
+
+@pytest.fixture(scope="function")
+def deployed_smart_contract_address(smart_contract_deployment):
+    """
+    Returns the deployed contract address, with the contract and its deployer
+    restored to their state right after the deployment.
+    """
+    contract_address, snapshot = smart_contract_deployment
+    snapshot.restore()
     return contract_address
@@ -19,9 +19,8 @@ else:
     if os.path.exists(specific_path) and os.listdir(specific_path):
         CHAIN_SIMULATOR_FOLDER = specific_path
     else:
-        raise ValueError(
-            "Both CHAIN_SIMULATOR_BUILD_PATH and the fallback path are invalid or empty"
-        )
+        # Only the simulator needs the binary; ChainSimulator refuses to start without it
+        CHAIN_SIMULATOR_FOLDER = None
 
 # Project Paths
 PROJECT_FOLDER = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
@@ -46,6 +45,15 @@ GAS_COST_PER_BYTE = 1_500
 GAS_PRICE_MODIFIER = 0.01
 DEDUCT_FACTOR = 100
 
+# smartSave airdrops
+GAS_COST_PER_SMART_SAVE_RECEIVER = 1_500_000
+MIN_SMART_SAVE_GAS_LIMIT = 10_000_000
+MAX_GAS_LIMIT_PER_TX = 600_000_000
+# Conservative bound for the data field of a single transaction
+MAX_TX_DATA_LENGTH = 256 * 1024
+# Wrapped EGLD sent along with every smartSave call, per receiver (0.01 EGLD)
+WRAPPED_EGLD_FEE_PER_RECEIVER = 10 ** 16
+
 # Transaction Guardian
 TRANSACTION_WITH_GUARDIAN = "guardian"
 TRANSACTION_WITH_GUARDIAN_SIGNATURE = "guardianSignature"
@@ -55,9 +63,20 @@ EGLD_TOKEN_IDENTIFIER = "EGLD-000000"
 
 # timing
 WAIT_UNTIL_API_REQUEST_IN_SEC = 0.5
+# One block per round
+ROUND_DURATION_IN_SEC = 6
+# Transaction status polling backs off between these while no tracked transaction completes
+TX_STATUS_MIN_POLL_INTERVAL_IN_SEC = 0.1
+TX_STATUS_MAX_POLL_INTERVAL_IN_SEC = 5
+# Status queries issued per polling round
+TX_STATUS_BATCH_SIZE = 256
+# How long a hash may be unknown to the gateway (not propagated or indexed yet) before it counts as expired
+TX_STATUS_NOT_FOUND_GRACE_IN_SEC = 5 * ROUND_DURATION_IN_SEC
 
 # chain
 MAX_NUM_OF_BLOCKS_UNTIL_TX_SHOULD_BE_EXECUTED = 20
+# Accounts sent per /simulator/set-state call when seeding in bulk
+SET_STATE_CHUNK_SIZE = 1_000
 
 # staking_v4
 EPOCH_WITH_STAKING_V3_5 = 3
@@ -0,0 +1,230 @@
+"""
+In-memory stand-in for the MultiversX gateway endpoints used by the airdrop service.
+
+Usage:
+    python -m python_files.fake_gateway --port 8085
+"""
+import argparse
+import asyncio
+import hashlib
+import json
+from contextlib import asynccontextmanager
+from typing import Dict, Optional, Set
+
+from aiohttp import web
+
+from python_files.chain_state import parse_esdt_storage_pair
+
+DEFAULT_BALANCE = str(10 ** 21)
+
+
+def _envelope(data) -> web.Response:
+    return web.json_response({"data": data, "error": "", "code": "successful"})
+
+
+def _error(message: str, status: int = 400) -> web.Response:
+    return web.json_response({"data": None, "error": message, "code": "bad_request"}, status=status)
+
+
+class FakeGateway:
+    """
+    Keeps accounts and ESDT balances in memory and answers the gateway REST routes with them.
+    Unknown accounts are created on first lookup with a default EGLD balance. Sent transactions
+    stay pending until a block is generated, through `generate_blocks` or the simulator route.
+
+    `latency` delays every answer and `fail_next(n)` makes the next n requests return HTTP 503,
+    so retries and timeouts can be exercised.
+    """
+
+    def __init__(self, latency: float = 0.0, block_nonce: int = 1) -> None:
+        self.latency = latency
+        self.block_nonce = block_nonce
+        self.accounts: Dict[str, dict] = {}
+        self.esdts: Dict[str, Dict[str, dict]] = {}
+        self.storage: Dict[str, Dict[str, str]] = {}
+        self.transactions: Dict[str, dict] = {}
+        # Block nonce at which each transaction was accepted; it counts as executed in the next one
+        self.transaction_blocks: Dict[str, int] = {}
+        self.accepted_nonces: Dict[str, Set[int]] = {}
+        self.request_count = 0
+        self._failures_left = 0
+
+    def set_account(self, address: str, nonce: int = 0, balance: int = int(DEFAULT_BALANCE),
+                    esdts: Optional[Dict[str, int]] = None) -> None:
+        self.accounts[address] = {"address": address, "nonce": nonce, "balance": str(balance), "username": ""}
+        for identifier, amount in (esdts or {}).items():
+            self.set_esdt(address, identifier, amount)
+
+    def set_esdt(self, address: str, identifier: str, amount: int) -> None:
+        self.esdts.setdefault(address, {})[identifier] = {
+            "tokenIdentifier": identifier,
+            "balance": str(amount),
+            "type": "FungibleESDT",
+        }
+
+    def fail_next(self, count: int) -> None:
+        self._failures_left = count
+
+    def _account(self, address: str) -> dict:
+        if address not in self.accounts:
+            self.set_account(address)
+        return self.accounts[address]
+
+    def _block_info(self) -> dict:
+        block_hash = hashlib.sha256(str(self.block_nonce).encode()).hexdigest()
+        return {"nonce": self.block_nonce, "hash": block_hash, "rootHash": block_hash}
+
+    @web.middleware
+    async def _middleware(self, request: web.Request, handler):
+        self.request_count += 1
+        if self.latency:
+            await asyncio.sleep(self.latency)
+        if self._failures_left > 0:
+            self._failures_left -= 1
+            return _error("injected failure", status=503)
+        return await handler(request)
+
+    async def get_address(self, request: web.Request) -> web.Response:
+        account = self._account(request.match_info["address"])
+        return _envelope({"account": account, "blockInfo": self._block_info()})
+
+    async def get_esdts(self, request: web.Request) -> web.Response:
+        address = request.match_info["address"]
+        self._account(address)
+        return _envelope({"esdts": self.esdts.get(address, {}), "blockInfo": self._block_info()})
+
+    async def get_balance(self, request: web.Request) -> web.Response:
+        account = self._account(request.match_info["address"])
+        return _envelope({"balance": account["balance"], "blockInfo": self._block_info()})
+
+    async def get_nonce(self, request: web.Request) -> web.Response:
+        account = self._account(request.match_info["address"])
+        return _envelope({"nonce": account["nonce"], "blockInfo": self._block_info()})
+
+    async def get_keys(self, request: web.Request) -> web.Response:
+        address = request.match_info["address"]
+        self._account(address)
+        return _envelope({"pairs": self.storage.get(address, {}), "blockInfo": self._block_info()})
+
+    def _set_state(self, state: dict, overwrite: bool) -> None:
+        address = state["address"]
+        account = self._account(address)
+        if overwrite:
+            account.update({"nonce": 0, "balance": "0"})
+            self.storage[address] = {}
+        account.update({name: value for name, value in state.items() if name not in ("address", "keys")})
+        account["nonce"] = int(account.get("nonce", 0))
+        account["balance"] = str(account.get("balance", "0"))
+        self.storage.setdefault(address, {}).update(state.get("keys") or {})
+        for key, value in (state.get("keys") or {}).items():
+            esdt = parse_esdt_storage_pair(key, value)
+            if esdt is not None:
+                self.set_esdt(address, *esdt)
+
+    async def set_state(self, request: web.Request) -> web.Response:
+        for state in await request.json():
+            self._set_state(state, overwrite=False)
+        return _envelope({})
+
+    async def set_state_overwrite(self, request: web.Request) -> web.Response:
+        for state in await request.json():
+            self._set_state(state, overwrite=True)
+        return _envelope({})
+
+    async def get_network_status(self, request: web.Request) -> web.Response:
+        return _envelope({"status": {"erd_nonce": self.block_nonce, "erd_epoch_number": 0}})
+
+    def _accept(self, transaction: dict) -> Optional[str]:
+        """
+        Accepts a signed transaction whose nonce is not already used and returns its hash.
+        Like the mempool, nonces may arrive out of order; the sender's nonce then moves past
+        every consecutive accepted one, as if they were executed in the next block.
+        """
+        sender = transaction.get("sender", "")
+        account = self._account(sender)
+        nonce = int(transaction.get("nonce", -1))
+        accepted = self.accepted_nonces.setdefault(sender, set())
+        if not transaction.get("signature") or nonce < account["nonce"] or nonce in accepted:
+            return None
+        tx_hash = hashlib.sha256(json.dumps(transaction, sort_keys=True).encode()).hexdigest()
+        self.transactions[tx_hash] = transaction
+        self.transaction_blocks[tx_hash] = self.block_nonce
+        accepted.add(nonce)
+        while account["nonce"] in accepted:
+            accepted.discard(account["nonce"])
+            account["nonce"] += 1
+        return tx_hash
+
+    async def send_transaction(self, request: web.Request) -> web.Response:
+        tx_hash = self._accept(await request.json())
+        if tx_hash is None:
+            return _error("transaction generation failed: lowerNonceInTx, duplicated nonce or missing signature")
+        return _envelope({"txHash": tx_hash})
+
+    async def send_transactions(self, request: web.Request) -> web.Response:
+        hashes = {}
+        for index, transaction in enumerate(await request.json()):
+            tx_hash = self._accept(transaction)
+            if tx_hash is not None:
+                hashes[str(index)] = tx_hash
+        return _envelope({"numOfSentTxs": len(hashes), "txsHashes": hashes})
+
+    def generate_blocks(self, count: int = 1) -> None:
+        self.block_nonce += count
+
+    async def get_transaction_status(self, request: web.Request) -> web.Response:
+        tx_hash = request.match_info["tx_hash"]
+        if tx_hash not in self.transaction_blocks:
+            return _error("transaction not found", status=404)
+        status = "success" if self.block_nonce > self.transaction_blocks[tx_hash] else "pending"
+        return _envelope({"status": status})
+
+    async def post_generate_blocks(self, request: web.Request) -> web.Response:
+        self.generate_blocks(int(request.match_info["count"]))
+        return _envelope({})
+
+    def create_app(self) -> web.Application:
+        app = web.Application(middlewares=[self._middleware])
+        app.router.add_get("/address/{address}", self.get_address)
+        app.router.add_get("/address/{address}/esdt", self.get_esdts)
+        app.router.add_get("/address/{address}/balance", self.get_balance)
+        app.router.add_get("/address/{address}/nonce", self.get_nonce)
+        app.router.add_get("/address/{address}/keys", self.get_keys)
+        app.router.add_get("/network/status/{shard}", self.get_network_status)
+        app.router.add_post("/transaction/send", self.send_transaction)
+        app.router.add_post("/transaction/send-multiple", self.send_transactions)
+        app.router.add_get("/transaction/{tx_hash}/process-status", self.get_transaction_status)
+        app.router.add_post("/simulator/generate-blocks/{count}", self.post_generate_blocks)
+        app.router.add_post("/simulator/set-state", self.set_state)
+        app.router.add_post("/simulator/set-state-overwrite", self.set_state_overwrite)
+        return app
+
+
+@asynccontextmanager
+async def run_fake_gateway(gateway: Optional[FakeGateway] = None, host: str = "127.0.0.1", port: int = 0):
+    """
+    Serves `gateway` in the current event loop and yields its base URL.
+    """
+    gateway = gateway or FakeGateway()
+    runner = web.AppRunner(gateway.create_app())
+    await runner.setup()
+    site = web.TCPSite(runner, host, port)
+    await site.start()
+    bound_port = site._server.sockets[0].getsockname()[1]
+    try:
+        yield f"http://{host}:{bound_port}"
+    finally:
+        await runner.cleanup()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8085)
+    parser.add_argument("--latency", type=float, default=0.0, help="Seconds to wait before answering")
+    args = parser.parse_args()
+    web.run_app(FakeGateway(latency=args.latency).create_app(), host=args.host, port=args.port)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,456 @@
+import asyncio
+import random
+import time
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional, Sequence
+
+from python_files.config import (
+    GATEWAY_HEDGE_LATENCY_FACTOR,
+    GATEWAY_HEDGE_MIN_DELAY_IN_SEC,
+    GATEWAY_MAX_BLOCK_LAG,
+    GATEWAY_MAX_RETRIES,
+    GATEWAY_POOL_SIZE,
+    GATEWAY_PROBE_INTERVAL_IN_SEC,
+    GATEWAY_PROBE_TIMEOUT_IN_SEC,
+    GATEWAY_RETRY_BACKOFF_IN_SEC,
+    GATEWAY_TIMEOUT_IN_SEC,
+    GATEWAY_UNHEALTHY_AFTER_FAILURES,
+    GATEWAY_URL,
+    GATEWAY_URLS,
+    METACHAIN_ID,
+)
+from python_files.account_cache import AccountStateCache, account_state_cache
+from python_files.http_client import IDEMPOTENT_METHODS, AsyncHttpClient, HttpConnectError, HttpError, endpoint_of
+from python_files.logger import logger
+from python_files.metrics import gateway_in_flight, gateway_request_seconds, registry
+
+# Weight of the newest sample in the per-node latency and error rate averages
+NODE_EWMA_WEIGHT = 0.2
+
+node_latency_seconds = registry.gauge("gateway_node_latency_seconds", "Average gateway node latency", ["node"])
+node_error_rate = registry.gauge("gateway_node_error_rate", "Average share of failed gateway node requests", ["node"])
+node_healthy = registry.gauge("gateway_node_healthy", "1 while a gateway node receives traffic first", ["node"])
+hedged_requests = registry.counter("gateway_hedged_requests_total", "Reads also sent to a second node, by winner", ["winner"])
+failovers_total = registry.counter("gateway_failovers_total", "Requests moved to another node after a failure")
+
+
+class GatewayError(Exception):
+    pass
+
+
+class GatewayUnavailable(GatewayError):
+    """
+    The gateway could not be reached or kept failing (timeouts, 5xx, 429), as opposed to
+    answering the request with an error.
+    """
+
+
+class GatewayConnectError(GatewayUnavailable):
+    """
+    The gateway could not be connected to, so the request never reached it.
+    """
+
+
+class TransactionNotFound(GatewayError):
+    pass
+
+
+@dataclass
+class BlockInfo:
+    nonce: int
+    hash: str = ""
+    root_hash: str = ""
+
+    @classmethod
+    def from_json(cls, data: Optional[dict]) -> "BlockInfo":
+        data = data or {}
+        return cls(nonce=int(data.get("nonce", 0)), hash=data.get("hash", ""), root_hash=data.get("rootHash", ""))
+
+
+@dataclass
+class AccountDetails:
+    address: str
+    nonce: int
+    balance: int
+    username: str = ""
+    block_info: Optional[BlockInfo] = None
+
+    @classmethod
+    def from_json(cls, data: dict) -> "AccountDetails":
+        account = data.get("account", {})
+        return cls(
+            address=account.get("address", ""),
+            nonce=int(account.get("nonce", 0)),
+            balance=int(account.get("balance", "0")),
+            username=account.get("username", ""),
+            block_info=BlockInfo.from_json(data.get("blockInfo")),
+        )
+
+
+@dataclass
+class EsdtBalance:
+    token_identifier: str
+    balance: int
+    type: str = ""
+
+
+@dataclass
+class EsdtDetails:
+    esdts: Dict[str, EsdtBalance] = field(default_factory=dict)
+    block_info: Optional[BlockInfo] = None
+
+    @classmethod
+    def from_json(cls, data: dict) -> "EsdtDetails":
+        esdts = {
+            identifier: EsdtBalance(
+                token_identifier=details.get("tokenIdentifier", identifier),
+                balance=int(details.get("balance", "0")),
+                type=details.get("type", ""),
+            )
+            for identifier, details in (data.get("esdts") or {}).items()
+        }
+        return cls(esdts=esdts, block_info=BlockInfo.from_json(data.get("blockInfo")))
+
+    def get(self, token_identifier: str) -> Optional[EsdtBalance]:
+        return self.esdts.get(token_identifier)
+
+
+@dataclass
+class SenderState:
+    account: AccountDetails
+    esdts: EsdtDetails
+
+
+class GatewayClient:
+    """
+    Async client for the MultiversX gateway (proxy) REST API.
+
+    Requests go through an `AsyncHttpClient`, so they share one keep-alive connection pool,
+    connection errors, and timeouts and 5xx/429 answers to reads, are retried with exponential
+    backoff and full jitter, and latencies land in the shared HTTP metrics. Account and ESDT lookups go
+    through `cache` when one is given.
+    """
+
+    def __init__(
+            self,
+            host: str = GATEWAY_URL,
+            timeout: float = GATEWAY_TIMEOUT_IN_SEC,
+            max_retries: int = GATEWAY_MAX_RETRIES,
+            backoff: float = GATEWAY_RETRY_BACKOFF_IN_SEC,
+            pool_size: int = GATEWAY_POOL_SIZE,
+            cache: Optional[AccountStateCache] = None,
+    ) -> None:
+        self.host = host.rstrip("/")
+        self.cache = cache
+        self.http = AsyncHttpClient(pool_size=pool_size, timeout=timeout, max_retries=max_retries, backoff=backoff)
+
+    async def request_json(self, method: str, path: str, payload=None) -> dict:
+        """
+        Sends a request to `{host}{path}` and returns the decoded gateway envelope.
+        """
+        url = f"{self.host}{path}"
+        try:
+            with gateway_in_flight.track_in_progress(), \
+                    gateway_request_seconds.time(method=method, endpoint=endpoint_of(method, url).split(" ", 1)[1]):
+                status, body = await self.http.request_json(method, url, payload)
+        except HttpConnectError as e:
+            raise GatewayConnectError(str(e)) from e
+        except HttpError as e:
+            raise GatewayUnavailable(str(e)) from e
+        if status >= 400 or not isinstance(body, dict) or body.get("error"):
+            error = body.get("error") if isinstance(body, dict) else None
+            raise GatewayError(f"{method} {url} failed: {error or status}")
+        return body
+
+    async def get_json(self, path: str) -> dict:
+        return await self.request_json("GET", path)
+
+    async def _fetch_account(self, address: str) -> AccountDetails:
+        body = await self.get_json(f"/address/{address}")
+        return AccountDetails.from_json(body.get("data", {}))
+
+    async def _fetch_esdts(self, address: str) -> EsdtDetails:
+        body = await self.get_json(f"/address/{address}/esdt")
+        return EsdtDetails.from_json(body.get("data", {}))
+
+    async def get_account(self, address: str) -> AccountDetails:
+        if self.cache is None:
+            return await self._fetch_account(address)
+        return await self.cache.get_or_fetch(
+            ("account", address), lambda: self._fetch_account(address), lambda account: account.block_info.nonce
+        )
+
+    async def get_esdts(self, address: str) -> EsdtDetails:
+        if self.cache is None:
+            return await self._fetch_esdts(address)
+        return await self.cache.get_or_fetch(
+            ("esdts", address), lambda: self._fetch_esdts(address), lambda esdts: esdts.block_info.nonce
+        )
+
+    async def fetch_sender_state(self, address: str) -> SenderState:
+        """
+        Fetches the account and its ESDT balances concurrently.
+        """
+        account, esdts = await asyncio.gather(self.get_account(address), self.get_esdts(address))
+        return SenderState(account=account, esdts=esdts)
+
+    async def send_transactions(self, transactions: List[dict]) -> Dict[int, str]:
+        """
+        Submits signed transactions in one `/transaction/send-multiple` call.
+        Returns the hash of every accepted transaction by its index; rejected ones are missing.
+        """
+        body = await self.request_json("POST", "/transaction/send-multiple", transactions)
+        hashes = (body.get("data") or {}).get("txsHashes") or {}
+        return {int(index): tx_hash for index, tx_hash in hashes.items()}
+
+    async def get_transaction_status(self, tx_hash: str) -> str:
+        """
+        Returns the process status of a transaction: "pending", "success", "fail" or "invalid".
+        """
+        try:
+            body = await self.get_json(f"/transaction/{tx_hash}/process-status")
+        except GatewayError as e:
+            if "not found" in str(e):
+                raise TransactionNotFound(f"Transaction {tx_hash} not found") from e
+            raise
+        return (body.get("data") or {}).get("status", "")
+
+    async def generate_blocks(self, count: int = 1) -> None:
+        """
+        Chain simulator only: processes `count` blocks right away.
+        """
+        await self.request_json("POST", f"/simulator/generate-blocks/{count}")
+        # Processed blocks may have changed any account
+        if self.cache is not None:
+            self.cache.clear()
+
+    async def close(self) -> None:
+        await self.http.close()
+
+
+@dataclass
+class GatewayNode:
+    client: GatewayClient
+    # Averages over probes and requests, weighted towards the newest ones
+    latency: float = 0.0
+    error_rate: float = 0.0
+    consecutive_failures: int = 0
+    # Block nonce of the metachain as last reported by the node's /network/status
+    block_nonce: int = 0
+    samples: int = 0
+
+    @property
+    def url(self) -> str:
+        return self.client.host
+
+    def record_success(self, seconds: float) -> None:
+        self.latency = seconds if not self.samples else (1 - NODE_EWMA_WEIGHT) * self.latency + NODE_EWMA_WEIGHT * seconds
+        self.error_rate *= 1 - NODE_EWMA_WEIGHT
+        self.consecutive_failures = 0
+        self.samples += 1
+        node_latency_seconds.set(self.latency, node=self.url)
+        node_error_rate.set(self.error_rate, node=self.url)
+
+    def record_failure(self) -> None:
+        self.error_rate = (1 - NODE_EWMA_WEIGHT) * self.error_rate + NODE_EWMA_WEIGHT
+        self.consecutive_failures += 1
+        node_error_rate.set(self.error_rate, node=self.url)
+
+
+class GatewayPool(GatewayClient):
+    """
+    `GatewayClient` over several gateways of the same network.
+
+    A background task probes every node's `/network/status` each `probe_interval` seconds and
+    keeps an average latency and error rate per node, also fed by the requests themselves. A
+    node is healthy until it fails `GATEWAY_UNHEALTHY_AFTER_FAILURES` times in a row or its
+    block nonce falls more than `max_block_lag` behind the most advanced node.
+
+    Requests go to the healthy node with the best latency, weighted by its error rate.
+    Idempotent requests move on to the next node when a node cannot be reached or keeps
+    failing; others, such as sending transactions, only when the node could not be connected
+    to, so they are never sent twice. Answers that are gateway errors are returned as they
+    are. A read still unanswered after a few times the node's average latency is also sent to
+    the next node and the first answer wins.
+    """
+
+    def __init__(
+            self,
+            hosts: Sequence[str],
+            timeout: float = GATEWAY_TIMEOUT_IN_SEC,
+            max_retries: int = GATEWAY_MAX_RETRIES,
+            backoff: float = GATEWAY_RETRY_BACKOFF_IN_SEC,
+            pool_size: int = GATEWAY_POOL_SIZE,
+            cache: Optional[AccountStateCache] = None,
+            probe_interval: float = GATEWAY_PROBE_INTERVAL_IN_SEC,
+            hedge_delay: float = GATEWAY_HEDGE_MIN_DELAY_IN_SEC,
+            max_block_lag: int = GATEWAY_MAX_BLOCK_LAG,
+    ) -> None:
+        # Requests only go through the nodes' clients, so the base client's own is not built
+        self.host = hosts[0].rstrip("/")
+        self.cache = cache
+        self.max_retries = max_retries
+        self.backoff = backoff
+        self.probe_interval = probe_interval
+        self.hedge_delay = hedge_delay
+        self.max_block_lag = max_block_lag
+        # Nodes do not retry themselves: the pool retries on the next node instead
+        self.nodes = [
+            GatewayNode(GatewayClient(host, timeout, max_retries=0, backoff=backoff, pool_size=pool_size))
+            for host in hosts
+        ]
+        self._probers: List[asyncio.Task] = []
+
+    def _start(self) -> None:
+        loop = asyncio.get_running_loop()
+        if not self._probers or self._probers[0].done() or self._probers[0].get_loop() is not loop:
+            # One loop per node, so a slow node does not delay the probes of the others
+            self._probers = [loop.create_task(self._probe_forever(node)) for node in self.nodes]
+
+    async def _probe_forever(self, node: GatewayNode) -> None:
+        while True:
+            await self._probe(node)
+            for other in self.nodes:
+                node_healthy.set(int(self.is_healthy(other)), node=other.url)
+            await asyncio.sleep(self.probe_interval)
+
+    async def probe(self) -> None:
+        """
+        Probes every node once.
+        """
+        await asyncio.gather(*(self._probe(node) for node in self.nodes))
+
+    async def _probe(self, node: GatewayNode) -> None:
+        start = time.perf_counter()
+        try:
+            body = await asyncio.wait_for(node.client.get_json(f"/network/status/{METACHAIN_ID}"), GATEWAY_PROBE_TIMEOUT_IN_SEC)
+            node.block_nonce = int(body["data"]["status"]["erd_nonce"])
+        except (GatewayError, asyncio.TimeoutError, KeyError, TypeError, ValueError) as e:
+            if node.consecutive_failures + 1 == GATEWAY_UNHEALTHY_AFTER_FAILURES:
+                logger.warning(f"Gateway {node.url} is unhealthy: {e!r}")
+            node.record_failure()
+            return
+        if node.consecutive_failures >= GATEWAY_UNHEALTHY_AFTER_FAILURES:
+            logger.info(f"Gateway {node.url} recovered")
+        node.record_success(time.perf_counter() - start)
+
+    def is_healthy(self, node: GatewayNode) -> bool:
+        best_nonce = max(other.block_nonce for other in self.nodes)
+        return (node.consecutive_failures < GATEWAY_UNHEALTHY_AFTER_FAILURES
+                and best_nonce - node.block_nonce <= self.max_block_lag)
+
+    def ranked_nodes(self) -> List[GatewayNode]:
+        """
+        Nodes in the order requests try them: healthy ones by latency weighted by error rate,
+        then the others, least failing first.
+        """
+        def score(node: GatewayNode):
+            if self.is_healthy(node):
+                return 0, node.latency / max(0.05, 1 - node.error_rate)
+            return 1, node.consecutive_failures
+        return sorted(self.nodes, key=score)
+
+    async def request_json(self, method: str, path: str, payload=None) -> dict:
+        self._start()
+        nodes = self.ranked_nodes()
+        # Only requests that never reached a node are safe to send to another one, unless idempotent
+        retryable = GatewayUnavailable if method.upper() in IDEMPOTENT_METHODS else GatewayConnectError
+        last_error = None
+        for attempt in range(max(len(nodes), self.max_retries + 1)):
+            if attempt >= len(nodes):
+                # Every node failed once already: back off before going around again
+                await asyncio.sleep(random.uniform(0, self.backoff * 2 ** (attempt - len(nodes))))
+            node = nodes[attempt % len(nodes)]
+            if attempt:
+                failovers_total.inc()
+            try:
+                if method == "GET" and len(nodes) > 1:
+                    return await self._hedged(node, nodes[(attempt + 1) % len(nodes)], path)
+                return await self._send(node, method, path, payload)
+            except retryable as e:
+                logger.info(f"{e}; trying the next gateway")
+                last_error = e
+        raise last_error
+
+    async def _send(self, node: GatewayNode, method: str, path: str, payload=None) -> dict:
+        start = time.perf_counter()
+        try:
+            body = await node.client.request_json(method, path, payload)
+        except GatewayUnavailable:
+            node.record_failure()
+            raise
+        except GatewayError:
+            # The node answered; the request itself was refused
+            node.record_success(time.perf_counter() - start)
+            raise
+        node.record_success(time.perf_counter() - start)
+        return body
+
+    async def _hedged(self, primary: GatewayNode, secondary: GatewayNode, path: str) -> dict:
+        tasks = [asyncio.ensure_future(self._send(primary, "GET", path))]
+        try:
+            delay = max(self.hedge_delay, GATEWAY_HEDGE_LATENCY_FACTOR * primary.latency)
+            done, _ = await asyncio.wait(tasks, timeout=delay)
+            if done:
+                return tasks[0].result()
+
+            tasks.append(asyncio.ensure_future(self._send(secondary, "GET", path)))
+            pending = set(tasks)
+            error = None
+            while pending:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    if task.exception() is None:
+                        hedged_requests.inc(winner="primary" if task is tasks[0] else "hedge")
+                        return task.result()
+                    error = task.exception()
+            raise error
+        finally:
+            for task in tasks:
+                task.cancel()
+
+    def stats(self) -> List[dict]:
+        return [
+            {
+                "url": node.url,
+                "healthy": self.is_healthy(node),
+                "latencyMs": round(1000 * node.latency, 3),
+                "errorRate": round(node.error_rate, 4),
+                "blockNonce": node.block_nonce,
+            }
+            for node in self.ranked_nodes()
+        ]
+
+    async def close(self) -> None:
+        probers, self._probers = set(self._probers), []
+        while probers:
+            # Before Python 3.12, `wait_for` loses a cancellation that races with the probe finishing
+            for prober in probers:
+                prober.cancel()
+            _, probers = await asyncio.wait(probers, timeout=0.1)
+        for node in self.nodes:
+            await node.client.close()
+
+
+_clients: Dict[str, GatewayClient] = {}
+
+
+def gateway_client_for(host: str = GATEWAY_URL) -> GatewayClient:
+    """
+    Returns the shared client for `host`, creating it on first use.
+    """
+    host = host.rstrip("/")
+    if host not in _clients:
+        _clients[host] = GatewayClient(host, cache=account_state_cache)
+    return _clients[host]
+
+
+async def close_gateway_clients() -> None:
+    for client in {*_clients.values(), gateway_client}:
+        await client.close()
+
+
+if len(GATEWAY_URLS) > 1:
+    gateway_client = GatewayPool(GATEWAY_URLS, cache=account_state_cache)
+else:
+    gateway_client = gateway_client_for(GATEWAY_URLS[0] if GATEWAY_URLS else GATEWAY_URL)
@@ -0,0 +1,246 @@
+import asyncio
+import random
+import re
+import threading
+import time
+from collections import deque
+from dataclasses import dataclass, field
+from typing import Any, Dict, Optional, Tuple
+from urllib.parse import urlsplit
+
+import aiohttp
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+from python_files.config import (
+    HTTP_CONNECT_TIMEOUT_IN_SEC,
+    HTTP_MAX_RETRIES,
+    HTTP_POOL_SIZE,
+    HTTP_READ_TIMEOUT_IN_SEC,
+    HTTP_RETRY_BACKOFF_IN_SEC,
+)
+from python_files.logger import logger
+
+RETRYABLE_STATUSES = frozenset({429, 500, 502, 503, 504})
+# Methods retried after a timeout or a 429/5xx answer, as in urllib3; others only when they never reached the server
+IDEMPOTENT_METHODS = Retry.DEFAULT_ALLOWED_METHODS
+# Latency samples kept per endpoint for the percentiles
+LATENCY_SAMPLES = 1024
+
+_PATH_PARAMETERS = (
+    (re.compile(r"erd1[02-9ac-hj-np-z]{58}"), "{address}"),
+    (re.compile(r"\b[0-9a-fA-F]{64}\b"), "{hash}"),
+    (re.compile(r"/\d+(?=/|$)"), "/{n}"),
+)
+
+
+def endpoint_of(method: str, url: str) -> str:
+    """
+    Groups URLs by route: `GET /address/erd1.../nonce` becomes `GET /address/{address}/nonce`.
+    """
+    path = urlsplit(url).path or "/"
+    for pattern, placeholder in _PATH_PARAMETERS:
+        path = pattern.sub(placeholder, path)
+    return f"{method.upper()} {path}"
+
+
+@dataclass
+class EndpointStats:
+    count: int = 0
+    errors: int = 0
+    total_seconds: float = 0.0
+    max_seconds: float = 0.0
+    samples: deque = field(default_factory=lambda: deque(maxlen=LATENCY_SAMPLES))
+
+    def percentile(self, fraction: float) -> float:
+        ordered = sorted(self.samples)
+        if not ordered:
+            return 0.0
+        return ordered[min(len(ordered) - 1, int(fraction * len(ordered)))]
+
+
+class HttpMetrics:
+    """
+    Per-endpoint request counts, errors and latencies, shared by the sync and async clients.
+    """
+
+    def __init__(self) -> None:
+        self._endpoints: Dict[str, EndpointStats] = {}
+        self._lock = threading.Lock()
+
+    def record(self, endpoint: str, seconds: float, error: bool = False) -> None:
+        with self._lock:
+            stats = self._endpoints.setdefault(endpoint, EndpointStats())
+            stats.count += 1
+            stats.errors += error
+            stats.total_seconds += seconds
+            stats.max_seconds = max(stats.max_seconds, seconds)
+            stats.samples.append(seconds)
+
+    def snapshot(self) -> Dict[str, dict]:
+        with self._lock:
+            return {
+                endpoint: {
+                    "count": stats.count,
+                    "errors": stats.errors,
+                    "avg_ms": 1000 * stats.total_seconds / stats.count,
+                    "p50_ms": 1000 * stats.percentile(0.5),
+                    "p95_ms": 1000 * stats.percentile(0.95),
+                    "max_ms": 1000 * stats.max_seconds,
+                }
+                for endpoint, stats in self._endpoints.items()
+            }
+
+    def reset(self) -> None:
+        with self._lock:
+            self._endpoints.clear()
+
+
+http_metrics = HttpMetrics()
+
+
+class HttpError(Exception):
+    pass
+
+
+class HttpConnectError(HttpError):
+    """
+    The request never reached the server, so it is safe to send again, elsewhere too.
+    """
+
+
+class HttpClient:
+    """
+    Blocking HTTP client over one pooled `requests.Session`.
+
+    Connections are kept alive and reused across calls. Connection errors, and 429/5xx
+    answers to idempotent requests, are retried with exponential backoff; a POST is only
+    retried when it never reached the server. Every attempt is timed into `metrics`.
+    """
+
+    def __init__(
+            self,
+            pool_size: int = HTTP_POOL_SIZE,
+            connect_timeout: float = HTTP_CONNECT_TIMEOUT_IN_SEC,
+            read_timeout: float = HTTP_READ_TIMEOUT_IN_SEC,
+            max_retries: int = HTTP_MAX_RETRIES,
+            backoff: float = HTTP_RETRY_BACKOFF_IN_SEC,
+            metrics: HttpMetrics = http_metrics,
+    ) -> None:
+        self.timeout = (connect_timeout, read_timeout)
+        self.metrics = metrics
+        retry = Retry(
+            total=max_retries,
+            backoff_factor=backoff,
+            status_forcelist=RETRYABLE_STATUSES,
+            raise_on_status=False,
+        )
+        adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size, max_retries=retry)
+        self.session = requests.Session()
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+
+    def request(self, method: str, url: str, **kwargs) -> requests.Response:
+        kwargs.setdefault("timeout", self.timeout)
+        endpoint = endpoint_of(method, url)
+        start = time.perf_counter()
+        try:
+            response = self.session.request(method, url, **kwargs)
+        except requests.RequestException:
+            self.metrics.record(endpoint, time.perf_counter() - start, error=True)
+            raise
+        self.metrics.record(endpoint, time.perf_counter() - start, error=response.status_code >= 400)
+        return response
+
+    def get(self, url: str, **kwargs) -> requests.Response:
+        return self.request("GET", url, **kwargs)
+
+    def post(self, url: str, **kwargs) -> requests.Response:
+        return self.request("POST", url, **kwargs)
+
+    def close(self) -> None:
+        self.session.close()
+
+
+class AsyncHttpClient:
+    """
+    Async twin of `HttpClient` over one pooled `aiohttp.ClientSession`, created on first use.
+
+    Connection errors are retried with exponential backoff and full jitter, and so are
+    timeouts and 429/5xx answers to idempotent requests: a POST that may have reached the
+    server is not sent twice. Every attempt is timed into `metrics`.
+    """
+
+    def __init__(
+            self,
+            pool_size: int = HTTP_POOL_SIZE,
+            timeout: float = HTTP_READ_TIMEOUT_IN_SEC,
+            max_retries: int = HTTP_MAX_RETRIES,
+            backoff: float = HTTP_RETRY_BACKOFF_IN_SEC,
+            metrics: HttpMetrics = http_metrics,
+    ) -> None:
+        self.pool_size = pool_size
+        self.timeout = aiohttp.ClientTimeout(total=timeout)
+        self.max_retries = max_retries
+        self.backoff = backoff
+        self.metrics = metrics
+        self._session: Optional[aiohttp.ClientSession] = None
+
+    def _get_session(self) -> aiohttp.ClientSession:
+        if self._session is None or self._session.closed:
+            connector = aiohttp.TCPConnector(limit=self.pool_size, keepalive_timeout=60)
+            self._session = aiohttp.ClientSession(connector=connector, timeout=self.timeout)
+        return self._session
+
+    async def request_json(self, method: str, url: str, payload=None) -> Tuple[int, Any]:
+        """
+        Sends a request and returns the final HTTP status with the decoded JSON body.
+        Raises `HttpError` once the retries are used up, when a request that must not be
+        retried fails, or when the body is not JSON; `HttpConnectError` when the server could
+        not be reached at all.
+        """
+        session = self._get_session()
+        endpoint = endpoint_of(method, url)
+        idempotent = method.upper() in IDEMPOTENT_METHODS
+        last_error = None
+
+        for attempt in range(self.max_retries + 1):
+            if attempt:
+                await asyncio.sleep(random.uniform(0, self.backoff * 2 ** (attempt - 1)))
+            start = time.perf_counter()
+            try:
+                async with session.request(method, url, json=payload) as response:
+                    if response.status in RETRYABLE_STATUSES:
+                        self.metrics.record(endpoint, time.perf_counter() - start, error=True)
+                        last_error = HttpError(f"{method} {url} returned HTTP {response.status}")
+                        if not idempotent:
+                            raise last_error
+                        logger.warning(f"{last_error}; attempt {attempt + 1}/{self.max_retries + 1}")
+                        continue
+                    body = await response.json(content_type=None)
+                    self.metrics.record(endpoint, time.perf_counter() - start, error=response.status >= 400)
+                    return response.status, body
+            except aiohttp.ClientConnectorError as e:
+                self.metrics.record(endpoint, time.perf_counter() - start, error=True)
+                last_error = HttpConnectError(f"{method} {url} could not connect: {e!r}")
+                logger.warning(f"{last_error}; attempt {attempt + 1}/{self.max_retries + 1}")
+            except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+                self.metrics.record(endpoint, time.perf_counter() - start, error=True)
+                last_error = HttpError(f"{method} {url} failed: {e!r}")
+                if not idempotent:
+                    raise last_error from e
+                logger.warning(f"{last_error}; attempt {attempt + 1}/{self.max_retries + 1}")
+            except ValueError as e:
+                self.metrics.record(endpoint, time.perf_counter() - start, error=True)
+                raise HttpError(f"{method} {url} returned invalid JSON") from e
+
+        raise last_error
+
+    async def close(self) -> None:
+        if self._session is not None and not self._session.closed:
+            await self._session.close()
+        self._session = None
+
+
+http_client = HttpClient()
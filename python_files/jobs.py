@@ -0,0 +1,428 @@
+import asyncio
+import json
+import os
+import sqlite3
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import AsyncIterator, Awaitable, Callable, Dict, List, Optional, Tuple
+
+from python_files.config import JOB_EVENTS_POLL_IN_SEC, JOB_MAX_STORED, JOB_QUEUE_SIZE, JOB_WORKERS
+from python_files.logger import logger
+from python_files.metrics import registry
+
+QUEUED = "queued"
+RUNNING = "running"
+SUCCEEDED = "succeeded"
+FAILED = "failed"
+FINISHED = (SUCCEEDED, FAILED)
+
+# Takes the job request and a progress callback, returns the response body, HTTP status and headers
+JobRunner = Callable[[dict, Callable[[str, dict], Awaitable[None]]], Awaitable[Tuple[dict, int, dict]]]
+# (sequence, event name, event data)
+JobEvent = Tuple[int, str, dict]
+
+jobs_total = registry.counter("airdrop_jobs_total", "Airdrop jobs by final status", ["status"])
+jobs_queued = registry.gauge("airdrop_jobs_queued", "Airdrop jobs waiting for a worker")
+job_seconds = registry.histogram("airdrop_job_seconds", "Time from submitting an airdrop job to its result")
+
+
+class JobQueueFull(Exception):
+    pass
+
+
+# Owners of the managers started in this process and not closed yet
+_live_owners = set()
+
+
+def owner_is_alive(owner: Optional[str]) -> bool:
+    """
+    Whether the manager `owner` (`<pid>:<id>`) still runs, in this process or another one on
+    this host, which a SQLite store is only shared with.
+    """
+    pid, _, _ = (owner or "").partition(":")
+    if not pid.isdigit():
+        return False
+    if int(pid) == os.getpid():
+        return owner in _live_owners
+    try:
+        os.kill(int(pid), 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        pass
+    return True
+
+
+@dataclass
+class Job:
+    id: str
+    request: dict
+    status: str = QUEUED
+    stage: Optional[str] = None
+    http_status: Optional[int] = None
+    result: Optional[dict] = None
+    created_at: float = 0.0
+    updated_at: float = 0.0
+    # The manager that queued the job and runs it, see `JobManager.owner`
+    owner: Optional[str] = None
+
+    def to_dict(self) -> dict:
+        return {
+            "id": self.id,
+            "status": self.status,
+            "stage": self.stage,
+            "httpStatus": self.http_status,
+            "result": self.result,
+            "createdAt": self.created_at,
+            "updatedAt": self.updated_at,
+        }
+
+
+class MemoryJobStore:
+    """
+    Keeps jobs and their events in this process. Once more than `max_jobs` are stored,
+    the oldest finished ones are dropped.
+    """
+
+    def __init__(self, max_jobs: int = JOB_MAX_STORED) -> None:
+        self.max_jobs = max_jobs
+        self._jobs: "OrderedDict[str, Job]" = OrderedDict()
+        self._events: Dict[str, List[JobEvent]] = {}
+
+    async def create(self, job: Job) -> None:
+        self._jobs[job.id] = job
+        self._events[job.id] = []
+        if len(self._jobs) > self.max_jobs:
+            for job_id in [job_id for job_id, stored in self._jobs.items() if stored.status in FINISHED]:
+                del self._jobs[job_id]
+                del self._events[job_id]
+                if len(self._jobs) <= self.max_jobs:
+                    break
+
+    async def update(self, job: Job) -> None:
+        if job.id in self._jobs:
+            self._jobs[job.id] = job
+
+    async def unfinished(self) -> List[Job]:
+        return [job for job in self._jobs.values() if job.status not in FINISHED]
+
+    async def claim(self, job_id: str, owner: Optional[str], new_owner: str) -> bool:
+        job = self._jobs.get(job_id)
+        if job is None or job.owner != owner:
+            return False
+        job.owner = new_owner
+        return True
+
+    async def append_event(self, job_id: str, event: str, data: dict) -> int:
+        events = self._events.get(job_id)
+        if events is None:
+            return 0
+        events.append((len(events) + 1, event, data))
+        return len(events)
+
+    async def get(self, job_id: str) -> Optional[Job]:
+        return self._jobs.get(job_id)
+
+    async def events(self, job_id: str, after: int = 0) -> List[JobEvent]:
+        return self._events.get(job_id, [])[after:]
+
+    def close(self) -> None:
+        pass
+
+
+class SqliteJobStore:
+    """
+    Keeps jobs and their events in a SQLite file, so they survive restarts and every worker
+    process serving the app can answer status and event queries for any job. Once more than
+    `max_jobs` are stored, the oldest finished ones are deleted.
+    """
+
+    def __init__(self, path: str, max_jobs: int = JOB_MAX_STORED) -> None:
+        self.max_jobs = max_jobs
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute("PRAGMA busy_timeout=5000")
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS jobs "
+            "(id TEXT PRIMARY KEY, request TEXT NOT NULL, status TEXT NOT NULL, stage TEXT, http_status INTEGER, "
+            "result TEXT, created_at REAL NOT NULL, updated_at REAL NOT NULL)"
+        )
+        self._db.execute("CREATE INDEX IF NOT EXISTS jobs_created_at ON jobs (created_at)")
+        if "owner" not in [row[1] for row in self._db.execute("PRAGMA table_info(jobs)")]:
+            self._db.execute("ALTER TABLE jobs ADD COLUMN owner TEXT")
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS job_events "
+            "(job_id TEXT NOT NULL, sequence INTEGER NOT NULL, event TEXT NOT NULL, data TEXT NOT NULL, "
+            "PRIMARY KEY (job_id, sequence))"
+        )
+
+    def _create(self, job: Job) -> None:
+        with self._lock:
+            self._db.execute(
+                "INSERT INTO jobs (id, request, status, stage, http_status, result, created_at, updated_at, owner) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                (job.id, json.dumps(job.request), job.status, job.stage, job.http_status,
+                 json.dumps(job.result) if job.result is not None else None, job.created_at, job.updated_at,
+                 job.owner),
+            )
+            excess = self._db.execute("SELECT COUNT(*) FROM jobs").fetchone()[0] - self.max_jobs
+            if excess <= 0:
+                return
+            stale = [row[0] for row in self._db.execute(
+                "SELECT id FROM jobs WHERE status IN (?, ?) ORDER BY created_at LIMIT ?", (*FINISHED, excess)
+            )]
+            if stale:
+                placeholders = ", ".join("?" * len(stale))
+                self._db.execute(f"DELETE FROM job_events WHERE job_id IN ({placeholders})", stale)
+                self._db.execute(f"DELETE FROM jobs WHERE id IN ({placeholders})", stale)
+
+    def _update(self, job: Job) -> None:
+        with self._lock:
+            self._db.execute(
+                "UPDATE jobs SET status = ?, stage = ?, http_status = ?, result = ?, updated_at = ? WHERE id = ?",
+                (job.status, job.stage, job.http_status,
+                 json.dumps(job.result) if job.result is not None else None, job.updated_at, job.id),
+            )
+
+    def _unfinished(self) -> List[Job]:
+        with self._lock:
+            rows = self._db.execute(
+                f"SELECT {self._COLUMNS} FROM jobs WHERE status NOT IN (?, ?) ORDER BY created_at", FINISHED
+            ).fetchall()
+        return [self._job(row) for row in rows]
+
+    def _claim(self, job_id: str, owner: Optional[str], new_owner: str) -> bool:
+        with self._lock:
+            return self._db.execute(
+                "UPDATE jobs SET owner = ? WHERE id = ? AND owner IS ?", (new_owner, job_id, owner)
+            ).rowcount == 1
+
+    def _append_event(self, job_id: str, event: str, data: dict) -> int:
+        with self._lock:
+            self._db.execute("BEGIN IMMEDIATE")
+            try:
+                sequence = self._db.execute(
+                    "SELECT COALESCE(MAX(sequence), 0) + 1 FROM job_events WHERE job_id = ?", (job_id,)
+                ).fetchone()[0]
+                self._db.execute(
+                    "INSERT INTO job_events (job_id, sequence, event, data) VALUES (?, ?, ?, ?)",
+                    (job_id, sequence, event, json.dumps(data)),
+                )
+                self._db.execute("COMMIT")
+            except BaseException:
+                self._db.execute("ROLLBACK")
+                raise
+            return sequence
+
+    _COLUMNS = "id, request, status, stage, http_status, result, created_at, updated_at, owner"
+
+    @staticmethod
+    def _job(row) -> Job:
+        return Job(row[0], json.loads(row[1]), row[2], row[3], row[4],
+                   json.loads(row[5]) if row[5] is not None else None, row[6], row[7], row[8])
+
+    def _get(self, job_id: str) -> Optional[Job]:
+        with self._lock:
+            row = self._db.execute(f"SELECT {self._COLUMNS} FROM jobs WHERE id = ?", (job_id,)).fetchone()
+        return self._job(row) if row is not None else None
+
+    def _events(self, job_id: str, after: int) -> List[JobEvent]:
+        with self._lock:
+            rows = self._db.execute(
+                "SELECT sequence, event, data FROM job_events WHERE job_id = ? AND sequence > ? ORDER BY sequence",
+                (job_id, after),
+            ).fetchall()
+        return [(sequence, event, json.loads(data)) for sequence, event, data in rows]
+
+    async def create(self, job: Job) -> None:
+        await asyncio.to_thread(self._create, job)
+
+    async def update(self, job: Job) -> None:
+        await asyncio.to_thread(self._update, job)
+
+    async def append_event(self, job_id: str, event: str, data: dict) -> int:
+        return await asyncio.to_thread(self._append_event, job_id, event, data)
+
+    async def unfinished(self) -> List[Job]:
+        return await asyncio.to_thread(self._unfinished)
+
+    async def claim(self, job_id: str, owner: Optional[str], new_owner: str) -> bool:
+        return await asyncio.to_thread(self._claim, job_id, owner, new_owner)
+
+    async def get(self, job_id: str) -> Optional[Job]:
+        return await asyncio.to_thread(self._get, job_id)
+
+    async def events(self, job_id: str, after: int = 0) -> List[JobEvent]:
+        return await asyncio.to_thread(self._events, job_id, after)
+
+    def close(self) -> None:
+        with self._lock:
+            self._db.close()
+
+
+class JobManager:
+    """
+    Runs airdrop requests in the background: `submit` stores the job and returns at once,
+    and up to `workers` jobs run concurrently through `runner`.
+
+    Every job records an event stream: `status` when a worker picks it up, one `stage` per
+    completed stage with its details, and a final `result` carrying the response the
+    synchronous endpoint would have returned. When `queue_size` jobs are already waiting,
+    `submit` raises `JobQueueFull`.
+
+    Each start gets a new `owner`, recorded on the jobs it queues. Starting also takes over
+    the unfinished jobs of owners that no longer run, e.g. before a restart: waiting ones are
+    queued again, running ones failed, since part of their airdrop may already be sent.
+    """
+
+    def __init__(
+            self,
+            runner: JobRunner,
+            store=None,
+            workers: int = JOB_WORKERS,
+            queue_size: int = JOB_QUEUE_SIZE,
+            poll_interval: float = JOB_EVENTS_POLL_IN_SEC,
+    ) -> None:
+        self.runner = runner
+        self.store = store if store is not None else MemoryJobStore()
+        self.workers = max(1, workers)
+        self.queue_size = queue_size
+        self.poll_interval = poll_interval
+        self._queue: Optional[asyncio.Queue] = None
+        self._tasks: List[asyncio.Task] = []
+        self._new_events: Optional[asyncio.Condition] = None
+        self.owner: Optional[str] = None
+
+    async def start(self) -> None:
+        self._queue = asyncio.Queue(maxsize=self.queue_size)
+        self._new_events = asyncio.Condition()
+        self.owner = f"{os.getpid()}:{uuid.uuid4().hex}"
+        _live_owners.add(self.owner)
+        await self._recover()
+        self._tasks = [asyncio.create_task(self._work()) for _ in range(self.workers)]
+
+    async def _recover(self) -> None:
+        for job in await self.store.unfinished():
+            if owner_is_alive(job.owner) or not await self.store.claim(job.id, job.owner, self.owner):
+                continue
+            job.owner = self.owner
+            if job.status == QUEUED and not self._queue.full():
+                logger.info(f"Queueing airdrop job {job.id} again, its worker stopped before running it")
+                self._queue.put_nowait(job)
+                jobs_queued.inc()
+                continue
+            logger.warning(f"Airdrop job {job.id} was {job.status} when its worker stopped")
+            error = "The service stopped while the job was running" if job.status == RUNNING else \
+                "The service stopped before the job ran, and too many jobs are waiting to queue it again"
+            await self._finish(job, {"error": error}, 500)
+
+    @property
+    def queued(self) -> int:
+        return self._queue.qsize() if self._queue is not None else 0
+
+    async def submit(self, request: dict) -> Job:
+        if self._queue is None:
+            await self.start()
+        if self._queue.full():
+            raise JobQueueFull(f"Airdrop job queue is full ({self.queue_size} waiting)")
+        now = time.time()
+        job = Job(uuid.uuid4().hex, request, created_at=now, updated_at=now, owner=self.owner)
+        await self.store.create(job)
+        self._queue.put_nowait(job)
+        jobs_queued.inc()
+        return job
+
+    async def get(self, job_id: str) -> Optional[Job]:
+        return await self.store.get(job_id)
+
+    async def _emit(self, job: Job, event: str, data: dict) -> None:
+        job.updated_at = time.time()
+        # The event goes first: a job read back as finished always has its `result` event
+        await self.store.append_event(job.id, event, data)
+        await self.store.update(job)
+        async with self._new_events:
+            self._new_events.notify_all()
+
+    async def _work(self) -> None:
+        while True:
+            job = await self._queue.get()
+            jobs_queued.dec()
+            try:
+                await self._run(job)
+            except Exception as e:
+                logger.exception(f"Could not record the outcome of airdrop job {job.id}: {e}")
+
+    async def _run(self, job: Job) -> None:
+        job.status = RUNNING
+        await self._emit(job, "status", {"status": RUNNING})
+
+        async def progress(stage: str, details: dict) -> None:
+            job.stage = stage
+            await self._emit(job, "stage", {"stage": stage, **details})
+
+        try:
+            body, http_status, _ = await self.runner(job.request, progress)
+        except Exception as e:
+            logger.exception(f"Airdrop job {job.id} failed: {e}")
+            body, http_status = {"error": f"Unexpected error: {str(e)}"}, 500
+        await self._finish(job, body, http_status)
+
+    async def _finish(self, job: Job, body: dict, http_status: int) -> None:
+        job.status = SUCCEEDED if http_status < 400 else FAILED
+        job.http_status, job.result = http_status, body
+        await self._emit(job, "result", {"status": job.status, "httpStatus": http_status, "result": body})
+        jobs_total.inc(status=job.status)
+        job_seconds.observe(time.time() - job.created_at)
+
+    async def events(self, job_id: str, after: int = 0) -> AsyncIterator[Optional[JobEvent]]:
+        """
+        Yields the events of `job_id` recorded after sequence `after`, then new ones as they
+        are recorded, until the `result` event. Yields `None` after `poll_interval` seconds
+        without events, so callers can keep their connection alive. The store is polled as
+        well, which picks up jobs run by another process sharing it.
+        """
+        while True:
+            events = await self.store.events(job_id, after)
+            for event in events:
+                after = event[0]
+                yield event
+                if event[1] == "result":
+                    return
+            if not events:
+                job = await self.store.get(job_id)
+                if job is None:
+                    return
+                if job.status in FINISHED:
+                    # Its last events may have been recorded between the two reads
+                    for event in await self.store.events(job_id, after):
+                        yield event
+                    return
+            if not await self._wait_for_events():
+                yield None
+
+    async def _wait_for_events(self) -> bool:
+        if self._new_events is None:
+            await asyncio.sleep(self.poll_interval)
+            return False
+        try:
+            async with self._new_events:
+                await asyncio.wait_for(self._new_events.wait(), self.poll_interval)
+            return True
+        except asyncio.TimeoutError:
+            return False
+
+    def stats(self) -> dict:
+        return {"queued": self.queued, "workers": self.workers}
+
+    async def close(self) -> None:
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+        _live_owners.discard(self.owner)
+        self.store.close()
+        logger.info("Airdrop job workers stopped")
@@ -1,16 +1,50 @@
+import atexit
+import itertools
 import logging
+import os
+import queue
+from logging.handlers import QueueHandler, QueueListener
+
+LOG_LEVEL = os.getenv("LOG_LEVEL", "DEBUG").upper()
+# Payloads longer than this are cut when logged
+LOG_PAYLOAD_MAX_CHARS = int(os.getenv("LOG_PAYLOAD_MAX_CHARS", "2000"))
+# Only one in this many payloads over the limit is logged at all
+LOG_PAYLOAD_SAMPLE_EVERY = int(os.getenv("LOG_PAYLOAD_SAMPLE_EVERY", "100"))
+
+# Records are handed to a background thread that does the formatting and the writing,
+# so logging from the event loop never blocks on stdout or stderr
+_log_queue = queue.SimpleQueue()
+_stream_handler = logging.StreamHandler()
+_stream_handler.setFormatter(logging.Formatter("[%(asctime)s] - [%(levelname)s] - %(message)s"))
+_listener = QueueListener(_log_queue, _stream_handler, respect_handler_level=True)
+_listener.start()
+atexit.register(_listener.stop)
+
+_large_payloads = itertools.count()
 
 
 def get_logger(name):
     logger = logging.getLogger(name)
     if not logger.handlers:  # Avoid adding multiple handlers to the same logger
-        logger.setLevel(logging.DEBUG)
-        ch = logging.StreamHandler()
-        ch.setFormatter(
-            logging.Formatter("[%(asctime)s] - [%(levelname)s] - %(message)s")
-        )
-        logger.addHandler(ch)
+        logger.setLevel(LOG_LEVEL)
+        logger.addHandler(QueueHandler(_log_queue))
     return logger
 
 
 logger = get_logger(__name__)
+
+
+def log_payload(message: str, payload, level: int = logging.DEBUG) -> None:
+    """
+    Logs `message` followed by `payload`. Payloads over `LOG_PAYLOAD_MAX_CHARS` are sampled,
+    one in `LOG_PAYLOAD_SAMPLE_EVERY`, and cut to the limit; nothing is rendered when the
+    level is disabled.
+    """
+    if not logger.isEnabledFor(level):
+        return
+    text = str(payload)
+    if len(text) > LOG_PAYLOAD_MAX_CHARS:
+        if next(_large_payloads) % LOG_PAYLOAD_SAMPLE_EVERY:
+            return
+        text = f"{text[:LOG_PAYLOAD_MAX_CHARS]}... ({len(text)} chars, sampled 1/{LOG_PAYLOAD_SAMPLE_EVERY})"
+    logger.log(level, f"{message} {text}")
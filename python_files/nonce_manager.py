@@ -0,0 +1,336 @@
+import asyncio
+import json
+import os
+import sqlite3
+import threading
+import time
+from contextlib import asynccontextmanager, contextmanager
+from pathlib import Path
+from typing import AsyncIterator, Awaitable, Callable, Dict, Iterator, Optional, Tuple
+
+from python_files.account_cache import account_state_cache
+from python_files.config import NONCE_DB_PATH, NONCE_LEASE_TTL_IN_SEC, NONCE_STORE_PATH, SIGNER_PEM_PATH
+from python_files.gateway_client import gateway_client
+from python_files.logger import logger
+
+
+class NonceStore:
+    """
+    Small JSON file remembering the next free nonce per sender across restarts.
+    Writes go to a temporary file first and are moved into place atomically.
+    """
+
+    def __init__(self, path: Path) -> None:
+        self.path = Path(path)
+
+    def load(self) -> Dict[str, int]:
+        try:
+            return {sender: int(nonce) for sender, nonce in json.loads(self.path.read_text()).items()}
+        except FileNotFoundError:
+            return {}
+        except (ValueError, AttributeError):
+            logger.warning(f"Ignoring unreadable nonce store at {self.path}")
+            return {}
+
+    def save(self, nonces: Dict[str, int]) -> None:
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        temporary_path = self.path.with_suffix(self.path.suffix + ".tmp")
+        temporary_path.write_text(json.dumps(nonces))
+        os.replace(temporary_path, self.path)
+
+
+def first_free_nonce(reserved: Optional[int], lease_expires: float, observed: Optional[int],
+                     lease_ttl: Optional[float], now: float) -> Optional[int]:
+    """
+    The first nonce to hand out given the next one already reserved and the one observed on
+    chain. The reservation wins unless its lease lapsed while the chain stayed below it, in
+    which case the unused range is given out again from the observed nonce.
+    """
+    if reserved is None:
+        return observed
+    if observed is None:
+        return reserved
+    if lease_ttl is not None and now >= lease_expires and observed < reserved:
+        return observed
+    return max(reserved, observed)
+
+
+class SqliteNonceStore:
+    """
+    Next free nonce and lease per sender in a SQLite file shared by every worker process
+    serving the app. Each change reads and writes a sender's row in one write transaction, so
+    two processes never hand out the same nonce. Leases expire on the wall clock, the only
+    clock processes share.
+    """
+
+    def __init__(self, path: str) -> None:
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute("PRAGMA busy_timeout=5000")
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS sender_nonces "
+            "(sender TEXT PRIMARY KEY, next_nonce INTEGER NOT NULL, lease_expires REAL NOT NULL)"
+        )
+
+    @contextmanager
+    def _transaction(self) -> Iterator[sqlite3.Connection]:
+        with self._lock:
+            self._db.execute("BEGIN IMMEDIATE")
+            try:
+                yield self._db
+                self._db.execute("COMMIT")
+            except BaseException:
+                self._db.execute("ROLLBACK")
+                raise
+
+    @staticmethod
+    def _row(db: sqlite3.Connection, sender: str) -> Tuple[Optional[int], float]:
+        row = db.execute("SELECT next_nonce, lease_expires FROM sender_nonces WHERE sender = ?", (sender,)).fetchone()
+        return (row[0], row[1]) if row else (None, 0.0)
+
+    @staticmethod
+    def _write(db: sqlite3.Connection, sender: str, next_nonce: int, lease_expires: float) -> None:
+        db.execute(
+            "INSERT INTO sender_nonces (sender, next_nonce, lease_expires) VALUES (?, ?, ?) "
+            "ON CONFLICT (sender) DO UPDATE SET next_nonce = excluded.next_nonce, lease_expires = excluded.lease_expires",
+            (sender, next_nonce, lease_expires),
+        )
+
+    def reserve(self, sender: str, count: int, observed: Optional[int],
+                lease_ttl: Optional[float]) -> Optional[Tuple[int, Optional[int]]]:
+        """
+        Reserves `count` nonces from the first free one. Returns that nonce with the next one
+        reserved before, or None for a sender neither stored nor observed.
+        """
+        now = time.time()
+        with self._transaction() as db:
+            reserved, lease_expires = self._row(db, sender)
+            next_nonce = first_free_nonce(reserved, lease_expires, observed, lease_ttl, now)
+            if next_nonce is None:
+                return None
+            self._write(db, sender, next_nonce + count, now + lease_ttl if lease_ttl is not None else 0.0)
+        return next_nonce, reserved
+
+    def rewind(self, sender: str, released: Dict[int, int]) -> Tuple[Optional[int], Optional[int]]:
+        """
+        Moves the sender's next nonce back through the `released` ranges (end -> start) that
+        end at it, removing them, and returns the next nonce before and after.
+        """
+        with self._transaction() as db:
+            before, lease_expires = self._row(db, sender)
+            after = before
+            while after in released:
+                after = released.pop(after)
+            if after != before:
+                self._write(db, sender, after, lease_expires)
+        return before, after
+
+    def set(self, sender: str, next_nonce: int) -> None:
+        with self._transaction() as db:
+            self._write(db, sender, next_nonce, 0.0)
+
+    def close(self) -> None:
+        with self._lock:
+            self._db.close()
+
+
+async def fetch_nonce_from_gateway(sender: str) -> int:
+    # Resyncs must see the chain, not a cached account
+    account_state_cache.invalidate_address(sender)
+    account = await gateway_client.get_account(sender)
+    return account.nonce
+
+
+class NonceManager:
+    """
+    Hands out consecutive nonces per sender, so concurrent airdrops from the same
+    sender never reuse a nonce.
+
+    A sender is seeded lazily: from the store if it knows the sender, otherwise from the
+    nonce observed by the caller or fetched from the gateway. Call `release` with nonces the
+    node rejected so they are handed out again, before any new nonce, or `resync` to start
+    again from the chain's view once nothing reserved is still on its way.
+
+    With a `lease_ttl`, reserved nonces are only held that long after the sender's last
+    allocation: if the chain has not moved past them by then, the next allocation starts
+    again from the observed nonce. That is for transactions the service hands out without
+    broadcasting them, which the client may never send. Without it, reservations are kept
+    until `resync`.
+
+    With a `shared` store, the next nonce and lease of every sender live there instead, so
+    several processes can allocate for the same sender; `store` is then not needed.
+    """
+
+    def __init__(
+            self,
+            fetch_nonce: Callable[[str], Awaitable[int]] = fetch_nonce_from_gateway,
+            store: Optional[NonceStore] = None,
+            lease_ttl: Optional[float] = None,
+            shared: Optional[SqliteNonceStore] = None,
+    ) -> None:
+        self.fetch_nonce = fetch_nonce
+        self.store = store
+        self.shared = shared
+        self.lease_ttl = lease_ttl
+        self._next_nonces: Dict[str, int] = store.load() if store else {}
+        # Leases are not persisted: after a restart, reservations of unsigned mode count as lapsed
+        self._lease_expires: Dict[str, float] = {}
+        # Released ranges that could not be handed out again yet, per sender: end -> start
+        self._released: Dict[str, Dict[int, int]] = {}
+        self._locks: Dict[str, asyncio.Lock] = {}
+        self._lock_users: Dict[str, int] = {}
+
+    @asynccontextmanager
+    async def _locked(self, sender: str) -> AsyncIterator[None]:
+        """
+        Holds the sender's lock; locks exist only while someone holds or waits for them.
+        """
+        lock = self._locks.setdefault(sender, asyncio.Lock())
+        self._lock_users[sender] = self._lock_users.get(sender, 0) + 1
+        try:
+            async with lock:
+                yield
+        finally:
+            self._lock_users[sender] -= 1
+            if not self._lock_users[sender]:
+                del self._lock_users[sender]
+                del self._locks[sender]
+
+    async def _persist(self) -> None:
+        if self.store is not None:
+            await asyncio.to_thread(self.store.save, dict(self._next_nonces))
+
+    async def allocate(self, sender: str, count: int = 1, observed_nonce: Optional[int] = None) -> int:
+        """
+        Reserves `count` consecutive nonces for `sender` and returns the first one.
+
+        `observed_nonce` is the account nonce the caller already read from the chain; it seeds
+        an unknown sender without another round-trip and moves a known sender forward when
+        transactions were sent from elsewhere.
+        """
+        if count < 1:
+            raise ValueError(f"Cannot allocate {count} nonces")
+
+        async with self._locked(sender):
+            if observed_nonce is not None and sender in self._released:
+                # Gaps the chain has moved past were filled some other way
+                self._set_released(sender, {
+                    end: start for end, start in self._released[sender].items() if start >= observed_nonce
+                })
+            next_nonce = self._take_released(sender, count)
+            if next_nonce is not None:
+                logger.info(f"Allocated released nonces {next_nonce}..{next_nonce + count - 1} for {sender}")
+                return next_nonce
+
+            if self.shared is not None:
+                next_nonce, reserved = await self._reserve_shared(sender, count, observed_nonce)
+            else:
+                next_nonce, reserved = await self._reserve(sender, count, observed_nonce)
+            if reserved is not None and next_nonce < reserved:
+                logger.info(f"Nonces {next_nonce}..{reserved - 1} of {sender} were never used; handing them out again")
+                self._released.pop(sender, None)
+
+            self._next_nonces[sender] = next_nonce + count
+            await self._persist()
+
+        logger.info(f"Allocated nonces {next_nonce}..{next_nonce + count - 1} for {sender}")
+        return next_nonce
+
+    def _set_released(self, sender: str, released: Dict[int, int]) -> None:
+        if released:
+            self._released[sender] = released
+        else:
+            self._released.pop(sender, None)
+
+    def _take_released(self, sender: str, count: int) -> Optional[int]:
+        """
+        Takes `count` nonces from the lowest released gap large enough for them, if any. Gaps
+        stall every transaction above them, so they are handed out before new nonces.
+        """
+        released = self._released.get(sender, {})
+        for end, start in sorted(released.items(), key=lambda gap: gap[1]):
+            if end - start >= count:
+                del released[end]
+                if start + count < end:
+                    released[end] = start + count
+                self._set_released(sender, released)
+                return start
+        return None
+
+    async def _reserve(self, sender: str, count: int, observed_nonce: Optional[int]) -> Tuple[int, Optional[int]]:
+        now = time.monotonic()
+        reserved = self._next_nonces.get(sender)
+        next_nonce = first_free_nonce(reserved, self._lease_expires.get(sender, 0.0), observed_nonce, self.lease_ttl, now)
+        if next_nonce is None:
+            next_nonce = await self.fetch_nonce(sender)
+        if self.lease_ttl is not None:
+            self._lease_expires[sender] = now + self.lease_ttl
+        return next_nonce, reserved
+
+    async def _reserve_shared(self, sender: str, count: int,
+                              observed_nonce: Optional[int]) -> Tuple[int, Optional[int]]:
+        reserved = await asyncio.to_thread(self.shared.reserve, sender, count, observed_nonce, self.lease_ttl)
+        if reserved is None:
+            observed_nonce = await self.fetch_nonce(sender)
+            reserved = await asyncio.to_thread(self.shared.reserve, sender, count, observed_nonce, self.lease_ttl)
+        return reserved
+
+    async def release(self, sender: str, start: int, end: int) -> None:
+        """
+        Gives the reserved nonces `start`..`end - 1` back, e.g. because the node rejected their
+        transactions. At the top of the sender's reservations, the next nonce moves back to
+        `start`. A range below reserved nonces still in use is a gap the chain cannot move
+        past, so the next allocations that fit into it are taken from it; it also joins the
+        top once the nonces above it are released.
+        """
+        if start >= end:
+            return
+        async with self._locked(sender):
+            released = self._released.setdefault(sender, {})
+            released[end] = start
+            if self.shared is not None:
+                before, next_nonce = await asyncio.to_thread(self.shared.rewind, sender, released)
+            else:
+                before = next_nonce = self._next_nonces.get(sender)
+                while next_nonce in released:
+                    next_nonce = released.pop(next_nonce)
+            self._set_released(sender, released)
+            if next_nonce != before:
+                self._next_nonces[sender] = next_nonce
+                await self._persist()
+                logger.warning(f"Nonces from {next_nonce} of {sender} are handed out again")
+            else:
+                logger.warning(f"Nonces {start}..{end - 1} of {sender} were released below nonces still in use; "
+                               f"they are handed out first")
+
+    async def resync(self, sender: str) -> int:
+        """
+        Re-reads the sender's nonce from the chain and makes it the next one handed out.
+        Nonces reserved above the chain's are handed out again, so only resync once their
+        transactions were all either executed or dropped.
+        """
+        async with self._locked(sender):
+            nonce = await self.fetch_nonce(sender)
+            if self.shared is not None:
+                await asyncio.to_thread(self.shared.set, sender, nonce)
+            self._next_nonces[sender] = nonce
+            self._released.pop(sender, None)
+            await self._persist()
+
+        logger.warning(f"Resynced nonce for {sender} to {nonce}")
+        return nonce
+
+    def peek(self, sender: str) -> Optional[int]:
+        """
+        The next nonce this process would hand out, as of its last allocation.
+        """
+        return self._next_nonces.get(sender)
+
+
+nonce_manager = NonceManager(
+    store=NonceStore(Path(NONCE_STORE_PATH)) if NONCE_STORE_PATH and not NONCE_DB_PATH else None,
+    # In service mode every reserved nonce is broadcast by the service itself, and rejections are released
+    lease_ttl=None if SIGNER_PEM_PATH else NONCE_LEASE_TTL_IN_SEC,
+    shared=SqliteNonceStore(NONCE_DB_PATH) if NONCE_DB_PATH else None,
+)
@@ -0,0 +1,152 @@
+import json
+import mmap
+import threading
+from collections import OrderedDict, deque
+from pathlib import Path
+from typing import List, Optional
+
+from config import (
+    SIMULATOR_LOG_BUFFER_LINES,
+    SIMULATOR_LOG_MAX_SELECTIONS,
+    SIMULATOR_LOG_SPILL_PATH,
+    SIMULATOR_LOG_SPILL_SIZE,
+)
+
+SELECTION_PREFIX = "selection#"
+
+
+def parse_selection_line(line: str) -> Optional[dict]:
+    """
+    Parses a txcache `selection#<n>: {"hash": ..., "nonce": ..., ...}` line, or returns None.
+    """
+    if not line.startswith(SELECTION_PREFIX):
+        return None
+    start = line.find("{")
+    if start < 0:
+        return None
+    try:
+        selection = json.loads(line[start:])
+    except json.JSONDecodeError:
+        return None
+    if not isinstance(selection, dict) or "hash" not in selection:
+        return None
+    return selection
+
+
+class LogSpillFile:
+    """
+    Fixed-size memory-mapped file used as a byte ring for raw log lines.
+    When a line does not fit before the end, writing wraps around to the start,
+    so the file never grows and always holds the most recent output.
+    """
+
+    def __init__(self, path: Path, size: int) -> None:
+        self.path = Path(path)
+        self.size = size
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        with open(self.path, "w+b") as file:
+            file.truncate(size)
+            self._mmap = mmap.mmap(file.fileno(), size)
+        self._offset = 0
+        self._wrapped = False
+
+    def write(self, line: str) -> None:
+        data = (line + "\n").encode()[-self.size:]
+        end = self._offset + len(data)
+        if end > self.size:
+            # Blank the tail so it is not read back as a torn line
+            self._mmap[self._offset:] = bytes(self.size - self._offset)
+            self._offset, self._wrapped = 0, True
+            end = len(data)
+        self._mmap[self._offset:end] = data
+        self._offset = end
+
+    def lines(self) -> List[str]:
+        if self._wrapped:
+            raw = self._mmap[self._offset:] + self._mmap[:self._offset]
+        else:
+            raw = self._mmap[:self._offset]
+        lines = raw.replace(b"\0", b"").decode(errors="replace").split("\n")
+        if self._wrapped:
+            # The oldest line was partly overwritten
+            lines = lines[1:]
+        return [line for line in lines if line]
+
+    def close(self) -> None:
+        self._mmap.close()
+
+
+class SimulatorLogStore:
+    """
+    Bounded store for the chain simulator's output.
+
+    `selection#` lines are parsed once, when ingested, and indexed by transaction hash,
+    keeping the first selection of each hash and at most `max_selections` hashes. Raw lines
+    go to a ring buffer of `max_lines`, and also to a memory-mapped ring file when a spill
+    path is given. Waiting for a selection blocks on a condition variable that ingestion
+    notifies, instead of polling.
+    """
+
+    def __init__(
+            self,
+            max_lines: int = SIMULATOR_LOG_BUFFER_LINES,
+            max_selections: int = SIMULATOR_LOG_MAX_SELECTIONS,
+            spill_path: Optional[str] = SIMULATOR_LOG_SPILL_PATH,
+            spill_size: int = SIMULATOR_LOG_SPILL_SIZE,
+    ) -> None:
+        self.max_selections = max_selections
+        self.ingested = 0
+        self._lines = deque(maxlen=max_lines)
+        self._selections: "OrderedDict[str, dict]" = OrderedDict()
+        self._spill = LogSpillFile(Path(spill_path), spill_size) if spill_path else None
+        self._condition = threading.Condition()
+
+    def ingest(self, line: str) -> None:
+        line = line.strip()
+        if not line:
+            return
+        selection = parse_selection_line(line)
+        with self._condition:
+            self.ingested += 1
+            self._lines.append(line)
+            if self._spill is not None:
+                self._spill.write(line)
+            if selection is not None and selection["hash"] not in self._selections:
+                self._selections[selection["hash"]] = selection
+                while len(self._selections) > self.max_selections:
+                    self._selections.popitem(last=False)
+                self._condition.notify_all()
+
+    def get_selection(self, tx_hash: str) -> Optional[dict]:
+        with self._condition:
+            return self._selections.get(tx_hash)
+
+    def wait_for_selection(self, tx_hash: str, timeout: float) -> dict:
+        """
+        Returns the first selection logged for `tx_hash`, waiting up to `timeout` seconds for it.
+        """
+        with self._condition:
+            if not self._condition.wait_for(lambda: tx_hash in self._selections, timeout):
+                raise TimeoutError(
+                    f"Transaction with hash {tx_hash} not found in logs within {timeout} seconds."
+                )
+            return self._selections[tx_hash]
+
+    def recent_lines(self, count: Optional[int] = None) -> List[str]:
+        with self._condition:
+            lines = list(self._lines)
+        return lines if count is None else lines[-count:]
+
+    def spilled_lines(self) -> List[str]:
+        with self._condition:
+            return self._spill.lines() if self._spill is not None else []
+
+    def stats(self) -> dict:
+        with self._condition:
+            return {"ingested": self.ingested, "buffered": len(self._lines), "selections": len(self._selections)}
+
+    def close(self) -> None:
+        with self._condition:
+            if self._spill is not None:
+                self._spill.close()
+                self._spill = None
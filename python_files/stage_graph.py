@@ -0,0 +1,83 @@
+import asyncio
+from dataclasses import dataclass
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Sequence
+
+from python_files.metrics import span
+
+
+class StageError(Exception):
+    def __init__(self, stage: str, message: str) -> None:
+        super().__init__(message)
+        self.stage = stage
+
+
+class StageTimeout(StageError):
+    pass
+
+
+@dataclass
+class Stage:
+    """
+    One step of a request: `run` is called with the results of `depends_on` as keyword
+    arguments, and is cancelled after `timeout` seconds. A stage that never awaits (pure
+    CPU work) cannot be interrupted, so leave its timeout at None.
+    """
+    name: str
+    run: Callable[..., Awaitable[Any]]
+    depends_on: Sequence[str] = ()
+    timeout: Optional[float] = None
+
+
+async def run_stages(stages: List[Stage]) -> Dict[str, Any]:
+    """
+    Runs `stages` as a dependency graph and returns their results by name. Every stage starts
+    as soon as the stages it depends on have finished, so independent stages overlap and the
+    total time is that of the longest path instead of the sum. Each stage is timed as a span.
+
+    Stages must be listed after the stages they depend on. When a stage fails or times out,
+    the stages still running are cancelled and its exception is raised.
+    """
+    tasks: Dict[str, asyncio.Task] = {}
+
+    async def run_stage(stage: Stage) -> Any:
+        inputs = {name: await tasks[name] for name in stage.depends_on}
+        with span(stage.name):
+            if stage.timeout is None:
+                return await stage.run(**inputs)
+            # A TimeoutError raised inside the stage, e.g. by a gateway call, is not the stage's own timeout
+            run = asyncio.ensure_future(stage.run(**inputs))
+            expired = False
+
+            def expire() -> None:
+                nonlocal expired
+                expired = True
+                run.cancel()
+
+            timer = asyncio.get_running_loop().call_later(stage.timeout, expire)
+            try:
+                return await run
+            except asyncio.CancelledError:
+                if expired:
+                    raise StageTimeout(stage.name, f"Stage {stage.name} did not finish within {stage.timeout:g} seconds") from None
+                raise
+            finally:
+                timer.cancel()
+
+    listed = set()
+    for stage in stages:
+        unknown = [name for name in stage.depends_on if name not in listed]
+        if unknown:
+            raise ValueError(f"Stage {stage.name} depends on {', '.join(unknown)}, which must be listed before it")
+        listed.add(stage.name)
+
+    for stage in stages:
+        tasks[stage.name] = asyncio.ensure_future(run_stage(stage))
+
+    try:
+        await asyncio.gather(*tasks.values())
+    except BaseException:
+        for task in tasks.values():
+            task.cancel()
+        await asyncio.gather(*tasks.values(), return_exceptions=True)
+        raise
+    return {name: task.result() for name, task in tasks.items()}
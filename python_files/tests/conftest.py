@@ -0,0 +1,25 @@
+from contextlib import asynccontextmanager
+
+import pytest
+
+from python_files.fake_gateway import FakeGateway, run_fake_gateway
+
+
+@pytest.fixture
+def airdrop_service(monkeypatch):
+    """
+    Returns `serve(gateway)`: serves `gateway` as the service's gateway and yields a test
+    client of the app, started and stopped like in production. Use it within one event loop.
+    """
+    # config reads GATEWAY_URL before any test runs, so the shared client is pointed at the fake instead
+    from main import app
+    from python_files.gateway_client import gateway_client
+
+    @asynccontextmanager
+    async def serve(gateway: FakeGateway):
+        async with run_fake_gateway(gateway) as url:
+            monkeypatch.setattr(gateway_client, "host", url)
+            async with app.test_app() as test_app:
+                yield test_app.test_client()
+
+    return serve
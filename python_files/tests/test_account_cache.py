@@ -0,0 +1,120 @@
+import asyncio
+import os
+
+import pytest
+
+from python_files.account_cache import AccountStateCache, shard_of
+from python_files.fake_gateway import FakeGateway, run_fake_gateway
+from python_files.gateway_client import GatewayClient, GatewayUnavailable
+from utils.bech32_codec import encode_bech32_addresses
+
+ADDRESSES = encode_bech32_addresses(os.urandom(32 * 16))
+
+
+class FakeClock:
+    def __init__(self) -> None:
+        self.now = 0.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+def _same_shard_pair():
+    by_shard = {}
+    for address in ADDRESSES:
+        by_shard.setdefault(shard_of(address), []).append(address)
+    return next(addresses for addresses in by_shard.values() if len(addresses) > 1)[:2]
+
+
+def test_entries_expire_after_the_ttl():
+    clock = FakeClock()
+    cache = AccountStateCache(ttl=2, clock=clock)
+    cache.put(("account", ADDRESSES[0]), "state", block_nonce=10)
+
+    clock.now = 1.9
+    assert cache.get(("account", ADDRESSES[0])) == "state"
+    clock.now = 2.0
+    assert cache.get(("account", ADDRESSES[0])) is None
+
+
+def test_a_newer_block_of_the_shard_invalidates_its_entries():
+    cache = AccountStateCache(ttl=60)
+    address = ADDRESSES[0]
+    cache.put(("account", address), "state", block_nonce=10)
+
+    cache.observe_block(10, shard_of(address))
+    assert cache.get(("account", address)) == "state"
+    cache.observe_block(11, shard_of(address) + 1)
+    assert cache.get(("account", address)) == "state"
+    cache.observe_block(11, shard_of(address))
+    assert cache.get(("account", address)) is None
+
+
+def test_least_recently_used_entries_are_evicted():
+    cache = AccountStateCache(max_entries=2, ttl=60)
+    cache.put(("account", ADDRESSES[0]), 0)
+    cache.put(("account", ADDRESSES[1]), 1)
+    cache.get(("account", ADDRESSES[0]))
+    cache.put(("account", ADDRESSES[2]), 2)
+
+    assert cache.get(("account", ADDRESSES[0])) == 0
+    assert cache.get(("account", ADDRESSES[1])) is None
+    assert cache.stats()["evictions"] == 1
+
+
+def test_invalidate_address_drops_every_kind():
+    cache = AccountStateCache(ttl=60)
+    cache.put(("account", ADDRESSES[0]), "account")
+    cache.put(("esdts", ADDRESSES[0]), "esdts")
+    cache.put(("account", ADDRESSES[1]), "other")
+
+    cache.invalidate_address(ADDRESSES[0])
+    assert cache.get(("account", ADDRESSES[0])) is None
+    assert cache.get(("esdts", ADDRESSES[0])) is None
+    assert cache.get(("account", ADDRESSES[1])) == "other"
+
+
+def test_gateway_lookups_are_cached_until_a_newer_block_is_seen():
+    first, second = _same_shard_pair()
+    gateway = FakeGateway(block_nonce=5)
+    gateway.set_account(first, nonce=3)
+
+    async def run():
+        cache = AccountStateCache(ttl=60)
+        async with run_fake_gateway(gateway) as url:
+            client = GatewayClient(url, max_retries=0, cache=cache)
+            try:
+                accounts = await asyncio.gather(*(client.get_account(first) for _ in range(10)))
+                assert {account.nonce for account in accounts} == {3}
+                assert gateway.request_count == 1
+
+                # A read of another account in the same shard reveals the new block
+                gateway.set_account(first, nonce=4)
+                gateway.generate_blocks()
+                assert (await client.get_account(first)).nonce == 3
+                await client.get_account(second)
+                assert (await client.get_account(first)).nonce == 4
+                assert gateway.request_count == 3
+            finally:
+                await client.close()
+
+    asyncio.run(run())
+
+
+def test_failed_fetches_are_not_cached():
+    gateway = FakeGateway()
+
+    async def run():
+        cache = AccountStateCache(ttl=60)
+        async with run_fake_gateway(gateway) as url:
+            client = GatewayClient(url, max_retries=0, cache=cache)
+            try:
+                gateway.fail_next(1)
+                with pytest.raises(GatewayUnavailable):
+                    await client.get_account(ADDRESSES[0])
+                assert (await client.get_account(ADDRESSES[0])).nonce == 0
+                assert cache.stats()["entries"] == 1
+            finally:
+                await client.close()
+
+    asyncio.run(run())
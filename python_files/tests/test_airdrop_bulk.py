@@ -0,0 +1,88 @@
+import asyncio
+import json
+import os
+
+from python_files.fake_gateway import FakeGateway
+from utils.bech32_codec import encode_bech32_addresses
+
+TOKEN = "TKN-1a2b3c"
+
+
+def _airdrop(count: int):
+    sender, contract, service, *receivers = encode_bech32_addresses(os.urandom(32 * (3 + count)))
+    query = {"Sender": sender, "TokenIdentifier": TOKEN, "ContractAddress": contract,
+             "ServiceAddress": service, "ChainId": "D"}
+    return sender, query, receivers
+
+
+def _post(airdrop_service, gateway: FakeGateway, query: dict, upload: str, content_type: str = "text/csv"):
+    async def scenario():
+        async with airdrop_service(gateway) as client:
+            response = await client.post("/airdrop/bulk", query_string=query, data=upload,
+                                         headers={"Content-Type": content_type})
+            return response.status_code, await response.get_data(as_text=True)
+
+    return asyncio.run(scenario())
+
+
+def test_csv_upload_streams_transactions_rejected_rows_and_a_summary(airdrop_service):
+    sender, query, receivers = _airdrop(1000)
+    gateway = FakeGateway()
+    gateway.set_account(sender, nonce=42, esdts={TOKEN: 10 ** 20})
+    bad_checksum = receivers[1][:-1] + ("q" if receivers[1][-1] != "q" else "p")
+    rows = ["address,amount"] + [f"{receiver},{index + 1}" for index, receiver in enumerate(receivers)]
+    rows[2] = f"{bad_checksum},2"
+    rows.append(f"{receivers[0]},-5")
+    rows.append("not a row")
+
+    status, body = _post(airdrop_service, gateway, query, "\n".join(rows) + "\n")
+
+    assert status == 200
+    lines = [json.loads(line) for line in body.splitlines()]
+    transactions = [line for line in lines if "data" in line]
+    errors = {line["line"]: line["error"] for line in lines if "error" in line}
+    assert len(transactions) > 1
+    assert [transaction["nonce"] for transaction in transactions] == list(range(42, 42 + len(transactions)))
+    assert all(transaction["sender"] == sender for transaction in transactions)
+    assert sorted(errors) == [3, 1002, 1003]
+    assert errors[3] == "invalid address: invalid checksum"
+    assert lines[-1] == {"summary": {
+        "transactions": len(transactions),
+        "receivers": 999,
+        "esdtAmount": str(sum(range(1, 1001)) - 2),
+        "rejectedRows": 3,
+    }}
+
+
+def test_jsonl_upload(airdrop_service):
+    sender, query, receivers = _airdrop(2)
+    gateway = FakeGateway()
+    gateway.set_account(sender, esdts={TOKEN: 10 ** 20})
+    upload = "\n".join([
+        json.dumps({"address": receivers[0], "amount": 5}),
+        json.dumps({"address": receivers[1]}),
+        json.dumps({"address": receivers[1], "amount": "7"}),
+    ])
+
+    status, body = _post(airdrop_service, gateway, query, upload, content_type="application/x-ndjson")
+
+    lines = [json.loads(line) for line in body.splitlines()]
+    assert status == 200
+    assert lines[0]["line"] == 2
+    assert lines[-1]["summary"] == {"transactions": 1, "receivers": 2, "esdtAmount": "12", "rejectedRows": 1}
+
+
+def test_requests_are_refused_before_streaming(airdrop_service):
+    sender, query, receivers = _airdrop(1)
+    gateway = FakeGateway()
+    gateway.set_account(sender)
+    upload = f"{receivers[0]},1\n"
+
+    assert _post(airdrop_service, gateway, query, upload)[0] == 400
+    assert _post(airdrop_service, gateway, {**query, "Format": "xml"}, upload)[0] == 400
+    assert _post(airdrop_service, gateway, {**query, "ChainId": ""}, upload)[0] == 400
+
+    # A new sender, whose state is not cached yet
+    query = _airdrop(1)[1]
+    gateway.fail_next(100)
+    assert _post(airdrop_service, gateway, query, upload)[0] == 502
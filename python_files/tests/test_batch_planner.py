@@ -0,0 +1,75 @@
+import os
+
+import pytest
+
+from python_files.batch_planner import SmartSaveBatcher, plan_smart_save_chunks, smart_save_gas_limit
+from python_files.constants import MAX_GAS_LIMIT_PER_TX, MIN_SMART_SAVE_GAS_LIMIT
+
+CONTRACT_HEX = "00" * 31 + "01"
+SERVICE_HEX = "00" * 31 + "02"
+TOKEN = "BUILDO-22c0a5"
+
+
+def _receivers(count: int) -> list:
+    return [os.urandom(32).hex() for _ in range(count)]
+
+
+def test_gas_limit_has_a_floor():
+    assert smart_save_gas_limit(0, 0) == MIN_SMART_SAVE_GAS_LIMIT
+    assert smart_save_gas_limit(100, 10_000) > smart_save_gas_limit(99, 10_000)
+
+
+def test_small_airdrop_is_one_chunk():
+    receivers = _receivers(3)
+    chunks = plan_smart_save_chunks(CONTRACT_HEX, SERVICE_HEX, TOKEN, receivers, [1, 2, 3])
+
+    assert len(chunks) == 1
+    assert chunks[0].receiver_hexes == receivers
+    assert chunks[0].esdt_amount == 6
+
+
+def test_large_airdrop_is_split_within_the_gas_limit_in_order():
+    receivers = _receivers(1000)
+    amounts = list(range(1, 1001))
+    chunks = plan_smart_save_chunks(CONTRACT_HEX, SERVICE_HEX, TOKEN, receivers, amounts)
+
+    assert len(chunks) > 1
+    assert [receiver for chunk in chunks for receiver in chunk.receiver_hexes] == receivers
+    assert [amount for chunk in chunks for amount in chunk.amounts] == amounts
+    for chunk in chunks:
+        gas_limit = smart_save_gas_limit(len(chunk.receiver_hexes), len(chunk.encode_data()))
+        assert gas_limit <= MAX_GAS_LIMIT_PER_TX
+
+
+def test_data_length_limit_splits_chunks():
+    receivers = _receivers(10)
+    batcher = SmartSaveBatcher(CONTRACT_HEX, SERVICE_HEX, TOKEN, max_data_length=0)
+    max_data_length = batcher.header_length + 3 * (2 + 64 + 2)
+    chunks = plan_smart_save_chunks(CONTRACT_HEX, SERVICE_HEX, TOKEN, receivers, [1] * 10,
+                                    max_data_length=max_data_length)
+
+    assert [len(chunk.receiver_hexes) for chunk in chunks] == [3, 3, 3, 1]
+    assert all(len(chunk.encode_data()) <= max_data_length for chunk in chunks)
+
+
+def test_batcher_streams_one_chunk_at_a_time():
+    batcher = SmartSaveBatcher(CONTRACT_HEX, SERVICE_HEX, TOKEN)
+    batcher.max_gas_limit = smart_save_gas_limit(10, batcher.header_length + 10 * (2 + 64 + 2))
+    receivers = _receivers(11)
+
+    assert all(batcher.add(receiver, 1) is None for receiver in receivers[:10])
+    closed = batcher.add(receivers[10], 1)
+    assert closed.receiver_hexes == receivers[:10]
+    assert batcher.flush().receiver_hexes == receivers[10:]
+    assert batcher.flush() is None
+
+
+@pytest.mark.parametrize("receivers, amounts, kwargs", [
+    (_receivers(2), [1], {}),
+    (["ab" * 31], [1], {}),
+    (_receivers(1), [1], {"max_data_length": 10}),
+    (_receivers(1), [1], {"max_gas_limit": MIN_SMART_SAVE_GAS_LIMIT - 1}),
+])
+def test_invalid_plans_are_refused(receivers, amounts, kwargs):
+    with pytest.raises(ValueError):
+        plan_smart_save_chunks(CONTRACT_HEX, SERVICE_HEX, TOKEN, receivers, amounts, **kwargs)
@@ -0,0 +1,78 @@
+import asyncio
+import os
+
+import pytest
+from multiversx_sdk import Transaction, TransactionComputer, UserVerifier
+
+from python_files.batch_signer import BatchSigner
+from python_files.wallet_pool import WalletPool
+from utils.bech32_codec import encode_bech32_addresses
+
+
+@pytest.fixture(scope="module")
+def senders():
+    return WalletPool.from_folder().wallets
+
+
+def _transactions(senders: list, count: int) -> list:
+    transactions = [
+        Transaction(sender=senders[index % len(senders)].address, receiver=receiver, gas_limit=50_000,
+                    chain_id="D", nonce=index // len(senders), value=index + 1)
+        for index, receiver in enumerate(encode_bech32_addresses(os.urandom(32 * count)))
+    ]
+    # Every other transaction signs its hash instead of its bytes
+    for transaction in transactions[::2]:
+        transaction.version, transaction.options = 2, 1
+    return transactions
+
+
+def _one_at_a_time(transactions: list, senders: list) -> list:
+    computer = TransactionComputer()
+    return [
+        senders[index % len(senders)].get_signer().sign(computer.compute_bytes_for_verifying(transaction))
+        for index, transaction in enumerate(transactions)
+    ]
+
+
+@pytest.mark.parametrize("workers, min_parallel", [(1, 0), (3, 0), (3, 1000)])
+def test_signatures_match_signing_one_at_a_time_in_input_order(senders, workers, min_parallel):
+    transactions = _transactions(senders, 50)
+    per_transaction = [senders[index % len(senders)] for index in range(len(transactions))]
+    expected = _one_at_a_time(transactions, senders)
+
+    with BatchSigner(workers=workers, chunk_size=7, min_parallel=min_parallel) as signer:
+        signed = signer.sign(transactions, per_transaction)
+
+    assert signed == transactions
+    assert [transaction.signature for transaction in transactions] == expected
+    assert (signer.last.transactions, signer.last.chunks) == (50, 8)
+    computer = TransactionComputer()
+    assert all(
+        UserVerifier.from_address(sender.get_address()).verify(computer.compute_bytes_for_verifying(transaction),
+                                                               transaction.signature)
+        for sender, transaction in zip(per_transaction, transactions)
+    )
+
+
+def test_async_signing_keeps_input_order_across_the_pool(senders):
+    sender = senders[0]
+    transactions = _transactions([sender], 40)
+    expected = _one_at_a_time(transactions, [sender])
+
+    async def scenario():
+        with BatchSigner(workers=2, chunk_size=3, min_parallel=0) as signer:
+            first = await signer.sign_async(transactions, sender)
+            # The pool is reused for later batches
+            second = await signer.sign_async(transactions[:5], sender)
+            return first, second, signer.total
+
+    first, second, total = asyncio.run(scenario())
+
+    assert [transaction.signature for transaction in first] == expected
+    assert second == transactions[:5]
+    assert (total.transactions, total.chunks) == (45, 16)
+
+
+def test_one_sender_per_transaction_is_required(senders):
+    with pytest.raises(ValueError, match="Got 2 sender"):
+        BatchSigner(workers=1).sign(_transactions(senders, 3), senders[:2])
@@ -0,0 +1,81 @@
+import os
+
+import pytest
+from multiversx_sdk import Address
+
+from utils import bech32_codec
+from utils.bech32_codec import decode_bech32_addresses, encode_bech32_addresses
+
+KEYS = os.urandom(32 * 300)
+
+
+def _flip_last_character(address: str) -> str:
+    return address[:-1] + ("q" if address[-1] != "q" else "p")
+
+
+@pytest.fixture(params=["python", "numpy"])
+def decode(request, monkeypatch):
+    if request.param == "numpy":
+        pytest.importorskip("numpy")
+        monkeypatch.setattr(bech32_codec, "NUMPY_MIN_BATCH", 0)
+    else:
+        monkeypatch.setattr(bech32_codec, "numpy", None)
+    return decode_bech32_addresses
+
+
+def test_encoding_matches_the_sdk():
+    addresses = encode_bech32_addresses(KEYS[:32 * 5])
+    assert addresses == [Address(KEYS[offset:offset + 32], "erd").to_bech32() for offset in range(0, 32 * 5, 32)]
+
+
+def test_round_trip(decode):
+    result = decode(encode_bech32_addresses(KEYS))
+
+    assert result.all_valid
+    assert bytes(result.buffer) == KEYS
+    assert result.hexes()[1] == KEYS[32:64].hex()
+
+
+def test_uppercase_addresses_decode(decode):
+    address = encode_bech32_addresses(KEYS[:32])[0]
+    assert decode([address.upper()]).row(0) == KEYS[:32]
+
+
+def test_invalid_addresses_are_reported_in_place(decode):
+    valid = encode_bech32_addresses(KEYS[:32 * 2])
+    addresses = [
+        valid[0],
+        _flip_last_character(valid[1]),
+        valid[0][:-1],
+        valid[0][:10] + valid[0][10:].upper(),
+        "abc" + valid[0][3:],
+        valid[0][:-1] + "b",
+        None,
+        valid[1],
+    ]
+    result = decode(addresses)
+
+    assert result.errors == {
+        1: "invalid checksum",
+        2: "invalid length 61, expected 62",
+        3: "mixed case",
+        4: "invalid prefix, expected 'erd1'",
+        5: "invalid character",
+        6: "not a string",
+    }
+    assert [result.is_valid(index) for index in range(len(addresses))] == [True] + [False] * 6 + [True]
+    assert result.row(1) == bytes(32)
+    assert result.hexes()[1] is None
+    assert result.row(7) == KEYS[32:64]
+
+
+def test_other_human_readable_parts():
+    address = encode_bech32_addresses(KEYS[:32], hrp="test")[0]
+    assert address.startswith("test1")
+    assert decode_bech32_addresses([address], hrp="test").row(0) == KEYS[:32]
+    assert not decode_bech32_addresses([address]).all_valid
+
+
+def test_encoding_refuses_partial_keys():
+    with pytest.raises(ValueError):
+        encode_bech32_addresses(bytes(33))
@@ -0,0 +1,106 @@
+import asyncio
+import socket
+from pathlib import Path
+
+from python_files.broadcaster import BroadcastError, TransactionBroadcaster
+from python_files.constants import WALLETS_FOLDER
+from python_files.fake_gateway import FakeGateway, run_fake_gateway
+from python_files.gateway_client import GatewayClient
+from python_files.nonce_manager import NonceManager
+
+PEM_PATH = Path(WALLETS_FOLDER) / "sd_1_wallet_key_1.pem"
+
+
+def _dead_url() -> str:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return f"http://127.0.0.1:{sock.getsockname()[1]}"
+
+
+def _transaction(sender: str, nonce: int) -> dict:
+    return {"sender": sender, "receiver": sender, "nonce": nonce, "value": "0", "gasPrice": 1_000_000_000,
+            "gasLimit": 50_000, "data": "", "chainID": "D", "version": 2, "options": 0}
+
+
+def _broadcast(gateway: FakeGateway, scenario, url: str = None, **kwargs):
+    """
+    Runs `scenario(broadcaster, nonces)` with a broadcaster sending to `gateway` (or to `url`)
+    and a nonce manager reading the chain nonce from `gateway`.
+    """
+    async def fetch_nonce(sender: str) -> int:
+        return gateway.accounts[sender]["nonce"]
+
+    async def run():
+        async with run_fake_gateway(gateway) as gateway_url:
+            client = GatewayClient(url or gateway_url, max_retries=0)
+            nonces = NonceManager(fetch_nonce=fetch_nonce)
+            broadcaster = TransactionBroadcaster(PEM_PATH, gateway=client, nonces=nonces, signing_workers=1, **kwargs)
+            gateway.set_account(broadcaster.address, nonce=5)
+            await broadcaster.start()
+            try:
+                return await scenario(broadcaster, nonces)
+            finally:
+                await broadcaster.close()
+                await client.close()
+
+    return asyncio.run(run())
+
+
+async def _allocate_and_broadcast(broadcaster: TransactionBroadcaster, nonces: NonceManager, count: int) -> list:
+    first = await nonces.allocate(broadcaster.address, count=count, observed_nonce=5)
+    return await broadcaster.broadcast([_transaction(broadcaster.address, nonce) for nonce in range(first, first + count)])
+
+
+def test_transactions_are_sent_in_batches():
+    gateway = FakeGateway()
+
+    async def scenario(broadcaster, nonces):
+        return await _allocate_and_broadcast(broadcaster, nonces, 5), broadcaster.stats()
+
+    outcomes, stats = _broadcast(gateway, scenario, batch_size=2)
+    assert outcomes == list(gateway.transactions)
+    assert gateway.request_count == 3
+    assert stats["sent"] == 5
+
+
+def test_rejected_nonces_are_handed_out_before_new_ones():
+    gateway = FakeGateway()
+
+    async def scenario(broadcaster, nonces):
+        first = await nonces.allocate(broadcaster.address, count=4, observed_nonce=5)
+        transactions = [_transaction(broadcaster.address, nonce) for nonce in range(first, first + 4)]
+        # The node already holds a transaction with nonce 7, so it refuses the third one
+        gateway.accepted_nonces[broadcaster.address] = {7}
+        outcomes = await broadcaster.broadcast(transactions)
+        return outcomes, await nonces.allocate(broadcaster.address), await nonces.allocate(broadcaster.address)
+
+    outcomes, gap, after = _broadcast(gateway, scenario)
+    assert [isinstance(outcome, BroadcastError) for outcome in outcomes] == [False, False, True, False]
+    assert (gap, after) == (7, 9)
+
+
+def test_nonces_of_batches_that_never_reached_the_node_are_released():
+    gateway = FakeGateway()
+
+    async def scenario(broadcaster, nonces):
+        outcomes = await _allocate_and_broadcast(broadcaster, nonces, 3)
+        return outcomes, await nonces.allocate(broadcaster.address)
+
+    outcomes, next_nonce = _broadcast(gateway, scenario, url=_dead_url())
+    assert all(isinstance(outcome, BroadcastError) for outcome in outcomes)
+    assert next_nonce == 5
+
+
+def test_nonces_are_resynced_when_a_batch_may_have_reached_the_node():
+    gateway = FakeGateway()
+
+    async def scenario(broadcaster, nonces):
+        await _allocate_and_broadcast(broadcaster, nonces, 2)
+        gateway.fail_next(1)
+        outcomes = await _allocate_and_broadcast(broadcaster, nonces, 3)
+        # The 503 gives no verdict on nonces 7..9: the chain, now at 7, decides
+        return outcomes, nonces.peek(broadcaster.address)
+
+    outcomes, next_nonce = _broadcast(gateway, scenario)
+    assert all(isinstance(outcome, BroadcastError) for outcome in outcomes)
+    assert next_nonce == 7
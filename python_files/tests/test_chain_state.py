@@ -0,0 +1,81 @@
+import asyncio
+import json
+import os
+
+import pytest
+
+from python_files.chain_state import (
+    AccountSeed,
+    esdt_storage_pair,
+    load_account_seeds,
+    parse_esdt_storage_pair,
+    seed_accounts,
+)
+from python_files.fake_gateway import FakeGateway, run_fake_gateway
+from utils.bech32_codec import encode_bech32_addresses
+
+
+@pytest.mark.parametrize("amount", [0, 1, 127, 128, 255, 16384, 10 ** 18, 2 ** 200])
+def test_esdt_storage_pairs_round_trip(amount):
+    key, value = esdt_storage_pair("TKN-1a2b3c", amount)
+
+    assert bytes.fromhex(key) == b"ELRONDesdtTKN-1a2b3c"
+    assert parse_esdt_storage_pair(key, value) == ("TKN-1a2b3c", amount)
+
+
+def test_other_storage_keys_are_not_esdt_balances():
+    _, value = esdt_storage_pair("TKN-1a2b3c", 5)
+
+    assert parse_esdt_storage_pair(b"owner".hex(), value) is None
+    assert parse_esdt_storage_pair(b"ELRONDesdtTKN-1a2b3c".hex(), "0a0100") is None
+
+
+def test_seeding_sends_one_set_state_call_per_chunk():
+    addresses = encode_bech32_addresses(os.urandom(32 * 5))
+    gateway = FakeGateway()
+    consumed = []
+
+    def records():
+        for index, address in enumerate(addresses):
+            consumed.append(address)
+            yield AccountSeed(address, balance=index, esdts={"TKN-1a2b3c": 10 ** 20 + index}, nonce=index * 10)
+
+    async def scenario():
+        async with run_fake_gateway(gateway) as url:
+            return await asyncio.to_thread(seed_accounts, records(), chunk_size=2, proxy=url)
+
+    assert asyncio.run(scenario()) == 5
+    assert gateway.request_count == 3
+    assert consumed == addresses
+    for index, address in enumerate(addresses):
+        assert (gateway.accounts[address]["nonce"], gateway.accounts[address]["balance"]) == (index * 10, str(index))
+        assert gateway.esdts[address]["TKN-1a2b3c"]["balance"] == str(10 ** 20 + index)
+
+
+def test_fixture_formats_load_the_same_seeds(tmp_path):
+    first, second = encode_bech32_addresses(os.urandom(64))
+    expected = [
+        AccountSeed(first, 10, {"TKN-1a2b3c": 100, "WEGLD-a28c59": 5}, 3),
+        AccountSeed(second, 0, {}, None),
+    ]
+    records = [
+        {"address": first, "balance": "10", "esdts": {"TKN-1a2b3c": 100, "WEGLD-a28c59": "5"}, "nonce": 3},
+        {"address": second},
+    ]
+    (tmp_path / "seeds.csv").write_text(
+        f"address,balance,nonce,esdts\n{first},10,3,TKN-1a2b3c=100; WEGLD-a28c59=5\n{second},,,\n"
+    )
+    (tmp_path / "seeds.jsonl").write_text("\n".join(json.dumps(record) for record in records) + "\n\n")
+    (tmp_path / "seeds.json").write_text(json.dumps(records))
+    (tmp_path / "wrapped.json").write_text(json.dumps({"accounts": records}))
+
+    for name in ["seeds.csv", "seeds.jsonl", "seeds.json", "wrapped.json"]:
+        assert list(load_account_seeds(tmp_path / name)) == expected, name
+
+
+def test_unknown_fixture_formats_are_rejected(tmp_path):
+    path = tmp_path / "seeds.txt"
+    path.write_text("")
+
+    with pytest.raises(ValueError, match="Unsupported seed file"):
+        list(load_account_seeds(path))
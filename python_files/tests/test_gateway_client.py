@@ -0,0 +1,141 @@
+import asyncio
+import os
+import socket
+
+import pytest
+
+from python_files.account_cache import AccountStateCache
+from python_files.fake_gateway import FakeGateway, run_fake_gateway
+from python_files.gateway_client import (
+    GatewayClient,
+    GatewayConnectError,
+    GatewayError,
+    GatewayUnavailable,
+    TransactionNotFound,
+)
+from utils.bech32_codec import encode_bech32_addresses
+
+TOKEN = "TKN-1a2b3c"
+
+
+def _with_client(gateway: FakeGateway, scenario, **kwargs):
+    async def run():
+        async with run_fake_gateway(gateway) as url:
+            client = GatewayClient(url, backoff=0.01, **kwargs)
+            try:
+                return await scenario(client)
+            finally:
+                await client.close()
+
+    return asyncio.run(run())
+
+
+def _transaction(sender: str, nonce: int) -> dict:
+    return {"sender": sender, "receiver": sender, "nonce": nonce, "value": "1", "signature": "00"}
+
+
+def test_sender_state_is_parsed_from_both_lookups():
+    sender = encode_bech32_addresses(os.urandom(32))[0]
+    gateway = FakeGateway(block_nonce=12)
+    gateway.set_account(sender, nonce=5, balance=10 ** 19, esdts={TOKEN: 3 * 10 ** 18})
+
+    state = _with_client(gateway, lambda client: client.fetch_sender_state(sender))
+
+    assert (state.account.address, state.account.nonce, state.account.balance) == (sender, 5, 10 ** 19)
+    assert state.account.block_info.nonce == state.esdts.block_info.nonce == 12
+    assert state.esdts.get(TOKEN).balance == 3 * 10 ** 18
+    assert state.esdts.get(TOKEN).type == "FungibleESDT"
+    assert state.esdts.get("OTHER-000000") is None
+
+
+def test_sends_return_the_hashes_of_accepted_transactions_by_index():
+    sender = encode_bech32_addresses(os.urandom(32))[0]
+    gateway = FakeGateway()
+    gateway.set_account(sender, nonce=3)
+
+    async def scenario(client):
+        hashes = await client.send_transactions([_transaction(sender, nonce) for nonce in [3, 2, 4, 4]])
+        pending = await client.get_transaction_status(hashes[0])
+        await client.generate_blocks(1)
+        return hashes, pending, await client.get_transaction_status(hashes[0])
+
+    hashes, pending, executed = _with_client(gateway, scenario)
+
+    assert sorted(hashes) == [0, 2]
+    assert (pending, executed) == ("pending", "success")
+
+
+def test_unknown_transactions_and_refused_requests_are_gateway_errors():
+    sender = encode_bech32_addresses(os.urandom(32))[0]
+
+    async def scenario(client):
+        with pytest.raises(TransactionNotFound):
+            await client.get_transaction_status("ab" * 32)
+        with pytest.raises(GatewayError, match="lowerNonceInTx") as refused:
+            await client.request_json("POST", "/transaction/send", {"sender": sender, "nonce": 0})
+        return refused.value
+
+    assert not isinstance(_with_client(FakeGateway(), scenario), GatewayUnavailable)
+
+
+def test_reads_are_retried_until_the_gateway_answers():
+    gateway = FakeGateway(block_nonce=4)
+    gateway.fail_next(2)
+
+    body = _with_client(gateway, lambda client: client.get_json("/network/status/0"), max_retries=2)
+
+    assert body["data"]["status"]["erd_nonce"] == 4
+    assert gateway.request_count == 3
+
+
+def test_reads_give_up_as_unavailable_after_the_retries():
+    gateway = FakeGateway()
+    gateway.fail_next(10)
+
+    with pytest.raises(GatewayUnavailable):
+        _with_client(gateway, lambda client: client.get_json("/network/status/0"), max_retries=2)
+    assert gateway.request_count == 3
+
+
+def test_sends_are_not_retried_once_they_reached_the_gateway():
+    sender = encode_bech32_addresses(os.urandom(32))[0]
+    gateway = FakeGateway()
+    gateway.fail_next(1)
+
+    with pytest.raises(GatewayUnavailable) as unavailable:
+        _with_client(gateway, lambda client: client.send_transactions([_transaction(sender, 0)]), max_retries=3)
+    assert not isinstance(unavailable.value, GatewayConnectError)
+    assert gateway.request_count == 1
+    assert gateway.transactions == {}
+
+
+def test_unreachable_gateways_raise_connect_errors():
+    with socket.socket() as probe:
+        probe.bind(("127.0.0.1", 0))
+        dead_url = f"http://127.0.0.1:{probe.getsockname()[1]}"
+
+    async def scenario():
+        client = GatewayClient(dead_url, max_retries=1, backoff=0.01)
+        try:
+            await client.send_transactions([])
+        finally:
+            await client.close()
+
+    with pytest.raises(GatewayConnectError):
+        asyncio.run(scenario())
+
+
+def test_lookups_are_cached_until_blocks_are_generated():
+    sender = encode_bech32_addresses(os.urandom(32))[0]
+    gateway = FakeGateway()
+    gateway.set_account(sender, nonce=1)
+
+    async def scenario(client):
+        first = await client.get_account(sender)
+        gateway.set_account(sender, nonce=2)
+        cached = await client.get_account(sender)
+        await client.generate_blocks(1)
+        return first.nonce, cached.nonce, (await client.get_account(sender)).nonce
+
+    assert _with_client(gateway, scenario, cache=AccountStateCache()) == (1, 1, 2)
+    assert gateway.request_count == 3
@@ -0,0 +1,130 @@
+import asyncio
+import os
+import socket
+import time
+from contextlib import AsyncExitStack
+
+import pytest
+
+from python_files.fake_gateway import FakeGateway, run_fake_gateway
+from python_files.gateway_client import (
+    GatewayConnectError,
+    GatewayPool,
+    GatewayUnavailable,
+    TransactionNotFound,
+)
+from utils.bech32_codec import encode_bech32_addresses
+
+SENDER = encode_bech32_addresses(os.urandom(32))[0]
+
+
+def _dead_url() -> str:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return f"http://127.0.0.1:{sock.getsockname()[1]}"
+
+
+def _transaction(nonce: int = 0) -> dict:
+    return {"sender": SENDER, "receiver": SENDER, "nonce": nonce, "signature": "00"}
+
+
+def _with_pool(gateways, scenario, **kwargs):
+    """
+    Serves every FakeGateway (a URL string is used as is) and runs `scenario(pool)` against a
+    pool of them, in that order; a fresh pool tries its nodes in order.
+    """
+    async def run():
+        async with AsyncExitStack() as stack:
+            urls = [gateway if isinstance(gateway, str) else await stack.enter_async_context(run_fake_gateway(gateway))
+                    for gateway in gateways]
+            pool = GatewayPool(urls, backoff=0.01, probe_interval=60, **kwargs)
+            try:
+                return await scenario(pool)
+            finally:
+                await pool.close()
+
+    return asyncio.run(run())
+
+
+def test_sends_are_not_repeated_on_another_node_after_an_error_status():
+    failing, healthy = FakeGateway(), FakeGateway()
+    # The node's first prober request may come first
+    failing.fail_next(2)
+
+    async def scenario(pool):
+        with pytest.raises(GatewayUnavailable):
+            await pool.send_transactions([_transaction()])
+
+    _with_pool([failing, healthy], scenario)
+    assert not failing.transactions and not healthy.transactions
+
+
+def test_sends_move_on_when_a_node_cannot_be_reached():
+    healthy = FakeGateway()
+
+    async def scenario(pool):
+        return await pool.send_transactions([_transaction()])
+
+    hashes = _with_pool([_dead_url(), healthy], scenario)
+    assert list(hashes.values()) == list(healthy.transactions)
+
+
+def test_reads_move_on_after_an_error_status():
+    failing, healthy = FakeGateway(), FakeGateway()
+    failing.fail_next(100)
+    failing.set_account(SENDER, nonce=1)
+    healthy.set_account(SENDER, nonce=2)
+
+    async def scenario(pool):
+        return await pool.get_account(SENDER)
+
+    assert _with_pool([failing, healthy], scenario).nonce == 2
+
+
+def test_gateway_error_answers_are_not_failed_over():
+    first, second = FakeGateway(), FakeGateway()
+
+    async def scenario(pool):
+        tx_hash = (await pool.nodes[1].client.send_transactions([_transaction()]))[0]
+        with pytest.raises(TransactionNotFound):
+            await pool.get_transaction_status(tx_hash)
+
+    _with_pool([first, second], scenario)
+
+
+def test_slow_reads_are_hedged_on_the_next_node():
+    slow, fast = FakeGateway(latency=1), FakeGateway()
+    fast.set_account(SENDER, nonce=2)
+
+    async def scenario(pool):
+        start = time.perf_counter()
+        account = await pool.get_account(SENDER)
+        return account.nonce, time.perf_counter() - start
+
+    nonce, seconds = _with_pool([slow, fast], scenario, hedge_delay=0.05)
+    assert nonce == 2
+    assert seconds < 0.5
+
+
+def test_unreachable_and_lagging_nodes_are_ranked_last():
+    lagging, healthy = FakeGateway(block_nonce=1), FakeGateway(block_nonce=100)
+    dead = _dead_url()
+
+    async def scenario(pool):
+        for _ in range(3):
+            await pool.probe()
+        healthy_urls = [node["url"] for node in pool.stats() if node["healthy"]]
+        return healthy_urls == [pool.nodes[2].url], [node.url for node in pool.ranked_nodes()][1:]
+
+    only_healthy, ranked_last = _with_pool([dead, lagging, healthy], scenario)
+    assert only_healthy
+    # Lagging nodes still answer, so they come before unreachable ones
+    assert ranked_last[1] == dead
+
+
+def test_every_node_failing_raises_the_last_error():
+    async def scenario(pool):
+        with pytest.raises(GatewayConnectError):
+            await pool.send_transactions([_transaction()])
+
+    _with_pool([_dead_url(), _dead_url()], scenario, max_retries=3)
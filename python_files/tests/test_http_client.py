@@ -0,0 +1,110 @@
+import asyncio
+import socket
+
+import pytest
+
+from python_files.fake_gateway import FakeGateway, run_fake_gateway
+from python_files.http_client import AsyncHttpClient, HttpConnectError, HttpError, HttpMetrics, endpoint_of
+
+
+def _request(gateway: FakeGateway, method: str, path: str, payload=None, **kwargs):
+    """
+    Sends one request to `gateway` and returns the outcome, an exception included, with the
+    attempts recorded per endpoint.
+    """
+    metrics = HttpMetrics()
+
+    async def scenario():
+        async with run_fake_gateway(gateway) as url:
+            client = AsyncHttpClient(metrics=metrics, backoff=0, **kwargs)
+            try:
+                return await client.request_json(method, f"{url}{path}", payload)
+            except HttpError as e:
+                return e
+            finally:
+                await client.close()
+
+    return asyncio.run(scenario()), metrics.snapshot()
+
+
+def test_idempotent_requests_are_retried_on_5xx():
+    gateway = FakeGateway(block_nonce=7)
+    gateway.fail_next(2)
+
+    (status, body), metrics = _request(gateway, "GET", "/network/status/0", max_retries=3)
+
+    assert status == 200
+    assert body["data"]["status"]["erd_nonce"] == 7
+    assert metrics["GET /network/status/{n}"]["count"] == 3
+    assert metrics["GET /network/status/{n}"]["errors"] == 2
+
+
+def test_idempotent_requests_give_up_after_the_retries():
+    gateway = FakeGateway()
+    gateway.fail_next(10)
+
+    error, _ = _request(gateway, "GET", "/network/status/0", max_retries=2)
+
+    assert isinstance(error, HttpError) and not isinstance(error, HttpConnectError)
+    assert "returned HTTP 503" in str(error)
+    assert gateway.request_count == 3
+
+
+def test_posts_that_reached_the_server_are_not_retried():
+    gateway = FakeGateway()
+    gateway.fail_next(1)
+
+    error, _ = _request(gateway, "POST", "/simulator/generate-blocks/1", max_retries=3)
+
+    assert isinstance(error, HttpError) and "returned HTTP 503" in str(error)
+    assert gateway.request_count == 1
+    assert gateway.block_nonce == 1
+
+
+@pytest.mark.parametrize("method, path, attempts", [
+    ("GET", "/network/status/0", 3),
+    ("POST", "/simulator/generate-blocks/1", 1),
+])
+def test_timeouts_are_retried_for_idempotent_requests_only(method, path, attempts):
+    gateway = FakeGateway(latency=0.5)
+
+    error, _ = _request(gateway, method, path, max_retries=2, timeout=0.05)
+
+    assert isinstance(error, HttpError) and "failed" in str(error)
+    assert gateway.request_count == attempts
+
+
+@pytest.mark.parametrize("method", ["GET", "POST"])
+def test_connection_errors_are_retried_for_every_method(method):
+    with socket.socket() as probe:
+        probe.bind(("127.0.0.1", 0))
+        dead_url = f"http://127.0.0.1:{probe.getsockname()[1]}"
+    metrics = HttpMetrics()
+
+    async def scenario():
+        client = AsyncHttpClient(metrics=metrics, max_retries=2, backoff=0)
+        try:
+            await client.request_json(method, f"{dead_url}/transaction/send", {})
+        finally:
+            await client.close()
+
+    with pytest.raises(HttpConnectError):
+        asyncio.run(scenario())
+    assert metrics.snapshot()[f"{method} /transaction/send"]["count"] == 3
+
+
+def test_bodies_that_are_not_json_raise_http_errors():
+    error, metrics = _request(FakeGateway(), "GET", "/not-a-route", max_retries=3)
+
+    assert isinstance(error, HttpError) and "invalid JSON" in str(error)
+    assert metrics["GET /not-a-route"]["count"] == 1
+
+
+def test_endpoints_group_urls_by_route():
+    address = "erd1qyu5wthldzr8wx5c9ucg8kjagg0jfs53s8nr3zpz3hypefsdd8ssycr6th"
+
+    assert endpoint_of("get", f"http://gateway/address/{address}/esdt/TKN-1a2b3c") == \
+        "GET /address/{address}/esdt/TKN-1a2b3c"
+    assert endpoint_of("GET", f"http://gateway/transaction/{'ab' * 32}/process-status?x=1") == \
+        "GET /transaction/{hash}/process-status"
+    assert endpoint_of("POST", "http://gateway/simulator/generate-blocks/20") == "POST /simulator/generate-blocks/{n}"
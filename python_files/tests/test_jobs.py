@@ -0,0 +1,253 @@
+import asyncio
+import json
+import os
+import subprocess
+import sys
+
+import pytest
+
+from python_files.fake_gateway import FakeGateway
+from python_files.jobs import (
+    FAILED,
+    SUCCEEDED,
+    Job,
+    JobManager,
+    JobQueueFull,
+    MemoryJobStore,
+    SqliteJobStore,
+    owner_is_alive,
+)
+from utils.bech32_codec import encode_bech32_addresses
+
+
+async def _never_called(request, progress):
+    raise AssertionError("no job should run")
+
+
+async def _two_stages(request, progress):
+    await progress("parse", {"receivers": 2})
+    await progress("plan", {"transactions": 1})
+    return {"echo": request}, 200, {}
+
+
+@pytest.fixture(params=["memory", "sqlite"])
+def store(request, tmp_path):
+    store = MemoryJobStore() if request.param == "memory" else SqliteJobStore(str(tmp_path / "jobs.db"))
+    yield store
+    store.close()
+
+
+async def _collect(manager: JobManager, job_id: str, after: int = 0) -> list:
+    return [event async for event in manager.events(job_id, after) if event is not None]
+
+
+class LaggingStore(MemoryJobStore):
+    """
+    Misses the events of a job on the first read, as when they are recorded between the
+    manager's read of the events and its read of the job.
+    """
+
+    def __init__(self) -> None:
+        super().__init__()
+        self.missed = False
+
+    async def events(self, job_id, after=0):
+        if not self.missed:
+            self.missed = True
+            return []
+        return await super().events(job_id, after)
+
+
+def test_events_of_a_job_finishing_between_reads_end_with_its_result():
+    async def scenario():
+        store = LaggingStore()
+        await store.create(Job("job", {}, status=SUCCEEDED))
+        await store.append_event("job", "result", {"status": 200})
+        return await _collect(JobManager(_never_called, store, poll_interval=0.01), "job")
+
+    assert asyncio.run(scenario()) == [(1, "result", {"status": 200})]
+
+
+def test_jobs_record_their_stages_and_result(store):
+    async def scenario():
+        manager = JobManager(_two_stages, store, poll_interval=0.01)
+        await manager.start()
+        try:
+            job = await manager.submit({"InputMessage": "airdrop"})
+            events = await _collect(manager, job.id)
+            resumed = await _collect(manager, job.id, after=2)
+            return events, resumed, await manager.get(job.id)
+        finally:
+            await manager.close()
+
+    events, resumed, job = asyncio.run(scenario())
+    assert events == [
+        (1, "status", {"status": "running"}),
+        (2, "stage", {"stage": "parse", "receivers": 2}),
+        (3, "stage", {"stage": "plan", "transactions": 1}),
+        (4, "result", {"status": SUCCEEDED, "httpStatus": 200, "result": {"echo": {"InputMessage": "airdrop"}}}),
+    ]
+    assert resumed == events[2:]
+    assert (job.status, job.stage, job.http_status) == (SUCCEEDED, "plan", 200)
+
+
+async def _rejected(request, progress):
+    return {"error": "bad"}, 400, {}
+
+
+async def _crashed(request, progress):
+    raise RuntimeError("boom")
+
+
+@pytest.mark.parametrize("runner, http_status, result", [
+    (_rejected, 400, {"error": "bad"}),
+    (_crashed, 500, {"error": "Unexpected error: boom"}),
+])
+def test_failing_jobs_are_recorded_as_failed(store, runner, http_status, result):
+    async def scenario():
+        manager = JobManager(runner, store, poll_interval=0.01)
+        try:
+            job = await manager.submit({})
+            events = await _collect(manager, job.id)
+            return events[-1], (await manager.get(job.id)).status
+        finally:
+            await manager.close()
+
+    assert asyncio.run(scenario()) == ((2, "result", {"status": FAILED, "httpStatus": http_status, "result": result}),
+                                       FAILED)
+
+
+def test_submissions_are_refused_once_the_queue_is_full():
+    async def scenario():
+        release = asyncio.Event()
+
+        async def blocked(request, progress):
+            await release.wait()
+            return {}, 200, {}
+
+        manager = JobManager(blocked, workers=1, queue_size=1)
+        try:
+            await manager.submit({})
+            # The worker picks up the first job, the second one waits in the queue
+            await asyncio.sleep(0)
+            await manager.submit({})
+            with pytest.raises(JobQueueFull):
+                await manager.submit({})
+        finally:
+            release.set()
+            await manager.close()
+
+    asyncio.run(scenario())
+
+
+def test_stores_drop_the_oldest_finished_jobs(store):
+    store.max_jobs = 2
+
+    async def scenario():
+        await store.create(Job("finished", {}, status=SUCCEEDED, created_at=1))
+        await store.append_event("finished", "result", {})
+        await store.create(Job("running", {}, status="running", created_at=2))
+        await store.create(Job("new", {}, created_at=3))
+        return [await store.get(job_id) is not None for job_id in ("finished", "running", "new")], \
+            await store.events("finished")
+
+    assert asyncio.run(scenario()) == ([False, True, True], [])
+
+
+def test_sqlite_store_shares_jobs_between_managers(tmp_path):
+    path = str(tmp_path / "jobs.db")
+
+    async def scenario():
+        runner = JobManager(_two_stages, SqliteJobStore(path), poll_interval=0.01)
+        # Never started: it only follows the jobs through the shared store
+        watcher = JobManager(_never_called, SqliteJobStore(path), poll_interval=0.01)
+        try:
+            job = await runner.submit({})
+            events = await _collect(watcher, job.id)
+            return events, (await watcher.get(job.id)).status
+        finally:
+            await runner.close()
+            watcher.store.close()
+
+    events, status = asyncio.run(scenario())
+    assert [event[1] for event in events] == ["status", "stage", "stage", "result"]
+    assert status == SUCCEEDED
+
+
+def test_job_endpoints_stream_an_airdrop(airdrop_service):
+    sender, contract, service, *receivers = encode_bech32_addresses(os.urandom(32 * 5))
+    gateway = FakeGateway()
+    gateway.set_account(sender, nonce=9, esdts={"TKN-1a2b3c": 10 ** 20})
+    body = {
+        "InputMessage": f"Send 5 TKN-1a2b3c to {', '.join(receivers)}",
+        "Sender": sender,
+        "ContractAddress": contract,
+        "ServiceAddress": service,
+        "ChainId": "D",
+    }
+
+    async def scenario():
+        async with airdrop_service(gateway) as client:
+            submitted = await client.post("/airdrop/jobs", json=body)
+            job_id = (await submitted.get_json())["id"]
+            stream = await (await client.get(f"/airdrop/jobs/{job_id}/events")).get_data(as_text=True)
+            job = await (await client.get(f"/airdrop/jobs/{job_id}")).get_json()
+            missing = await client.get("/airdrop/jobs/unknown")
+            return submitted.status_code, stream, job, missing.status_code
+
+    status, stream, job, missing = asyncio.run(scenario())
+    events = [dict(line.split(": ", 1) for line in block.splitlines()) for block in stream.strip().split("\n\n")]
+    assert status == 202
+    assert [event["event"] for event in events] == ["status", "stage", "stage", "stage", "stage", "result"]
+    assert {json.loads(event["data"])["stage"] for event in events[1:5]} == {"parse", "sender_state", "plan", "build"}
+    assert job["status"] == SUCCEEDED
+    assert job["result"]["nonce"] == 9
+    assert missing == 404
+
+
+def test_jobs_of_a_stopped_manager_are_taken_over_on_start(tmp_path):
+    path = str(tmp_path / "jobs.db")
+
+    async def scenario():
+        started = asyncio.Event()
+
+        async def stuck(request, progress):
+            started.set()
+            await asyncio.Event().wait()
+
+        stopped = JobManager(stuck, SqliteJobStore(path), workers=1)
+        await stopped.start()
+        running = await stopped.submit({})
+        waiting = await stopped.submit({})
+        await started.wait()
+
+        # Jobs of a manager that still runs are left alone
+        bystander = JobManager(_never_called, SqliteJobStore(path))
+        await bystander.start()
+        await bystander.close()
+        await stopped.close()
+
+        restarted = JobManager(_two_stages, SqliteJobStore(path), poll_interval=0.01)
+        await restarted.start()
+        try:
+            return await _collect(restarted, running.id), await _collect(restarted, waiting.id)
+        finally:
+            await restarted.close()
+
+    running_events, waiting_events = asyncio.run(scenario())
+    assert [event[1] for event in running_events] == ["status", "result"]
+    assert running_events[-1][2] == {
+        "status": FAILED, "httpStatus": 500, "result": {"error": "The service stopped while the job was running"},
+    }
+    assert [event[1] for event in waiting_events] == ["status", "stage", "stage", "result"]
+    assert waiting_events[-1][2]["status"] == SUCCEEDED
+
+
+def test_owners_in_other_processes_are_alive_until_they_exit():
+    process = subprocess.Popen([sys.executable, "-c", "input()"], stdin=subprocess.PIPE)
+    try:
+        assert owner_is_alive(f"{process.pid}:manager")
+    finally:
+        process.communicate(b"\n")
+    assert not owner_is_alive(f"{process.pid}:manager")
+    assert not owner_is_alive(None)
@@ -0,0 +1,144 @@
+import asyncio
+import os
+
+import pytest
+
+from llm_agents import agents
+from llm_agents.scheduler import BACKGROUND, INTERACTIVE, DeadlineExceeded, LLMScheduler, SchedulerBusy
+from python_files.fake_gateway import FakeGateway
+from utils.bech32_codec import encode_bech32_addresses
+
+
+class GatedClient:
+    """
+    Stands in for the Ollama client: records each prompt it is asked for and answers
+    "<prompt> done" once `gate` is set.
+    """
+
+    def __init__(self) -> None:
+        self.prompts = []
+        self.gate = asyncio.Event()
+
+    async def generate(self, prompt: str, options=None) -> str:
+        self.prompts.append(prompt)
+        await self.gate.wait()
+        return f"{prompt} done"
+
+
+def _run(scenario):
+    async def run():
+        scheduler = LLMScheduler(GatedClient(), max_concurrency=1, max_queue=2)
+        try:
+            return await scenario(scheduler, scheduler.client)
+        finally:
+            await scheduler.close()
+
+    return asyncio.run(run())
+
+
+async def _settle() -> None:
+    for _ in range(5):
+        await asyncio.sleep(0)
+
+
+def test_interactive_generations_run_before_background_ones():
+    async def scenario(scheduler, client):
+        running = asyncio.create_task(scheduler.generate("running", priority=BACKGROUND))
+        await _settle()
+        later = [asyncio.create_task(scheduler.generate(prompt, priority=priority)) for prompt, priority in
+                 [("background", BACKGROUND), ("interactive", INTERACTIVE)]]
+        await _settle()
+        client.gate.set()
+        await asyncio.gather(running, *later)
+        return client.prompts
+
+    assert _run(scenario) == ["running", "interactive", "background"]
+
+
+def test_identical_prompts_share_one_generation():
+    async def scenario(scheduler, client):
+        callers = [asyncio.create_task(scheduler.generate("same")) for _ in range(3)]
+        await _settle()
+        client.gate.set()
+        return await asyncio.gather(*callers), client.prompts
+
+    assert _run(scenario) == (["same done"] * 3, ["same"])
+
+
+def test_interactive_caller_moves_a_queued_background_generation_up():
+    async def scenario(scheduler, client):
+        running = asyncio.create_task(scheduler.generate("running"))
+        await _settle()
+        later = [asyncio.create_task(scheduler.generate(prompt, priority=BACKGROUND)) for prompt in ["first", "second"]]
+        await _settle()
+        joined = asyncio.create_task(scheduler.generate("second", priority=INTERACTIVE))
+        await _settle()
+        client.gate.set()
+        await asyncio.gather(running, joined, *later)
+        return client.prompts
+
+    assert _run(scenario) == ["running", "second", "first"]
+
+
+def test_full_queue_rejects_with_a_retry_after_estimate():
+    async def scenario(scheduler, client):
+        running = asyncio.create_task(scheduler.generate("running"))
+        await _settle()
+        queued = [asyncio.create_task(scheduler.generate(prompt)) for prompt in ["queued 1", "queued 2"]]
+        await _settle()
+        with pytest.raises(SchedulerBusy) as busy:
+            await scheduler.generate("one too many")
+        # A prompt already queued still joins its generation
+        joined = asyncio.create_task(scheduler.generate("queued 1"))
+        client.gate.set()
+        await asyncio.gather(running, joined, *queued)
+        return busy.value.retry_after
+
+    # One generation per second on average, two waiting ahead of the new one and a single slot
+    assert _run(scenario) == 3
+
+
+def test_generations_expire_while_queued_without_running():
+    async def scenario(scheduler, client):
+        running = asyncio.create_task(scheduler.generate("running"))
+        await _settle()
+        with pytest.raises(DeadlineExceeded):
+            await scheduler.generate("hurried", timeout=0.05)
+        client.gate.set()
+        await running
+        await _settle()
+        return client.prompts
+
+    assert _run(scenario) == ["running"]
+
+
+def test_generations_running_past_their_deadline_fail():
+    async def scenario(scheduler, client):
+        with pytest.raises(DeadlineExceeded):
+            await scheduler.generate("slow", timeout=0.05)
+        client.gate.set()
+        return await scheduler.generate("next"), client.prompts
+
+    assert _run(scenario) == ("next done", ["slow", "next"])
+
+
+def test_busy_scheduler_answers_airdrops_with_retry_after(airdrop_service, monkeypatch):
+    sender, contract, service, receiver = encode_bech32_addresses(os.urandom(32 * 4))
+    gateway = FakeGateway()
+    gateway.set_account(sender)
+    monkeypatch.setattr(agents, "llm_scheduler", LLMScheduler(GatedClient(), max_queue=0))
+    # Two amounts leave the grammar unsure, so the prompt goes to the LLM
+    message = f"Send 1 or 2 TKN-1a2b3c to {receiver} ({os.urandom(8).hex()})"
+
+    async def scenario():
+        async with airdrop_service(gateway) as client:
+            response = await client.post("/airdrop", json={
+                "InputMessage": message, "Sender": sender, "ContractAddress": contract,
+                "ServiceAddress": service, "ChainId": "D",
+            })
+            return response.status_code, response.headers.get("Retry-After"), await response.get_json()
+
+    status, retry_after, body = asyncio.run(scenario())
+
+    assert (status, retry_after) == (503, "1")
+    assert "LLM queue is full" in body["error"]
@@ -0,0 +1,103 @@
+import asyncio
+import contextvars
+import os
+
+import pytest
+
+from python_files.fake_gateway import FakeGateway
+from python_files.metrics import MetricsRegistry, server_timing_header, span, stage_seconds, start_request_spans
+from utils.bech32_codec import encode_bech32_addresses
+
+TOKEN = "TKN-1a2b3c"
+
+
+def _sample(exposition: str, name: str) -> float:
+    for line in exposition.splitlines():
+        if line.startswith(name + " "):
+            return float(line.split()[1])
+    raise AssertionError(f"{name} is not exposed")
+
+
+def test_in_flight_gauge_counts_a_streamed_request_once(airdrop_service):
+    sender, contract, service, *receivers = encode_bech32_addresses(os.urandom(32 * 13))
+    gateway = FakeGateway()
+    gateway.set_account(sender, esdts={TOKEN: 10 ** 20})
+    upload = "".join(f"{receiver},1\n" for receiver in receivers)
+
+    async def scenario():
+        async with airdrop_service(gateway) as client:
+            response = await client.post(
+                "/airdrop/bulk",
+                query_string={"Sender": sender, "TokenIdentifier": TOKEN, "ContractAddress": contract,
+                              "ServiceAddress": service, "ChainId": "D"},
+                data=upload,
+                headers={"Content-Type": "text/csv"},
+            )
+            lines = (await response.get_data(as_text=True)).splitlines()
+            before = _sample(await (await client.get("/metrics")).get_data(as_text=True), "http_requests_in_flight")
+            after = _sample(await (await client.get("/metrics")).get_data(as_text=True), "http_requests_in_flight")
+            return response.status_code, lines, before, after
+
+    status, lines, before, after = asyncio.run(scenario())
+    assert status == 200
+    assert '"receivers": 10' in lines[-1]
+    # Only the scrape itself is in flight, before and after
+    assert before == after == 1
+
+
+def test_exposition_format():
+    registry = MetricsRegistry()
+    requests = registry.counter("requests_total", "Requests by route", ["route"])
+    in_flight = registry.gauge("in_flight", "Requests in flight")
+    latency = registry.histogram("latency_seconds", "Latency", buckets=(0.1, 1))
+    requests.inc(route='/a"b')
+    requests.inc(2, route='/a"b')
+    in_flight.set(1.5)
+    for value in (0.05, 0.5, 0.7, 3):
+        latency.observe(value)
+    registry.add_collector(lambda: [("collected", "gauge", "From a collector\nsecond line", [("collected", {}, 7)])])
+
+    assert registry.render() == "\n".join([
+        "# HELP requests_total Requests by route",
+        "# TYPE requests_total counter",
+        'requests_total{route="/a\\"b"} 3',
+        "# HELP in_flight Requests in flight",
+        "# TYPE in_flight gauge",
+        "in_flight 1.5",
+        "# HELP latency_seconds Latency",
+        "# TYPE latency_seconds histogram",
+        'latency_seconds_bucket{le="0.1"} 1',
+        'latency_seconds_bucket{le="1"} 3',
+        'latency_seconds_bucket{le="+Inf"} 4',
+        "latency_seconds_sum 4.25",
+        "latency_seconds_count 4",
+        "# HELP collected From a collector\\nsecond line",
+        "# TYPE collected gauge",
+        "collected 7",
+    ]) + "\n"
+
+
+def test_metrics_are_registered_once():
+    registry = MetricsRegistry()
+    counter = registry.counter("requests_total", "Requests", ["route"])
+
+    assert registry.counter("requests_total", "Requests", ["route"]) is counter
+    with pytest.raises(ValueError):
+        registry.gauge("requests_total", "Requests", ["route"])
+    with pytest.raises(ValueError):
+        counter.inc(status="200")
+
+
+def test_spans_feed_the_stage_histogram_and_server_timing():
+    def request():
+        start_request_spans()
+        with span("test_stage"):
+            pass
+        with span("test_stage"):
+            pass
+        return server_timing_header()
+
+    assert contextvars.copy_context().run(request).count("test_stage;dur=") == 2
+    counts = [value for name, labels, value in stage_seconds.samples()
+              if name == "airdrop_stage_seconds_count" and labels == {"stage": "test_stage"}]
+    assert counts == [2]
@@ -0,0 +1,141 @@
+import asyncio
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from python_files.nonce_manager import NonceManager, NonceStore, SqliteNonceStore
+
+SENDER = "erd1sender"
+
+
+def _fetch_from(nonce: int):
+    async def fetch_nonce(sender: str) -> int:
+        await asyncio.sleep(0)
+        return nonce
+
+    return fetch_nonce
+
+
+def test_concurrent_allocations_never_share_a_nonce():
+    async def run():
+        nonces = NonceManager(fetch_nonce=_fetch_from(7))
+        firsts = await asyncio.gather(*(nonces.allocate(SENDER, count=3) for _ in range(50)))
+        return sorted(nonce for first in firsts for nonce in range(first, first + 3))
+
+    assert asyncio.run(run()) == list(range(7, 7 + 150))
+
+
+def test_observed_nonce_seeds_and_moves_the_sender_forward():
+    async def run():
+        nonces = NonceManager(fetch_nonce=_fetch_from(0))
+        assert await nonces.allocate(SENDER, count=2, observed_nonce=10) == 10
+        assert await nonces.allocate(SENDER, observed_nonce=10) == 12
+        assert await nonces.allocate(SENDER, observed_nonce=20) == 20
+
+    asyncio.run(run())
+
+
+def test_lapsed_lease_hands_unused_nonces_out_again(monkeypatch):
+    clock = [100.0]
+    monkeypatch.setattr(time, "monotonic", lambda: clock[0])
+
+    async def run():
+        nonces = NonceManager(lease_ttl=60)
+        assert await nonces.allocate(SENDER, count=5, observed_nonce=0) == 0
+        clock[0] += 59
+        assert await nonces.allocate(SENDER, observed_nonce=0) == 5
+        clock[0] += 60
+        assert await nonces.allocate(SENDER, observed_nonce=2) == 2
+
+    asyncio.run(run())
+
+
+def test_released_ranges_coalesce_from_the_top():
+    async def run():
+        nonces = NonceManager(fetch_nonce=_fetch_from(0))
+        await nonces.allocate(SENDER, count=10)
+
+        await nonces.release(SENDER, 2, 4)
+        assert nonces.peek(SENDER) == 10
+        await nonces.release(SENDER, 6, 10)
+        assert nonces.peek(SENDER) == 6
+        await nonces.release(SENDER, 4, 6)
+        assert nonces.peek(SENDER) == 2
+        assert await nonces.allocate(SENDER) == 2
+
+    asyncio.run(run())
+
+
+def test_gaps_below_nonces_in_use_are_handed_out_first():
+    async def run():
+        nonces = NonceManager(fetch_nonce=_fetch_from(0))
+        await nonces.allocate(SENDER, count=10)
+        await nonces.release(SENDER, 2, 5)
+        return [await nonces.allocate(SENDER, count=2), await nonces.allocate(SENDER, count=2),
+                await nonces.allocate(SENDER), await nonces.allocate(SENDER)]
+
+    # The one nonce left in the gap is too few for two
+    assert asyncio.run(run()) == [2, 10, 4, 12]
+
+
+def test_resync_restarts_from_the_chain():
+    async def run():
+        nonces = NonceManager(fetch_nonce=_fetch_from(3))
+        await nonces.allocate(SENDER, count=10)
+        assert await nonces.resync(SENDER) == 3
+        assert await nonces.allocate(SENDER) == 3
+
+    asyncio.run(run())
+
+
+def test_allocations_survive_a_restart(tmp_path):
+    store = NonceStore(tmp_path / "nonces.json")
+
+    async def run():
+        await NonceManager(fetch_nonce=_fetch_from(0), store=store).allocate(SENDER, count=4)
+        return await NonceManager(fetch_nonce=_fetch_from(0), store=store).allocate(SENDER)
+
+    assert asyncio.run(run()) == 4
+
+
+def test_refuses_empty_allocations():
+    with pytest.raises(ValueError):
+        asyncio.run(NonceManager().allocate(SENDER, count=0))
+
+
+def test_sqlite_store_is_shared_between_managers(tmp_path):
+    path = str(tmp_path / "nonces.db")
+
+    def worker(_) -> list:
+        store = SqliteNonceStore(path)
+
+        async def run():
+            nonces = NonceManager(fetch_nonce=_fetch_from(0), shared=store)
+            return [await nonces.allocate(SENDER, count=2) for _ in range(25)]
+
+        try:
+            return asyncio.run(run())
+        finally:
+            store.close()
+
+    with ThreadPoolExecutor(4) as executor:
+        firsts = [first for firsts in executor.map(worker, range(4)) for first in firsts]
+    assert sorted(firsts) == list(range(0, 200, 2))
+
+
+def test_sqlite_store_rewinds_released_ranges(tmp_path):
+    store = SqliteNonceStore(str(tmp_path / "nonces.db"))
+
+    async def run():
+        nonces = NonceManager(fetch_nonce=_fetch_from(0), shared=store)
+        await nonces.allocate(SENDER, count=6)
+        await nonces.release(SENDER, 0, 3)
+        await nonces.release(SENDER, 3, 6)
+        other = NonceManager(fetch_nonce=_fetch_from(0), shared=store)
+        return await other.allocate(SENDER)
+
+    try:
+        assert asyncio.run(run()) == 0
+    finally:
+        store.close()
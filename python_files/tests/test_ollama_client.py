@@ -0,0 +1,125 @@
+import asyncio
+import json
+import socket
+from contextlib import asynccontextmanager
+
+import pytest
+from aiohttp import web
+
+from llm_agents.ollama_client import OllamaClient, OllamaError
+from llm_agents.stub_server import run_stub_server
+
+
+def _run(scenario):
+    return asyncio.run(scenario())
+
+
+async def _collect(client: OllamaClient, prompt: str) -> list:
+    try:
+        return [token async for token in client.stream(prompt)]
+    finally:
+        await client.close()
+
+
+@asynccontextmanager
+async def _answering(status: int, body: str, content_type: str = "application/json"):
+    """
+    Serves an Ollama stand-in answering every generation with `body` and `status`.
+    """
+    async def generate(request: web.Request) -> web.Response:
+        return web.Response(status=status, text=body, content_type=content_type)
+
+    app = web.Application()
+    app.router.add_post("/api/generate", generate)
+    runner = web.AppRunner(app)
+    await runner.setup()
+    site = web.TCPSite(runner, "127.0.0.1", 0)
+    await site.start()
+    try:
+        yield f"http://127.0.0.1:{site._server.sockets[0].getsockname()[1]}"
+    finally:
+        await runner.cleanup()
+
+
+def test_generate_returns_the_response_text():
+    prompts = []
+
+    def responder(prompt):
+        prompts.append(prompt)
+        return prompt.upper()
+
+    async def scenario():
+        async with run_stub_server(responder) as url:
+            client = OllamaClient(url, max_concurrency=2)
+            try:
+                return await asyncio.gather(*(client.generate(f"prompt {index}") for index in range(5)))
+            finally:
+                await client.close()
+
+    assert _run(scenario) == [f"PROMPT {index}" for index in range(5)]
+    assert sorted(prompts) == [f"prompt {index}" for index in range(5)]
+
+
+def test_stream_yields_tokens_until_done():
+    async def scenario():
+        async with run_stub_server(lambda prompt: "one two three") as url:
+            return await _collect(OllamaClient(url), "count")
+
+    assert _run(scenario) == ["one ", "two ", "three "]
+
+
+@pytest.mark.parametrize("status, body, content_type, error", [
+    (404, json.dumps({"error": "model 'gemma2:27b' not found"}), "application/json", "model 'gemma2:27b' not found"),
+    (502, "<html>Bad Gateway</html>", "text/html", "HTTP 502: <html>Bad Gateway</html>"),
+    (200, "[]", "application/json", "Ollama returned a response that is not a JSON object: []"),
+    (200, "OK", "text/plain", "Ollama returned a response that is not a JSON object: OK"),
+])
+def test_generate_raises_ollama_errors_for_error_bodies(status, body, content_type, error):
+    async def scenario():
+        async with _answering(status, body, content_type) as url:
+            client = OllamaClient(url)
+            try:
+                await client.generate("prompt")
+            finally:
+                await client.close()
+
+    with pytest.raises(OllamaError) as raised:
+        _run(scenario)
+    assert str(raised.value) == error
+
+
+@pytest.mark.parametrize("status, body, error", [
+    (500, json.dumps({"error": "out of memory"}), "out of memory"),
+    (200, json.dumps({"response": "one ", "done": False}) + "\n" + json.dumps({"error": "model unloaded"}) + "\n",
+     "model unloaded"),
+    (200, json.dumps({"response": "one ", "done": False}) + "\nnot json\n", "Ollama streamed a line that is not JSON"),
+])
+def test_stream_raises_ollama_errors_for_error_bodies(status, body, error):
+    async def scenario():
+        async with _answering(status, body, "application/x-ndjson") as url:
+            await _collect(OllamaClient(url), "prompt")
+
+    with pytest.raises(OllamaError, match=error):
+        _run(scenario)
+
+
+def test_unreachable_or_slow_servers_raise_ollama_errors():
+    with socket.socket() as probe:
+        probe.bind(("127.0.0.1", 0))
+        dead_url = f"http://127.0.0.1:{probe.getsockname()[1]}"
+
+    async def scenario(url, timeout):
+        client = OllamaClient(url, timeout=timeout)
+        try:
+            await client.generate("prompt")
+        finally:
+            await client.close()
+
+    async def slow():
+        async with run_stub_server(delay=1) as url:
+            await scenario(url, timeout=0.05)
+
+    with pytest.raises(OllamaError, match="Ollama request failed"):
+        asyncio.run(scenario(dead_url, timeout=1))
+    with pytest.raises(OllamaError, match="Ollama request failed"):
+        _run(slow)
@@ -0,0 +1,160 @@
+import asyncio
+import json
+import os
+
+import pytest
+
+from llm_agents import agents
+from llm_agents import prompt_cache as prompt_cache_module
+from llm_agents.ollama_client import OllamaError
+from llm_agents.prompt_cache import PromptCache, normalize_prompt
+from llm_agents.scheduler import LLMScheduler
+from utils.bech32_codec import encode_bech32_addresses
+
+
+@pytest.fixture
+def now(monkeypatch):
+    """
+    Freezes the cache's wall clock; tests move it by assigning `now[0]`.
+    """
+    current = [1_000_000.0]
+    monkeypatch.setattr(prompt_cache_module.time, "time", lambda: current[0])
+    return current
+
+
+def _run(coroutine):
+    return asyncio.run(coroutine)
+
+
+def test_normalization_folds_whitespace_case_and_address_case():
+    first, second = encode_bech32_addresses(os.urandom(64))
+
+    assert normalize_prompt(f"  Send 5 TKN to\n{first},   {second} ") == normalize_prompt(
+        f"send 5 tkn TO {first.upper()}, {second}")
+    # The address list is part of the key, order included
+    assert normalize_prompt(f"Send 5 TKN to {first}, {second}") != normalize_prompt(f"Send 5 TKN to {second}, {first}")
+    assert normalize_prompt(f"Send 5 TKN to {first}") != normalize_prompt(f"Send 6 TKN to {first}")
+
+
+def test_keys_are_scoped_by_model():
+    assert PromptCache("model-a", path=None).key("prompt") != PromptCache("model-b", path=None).key("prompt")
+
+
+def test_least_recently_used_results_are_evicted_first():
+    cache = PromptCache(max_entries=2, path=None)
+
+    async def scenario():
+        await cache.put("a", "1")
+        await cache.put("b", "2")
+        await cache.get("a")
+        await cache.put("c", "3")
+        return [await cache.get(prompt) for prompt in "abc"]
+
+    assert _run(scenario()) == ["1", None, "3"]
+    assert cache.stats()["evictions"] == 1
+
+
+def test_results_are_evicted_to_stay_within_the_byte_budget():
+    cache = PromptCache(max_bytes=10, path=None)
+
+    async def scenario():
+        await cache.put("a", "x" * 4)
+        await cache.put("b", "x" * 4)
+        await cache.put("a", "y" * 4)
+        await cache.put("c", "x" * 4)
+        kept = [await cache.get(prompt) for prompt in "abc"]
+        # Larger than the whole budget: pushes everything out, itself included
+        await cache.put("d", "x" * 11)
+        return kept, [await cache.get(prompt) for prompt in "acd"]
+
+    assert _run(scenario()) == (["yyyy", None, "xxxx"], [None, None, None])
+    assert cache.stats()["bytes"] == 0
+
+
+def test_results_expire_after_the_ttl(now, tmp_path):
+    cache = PromptCache(ttl=60, path=str(tmp_path / "prompts.db"))
+
+    async def scenario():
+        await cache.put("prompt", "result")
+        now[0] += 60
+        fresh = await cache.get("prompt")
+        now[0] += 1
+        return fresh, await cache.get("prompt")
+
+    assert _run(scenario()) == ("result", None)
+    # Memory and disk copies both expired
+    assert cache.stats()["diskHits"] == 0
+    cache.close()
+
+
+def test_results_survive_restarts_unless_the_model_changed(tmp_path):
+    path = str(tmp_path / "prompts.db")
+
+    async def put(cache: PromptCache, prompt: str) -> None:
+        await cache.put(prompt, f"{prompt} by {cache.model}")
+        cache.close()
+
+    async def get(cache: PromptCache, prompt: str):
+        try:
+            return await cache.get(prompt)
+        finally:
+            cache.close()
+
+    _run(put(PromptCache("model-a", path=path), "prompt"))
+
+    restarted = PromptCache("model-a", path=path)
+    assert _run(get(restarted, "prompt")) == "prompt by model-a"
+    assert restarted.stats()["diskHits"] == 1
+
+    _run(get(PromptCache("model-b", path=path), "other"))
+    assert _run(get(PromptCache("model-a", path=path), "prompt")) is None
+
+
+def test_disk_keeps_the_newest_rows(now, tmp_path):
+    path = str(tmp_path / "prompts.db")
+    cache = PromptCache(max_rows=2, path=path)
+
+    async def scenario():
+        for prompt in "abc":
+            now[0] += 1
+            await cache.put(prompt, prompt)
+        cache.close()
+        restarted = PromptCache(max_rows=2, path=path)
+        try:
+            return [await restarted.get(prompt) for prompt in "abc"]
+        finally:
+            restarted.close()
+
+    assert _run(scenario()) == [None, "b", "c"]
+
+
+class ScriptedClient:
+    def __init__(self, *answers) -> None:
+        self.answers = list(answers)
+        self.calls = 0
+
+    async def generate(self, prompt: str, options=None) -> str:
+        self.calls += 1
+        answer = self.answers.pop(0)
+        if isinstance(answer, Exception):
+            raise answer
+        return answer
+
+
+def test_only_valid_llm_results_are_cached(monkeypatch):
+    client = ScriptedClient("not json", OllamaError("model not loaded"), ' {"amount": 1} ', "unused")
+    monkeypatch.setattr(agents, "prompt_cache", PromptCache(path=None))
+    monkeypatch.setattr(agents, "llm_scheduler", LLMScheduler(client))
+
+    async def scenario():
+        try:
+            return [await agents.execute_prompt("prompt", is_valid=agents._is_json_object) for _ in range(4)]
+        finally:
+            await agents.llm_scheduler.close()
+
+    invalid, error, valid, cached = _run(scenario())
+
+    assert invalid == "not json"
+    assert json.loads(error) == {"error": "AI agent error: model not loaded"}
+    assert valid == cached == '{"amount": 1}'
+    assert client.calls == 3
@@ -0,0 +1,66 @@
+import os
+
+import pytest
+
+from llm_agents import prompt_parser
+from llm_agents.prompt_parser import ParserStats, fast_parse_airdrop_prompt, parse_airdrop_prompt
+from utils.bech32_codec import encode_bech32_addresses
+
+ALICE, BOB = encode_bech32_addresses(os.urandom(64))
+
+
+def test_confident_prompt():
+    parsed = parse_airdrop_prompt(f"Send 1 BUILDO-22c0a5 to the following addresses {ALICE}, {BOB}")
+    assert parsed.is_confident
+    assert parsed.to_json() == {"tokenIdentifier": "BUILDO-22c0a5", "amount": 1, "receivers": [ALICE, BOB]}
+
+
+@pytest.mark.parametrize("amount, expected", [
+    ("1,000", 1000),
+    ("2.5k", 2500),
+    ("3 million", 3_000_000),
+    ("1.5 bn", 1_500_000_000),
+    ("7M", 7_000_000),
+])
+def test_amount_units(amount, expected):
+    parsed = parse_airdrop_prompt(f"Send {amount} BUILDO-22c0a5 to {ALICE}")
+    assert parsed.ambiguities == []
+    assert parsed.amount == expected
+
+
+def test_digits_inside_addresses_and_tokens_are_not_amounts():
+    parsed = parse_airdrop_prompt(f"Airdrop 5 of A1B2C3-123456 to {ALICE} and {BOB}")
+    assert parsed.ambiguities == []
+    assert parsed.amount == 5
+    assert parsed.token_identifier == "A1B2C3-123456"
+
+
+def test_receiver_count_must_match_the_addresses():
+    assert parse_airdrop_prompt(f"Send 1 BUILDO-22c0a5 to 2 addresses {ALICE}, {BOB}").is_confident
+    parsed = parse_airdrop_prompt(f"Send 1 BUILDO-22c0a5 to 3 addresses {ALICE}, {BOB}")
+    assert parsed.ambiguities == ["receiver_count_mismatch"]
+
+
+@pytest.mark.parametrize("message, reason", [
+    (f"Send 1.5 BUILDO-22c0a5 to {ALICE}", "fractional_amount"),
+    (f"Send 1 or 2 BUILDO-22c0a5 to {ALICE}", "multiple_amounts"),
+    (f"Send BUILDO-22c0a5 to {ALICE}", "no_amount"),
+    (f"Send 0 BUILDO-22c0a5 to {ALICE}", "zero_amount"),
+    (f"Send 1 token to {ALICE}", "no_token_identifier"),
+    (f"Send 1 BUILDO-22c0a5 or WEGLD-a28c59 to {ALICE}", "multiple_token_identifiers"),
+    ("Send 1 BUILDO-22c0a5 to everyone", "no_receivers"),
+    (f"Send 1 BUILDO-22c0a5 to {ALICE[:-1]}", "malformed_address"),
+])
+def test_ambiguities(message, reason):
+    parsed = parse_airdrop_prompt(message)
+    assert reason in parsed.ambiguities
+    assert not parsed.is_confident
+
+
+def test_fast_parse_falls_back_and_counts(monkeypatch):
+    stats = ParserStats()
+    monkeypatch.setattr(prompt_parser, "parser_stats", stats)
+
+    assert fast_parse_airdrop_prompt(f"Send 1 BUILDO-22c0a5 to {ALICE}")["receivers"] == [ALICE]
+    assert fast_parse_airdrop_prompt("Send 1 BUILDO-22c0a5 to everyone") is None
+    assert stats.snapshot() == {"hits": 1, "misses": 1, "miss_reasons": {"no_receivers": 1}}
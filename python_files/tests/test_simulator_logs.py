@@ -0,0 +1,94 @@
+import json
+import threading
+
+import pytest
+
+from simulator_logs import LogSpillFile, SimulatorLogStore, parse_selection_line
+
+
+def _selection(tx_hash: str, nonce: int = 0) -> str:
+    return f"selection#{nonce}: " + json.dumps({"hash": tx_hash, "nonce": nonce})
+
+
+def _is_recent_tail(spilled: list, written: list) -> bool:
+    return bool(spilled) and written[-len(spilled):] == spilled
+
+
+def test_spill_file_reads_back_lines_in_order_until_it_wraps(tmp_path):
+    spill = LogSpillFile(tmp_path / "logs" / "simulator.log", size=64)
+    written = [f"line {index}" for index in range(5)]
+    for line in written:
+        spill.write(line)
+
+    assert spill.lines() == written
+    assert (tmp_path / "logs" / "simulator.log").stat().st_size == 64
+    spill.close()
+
+
+def test_wrapped_spill_file_holds_the_most_recent_whole_lines(tmp_path):
+    spill = LogSpillFile(tmp_path / "simulator.log", size=64)
+    written = [f"line {index:02}" for index in range(40)]
+    for count, line in enumerate(written, 1):
+        spill.write(line)
+        spilled = spill.lines()
+        # Each line takes 8 bytes: a full ring holds 8, less the blanked tail and the torn oldest line
+        assert _is_recent_tail(spilled, written[:count])
+        assert len(spilled) >= min(6, count)
+
+    assert (tmp_path / "simulator.log").read_bytes().decode().count("line 39\n") == 1
+    spill.close()
+
+
+def test_lines_longer_than_the_spill_file_keep_their_tail(tmp_path):
+    spill = LogSpillFile(tmp_path / "simulator.log", size=16)
+    spill.write("x" * 100 + "end")
+
+    assert spill.lines() == ["x" * 12 + "end"]
+    spill.close()
+
+
+def test_store_keeps_recent_lines_in_memory_and_all_recent_output_on_disk(tmp_path):
+    store = SimulatorLogStore(max_lines=3, spill_path=str(tmp_path / "simulator.log"), spill_size=4096)
+    written = [f"block {index} committed" for index in range(10)]
+    for line in written:
+        store.ingest(f"  {line}\n")
+    store.ingest("   ")
+
+    assert store.recent_lines() == written[-3:]
+    assert store.recent_lines(2) == written[-2:]
+    assert store.spilled_lines() == written
+    assert store.stats() == {"ingested": 10, "buffered": 3, "selections": 0}
+    store.close()
+    assert store.spilled_lines() == []
+
+
+def test_store_without_a_spill_path_keeps_memory_only():
+    store = SimulatorLogStore(max_lines=2, spill_path=None)
+    store.ingest("one")
+
+    assert store.spilled_lines() == []
+    assert store.recent_lines() == ["one"]
+
+
+def test_selection_lines_are_parsed_once_and_the_first_per_hash_is_kept():
+    store = SimulatorLogStore(max_selections=2, spill_path=None)
+    for line in [_selection("a", 1), _selection("a", 2), "selection#3: not json", _selection("b", 4),
+                 _selection("c", 5)]:
+        store.ingest(line)
+
+    assert parse_selection_line("selection#9: [1, 2]") is None
+    assert parse_selection_line("other: " + json.dumps({"hash": "a"})) is None
+    assert store.get_selection("a") is None
+    assert store.get_selection("b") == {"hash": "b", "nonce": 4}
+    assert store.stats()["selections"] == 2
+
+
+def test_waiting_for_a_selection_wakes_up_on_ingestion():
+    store = SimulatorLogStore(spill_path=None)
+    timer = threading.Timer(0.05, store.ingest, [_selection("late", 7)])
+    timer.start()
+
+    assert store.wait_for_selection("late", timeout=5) == {"hash": "late", "nonce": 7}
+    with pytest.raises(TimeoutError, match="missing"):
+        store.wait_for_selection("missing", timeout=0.01)
+    timer.join()
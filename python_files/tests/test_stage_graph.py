@@ -0,0 +1,64 @@
+import asyncio
+import time
+
+import pytest
+
+from python_files.stage_graph import Stage, StageTimeout, run_stages
+
+
+async def _value(value, delay: float = 0.0):
+    await asyncio.sleep(delay)
+    return value
+
+
+def test_a_timeout_raised_inside_a_stage_is_not_a_stage_timeout():
+    async def gateway_call():
+        raise asyncio.TimeoutError()
+
+    with pytest.raises(asyncio.TimeoutError) as raised:
+        asyncio.run(run_stages([Stage("sender_state", gateway_call, timeout=5)]))
+    assert not isinstance(raised.value, StageTimeout)
+
+
+def test_a_stage_over_its_deadline_times_out():
+    with pytest.raises(StageTimeout) as raised:
+        asyncio.run(run_stages([Stage("slow", lambda: _value(1, delay=5), timeout=0.05)]))
+    assert raised.value.stage == "slow"
+
+
+def test_independent_stages_overlap_and_receive_their_dependencies():
+    async def plan(parse, sender_state):
+        return parse + sender_state
+
+    stages = [
+        Stage("parse", lambda: _value(1, delay=0.2)),
+        Stage("sender_state", lambda: _value(2, delay=0.2)),
+        Stage("plan", plan, depends_on=("parse", "sender_state")),
+    ]
+    start = time.perf_counter()
+    results = asyncio.run(run_stages(stages))
+    assert results == {"parse": 1, "sender_state": 2, "plan": 3}
+    assert time.perf_counter() - start < 0.35
+
+
+def test_dependencies_must_be_listed_first():
+    with pytest.raises(ValueError):
+        asyncio.run(run_stages([Stage("plan", _value, depends_on=("parse",)), Stage("parse", lambda: _value(1))]))
+
+
+def test_a_failing_stage_cancels_the_others():
+    cancelled = []
+
+    async def slow():
+        try:
+            await asyncio.sleep(5)
+        except asyncio.CancelledError:
+            cancelled.append("slow")
+            raise
+
+    async def fail():
+        raise RuntimeError("boom")
+
+    with pytest.raises(RuntimeError):
+        asyncio.run(run_stages([Stage("slow", slow), Stage("fail", fail)]))
+    assert cancelled == ["slow"]
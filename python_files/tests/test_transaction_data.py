@@ -0,0 +1,53 @@
+import pytest
+
+from utils.transaction_data import encode_smart_save_data, int_to_even_hex
+
+CONTRACT_HEX = "00" * 31 + "01"
+SERVICE_HEX = "00" * 31 + "02"
+RECEIVER_HEXES = ["aa" * 32, "bb" * 32]
+
+
+@pytest.mark.parametrize("value, expected", [(0, ""), (1, "01"), (15, "0f"), (16, "10"), (0x13e, "013e"), (256, "0100")])
+def test_amounts_are_padded_to_an_even_number_of_hex_characters(value, expected):
+    assert int_to_even_hex(value) == expected
+
+
+def test_negative_amounts_are_refused():
+    with pytest.raises(ValueError):
+        int_to_even_hex(-1)
+
+
+def test_smart_save_data_field_layout():
+    data = encode_smart_save_data(
+        contract_hex=CONTRACT_HEX,
+        service_hex=SERVICE_HEX,
+        token_identifier="BUILDO-22c0a5",
+        esdt_amount=3,
+        wrapped_egld_amount=0x2386f26fc10000,
+        receiver_hexes=RECEIVER_HEXES,
+        amounts=[1, 2],
+    )
+    assert data == "@".join([
+        "MultiESDTNFTTransfer",
+        CONTRACT_HEX,
+        "02",
+        "WEGLD-a28c59".encode().hex(),
+        "",
+        "2386f26fc10000",
+        "BUILDO-22c0a5".encode().hex(),
+        "",
+        "03",
+        "smartSave".encode().hex(),
+        SERVICE_HEX,
+        RECEIVER_HEXES[0], "01",
+        RECEIVER_HEXES[1], "02",
+    ])
+
+
+@pytest.mark.parametrize("receiver_hexes, amounts", [
+    (RECEIVER_HEXES, [1]),
+    (["aa" * 31], [1]),
+])
+def test_mismatched_receivers_and_malformed_addresses_are_refused(receiver_hexes, amounts):
+    with pytest.raises(ValueError):
+        encode_smart_save_data(CONTRACT_HEX, SERVICE_HEX, "BUILDO-22c0a5", 1, 1, receiver_hexes, amounts)
@@ -0,0 +1,134 @@
+import asyncio
+import os
+
+import pytest
+
+from python_files.constants import ROUND_DURATION_IN_SEC
+from python_files.fake_gateway import FakeGateway, run_fake_gateway
+from python_files.gateway_client import GatewayClient, GatewayUnavailable, TransactionNotFound
+from python_files.tx_tracker import TransactionTimeout, TransactionTracker
+from utils.bech32_codec import encode_bech32_addresses
+
+
+class ScriptedGateway:
+    """
+    Answers each hash's status queries with the next entry of its script, repeating the last one.
+    Exceptions in a script are raised instead.
+    """
+
+    def __init__(self, scripts: dict) -> None:
+        self.scripts = {tx_hash: list(script) for tx_hash, script in scripts.items()}
+
+    async def get_transaction_status(self, tx_hash: str) -> str:
+        script = self.scripts[tx_hash]
+        answer = script.pop(0) if len(script) > 1 else script[0]
+        if isinstance(answer, Exception):
+            raise answer
+        return answer
+
+
+@pytest.fixture
+def sleeps(monkeypatch):
+    """
+    Records the tracker's waits between rounds without actually waiting.
+    """
+    recorded = []
+    sleep = asyncio.sleep
+
+    async def record(delay, *args, **kwargs):
+        recorded.append(delay)
+        await sleep(0)
+
+    monkeypatch.setattr(asyncio, "sleep", record)
+    return recorded
+
+
+def _wait_for(tracker: TransactionTracker, tx_hashes):
+    async def run():
+        try:
+            return await tracker.wait_for(tx_hashes)
+        finally:
+            await tracker.close()
+
+    return asyncio.run(run())
+
+
+def test_wait_doubles_while_nothing_completes(sleeps):
+    tracker = TransactionTracker(ScriptedGateway({"a": ["pending"] * 5 + ["success"]}), min_interval=1, max_interval=4)
+
+    assert _wait_for(tracker, ["a"]) == {"a": "success"}
+    assert sleeps == [1, 2, 4, 4, 4, 4]
+
+
+def test_wait_resets_when_a_transaction_completes(sleeps):
+    gateway = ScriptedGateway({"a": ["pending"] * 2 + ["fail"], "b": ["pending"] * 5 + ["success"]})
+    tracker = TransactionTracker(gateway, min_interval=1, max_interval=8)
+
+    assert _wait_for(tracker, ["a", "b"]) == {"a": "fail", "b": "success"}
+    assert sleeps == [1, 2, 4, 1, 2, 4]
+
+
+def test_unknown_transactions_expire_after_the_grace_period(sleeps):
+    gateway = ScriptedGateway({
+        "lost": [TransactionNotFound("not found")],
+        "late": [TransactionNotFound("not found"), TransactionNotFound("not found"), "pending", "success"],
+        "flaky": [GatewayUnavailable("503"), GatewayUnavailable("503"), "success"],
+    })
+    # Time only passes in the tracker's waits: "lost" is first queried at 1 second and expires at 11
+    tracker = TransactionTracker(gateway, min_interval=1, max_interval=8, not_found_grace=10,
+                                 clock=lambda: sum(sleeps))
+
+    assert _wait_for(tracker, ["lost", "late", "flaky"]) == {"lost": "expired", "late": "success", "flaky": "success"}
+    assert sleeps == [1, 2, 4, 1, 1, 2]
+
+
+def test_simulator_rounds_count_as_block_time(sleeps):
+    gateway = ScriptedGateway({"lost": [TransactionNotFound("not found")]})
+    blocks = []
+
+    async def generate_blocks(count):
+        blocks.append(count)
+
+    gateway.generate_blocks = generate_blocks
+    tracker = TransactionTracker(gateway, simulator=True, min_interval=0, not_found_grace=3 * ROUND_DURATION_IN_SEC)
+
+    assert _wait_for(tracker, ["lost"]) == {"lost": "expired"}
+    assert blocks == [1, 1, 1]
+
+
+def test_batches_take_turns(sleeps):
+    gateway = ScriptedGateway({tx_hash: ["pending", "success"] for tx_hash in "abc"})
+    tracker = TransactionTracker(gateway, min_interval=1, batch_size=2)
+
+    assert _wait_for(tracker, "abc") == {"a": "success", "b": "success", "c": "success"}
+    # a and b, then c and a, then b
+    assert sleeps == [1, 2, 1]
+
+
+def test_transactions_time_out_after_max_rounds(sleeps):
+    tracker = TransactionTracker(ScriptedGateway({"a": ["pending"]}), min_interval=1, max_rounds=3)
+
+    with pytest.raises(TransactionTimeout):
+        _wait_for(tracker, ["a"])
+    assert sleeps == [1, 2, 4]
+
+
+def test_simulator_mode_generates_blocks_until_executed():
+    gateway = FakeGateway()
+    sender = encode_bech32_addresses(os.urandom(32))[0]
+    transactions = [{"sender": sender, "receiver": sender, "nonce": nonce, "signature": "00"} for nonce in range(3)]
+
+    async def run():
+        async with run_fake_gateway(gateway) as url:
+            client = GatewayClient(url, max_retries=0)
+            tracker = TransactionTracker(client, simulator=True, min_interval=0)
+            try:
+                hashes = await client.send_transactions(transactions)
+                return await tracker.wait_for(hashes.values())
+            finally:
+                await tracker.close()
+                await client.close()
+
+    statuses = asyncio.run(run())
+    assert list(statuses.values()) == ["success"] * 3
+    assert gateway.block_nonce == 2
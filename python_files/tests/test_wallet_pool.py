@@ -0,0 +1,87 @@
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+import pytest
+
+from python_files import wallet_pool
+from python_files.constants import WALLETS_FOLDER
+from python_files.wallet import Wallet
+from python_files.wallet_pool import LEAST_PENDING, ROUND_ROBIN, WalletPool
+
+PEM_PATHS = sorted(Path(WALLETS_FOLDER).glob("*.pem"))
+
+
+@pytest.fixture
+def pool():
+    return WalletPool.from_folder()
+
+
+def test_every_pem_file_becomes_a_wallet(pool):
+    assert [wallet.path for wallet in pool] == PEM_PATHS
+    assert pool.addresses == [Wallet(path).public_address() for path in PEM_PATHS]
+    assert all(pool.get(wallet.address) is wallet for wallet in pool)
+    assert pool.wallets[0].get_address().to_bech32() == pool.addresses[0]
+
+
+def test_files_with_several_keys_give_a_wallet_per_key(tmp_path, monkeypatch):
+    (tmp_path / "both.pem").write_text(PEM_PATHS[0].read_text() + PEM_PATHS[1].read_text())
+    (tmp_path / "one.pem").write_text(PEM_PATHS[2].read_text())
+    expected = [Wallet(path).public_address() for path in PEM_PATHS[:3]]
+
+    assert WalletPool.from_folder(tmp_path).addresses == expected
+    # Many files are parsed in worker processes, with the same result
+    monkeypatch.setattr(wallet_pool, "PROCESS_POOL_MIN_FILES", 1)
+    parallel = WalletPool.from_folder(tmp_path, workers=2)
+    assert parallel.addresses == expected
+    assert [(wallet.path.name, wallet.index) for wallet in parallel] == [("both.pem", 0), ("both.pem", 1),
+                                                                         ("one.pem", 0)]
+
+
+def test_empty_folders_are_rejected(tmp_path):
+    with pytest.raises(FileNotFoundError):
+        WalletPool.from_folder(tmp_path)
+    with pytest.raises(ValueError):
+        WalletPool([])
+
+
+def test_checkouts_go_to_the_wallet_with_the_fewest_pending(pool):
+    checked_out = [pool.reserve() for _ in range(len(pool))]
+    assert len(set(map(id, checked_out))) == len(pool)
+
+    pool.release(checked_out[3])
+    assert pool.least_pending() is checked_out[3]
+    assert pool.reserve(LEAST_PENDING) is checked_out[3]
+    assert [wallet.pending for wallet in pool] == [1] * len(pool)
+
+
+def test_acquired_wallets_are_returned_even_when_the_caller_fails(pool):
+    with pytest.raises(RuntimeError):
+        with pool.acquire() as wallet:
+            assert wallet.pending == 1
+            raise RuntimeError("send failed")
+
+    assert wallet.pending == 0
+    assert pool.least_pending() is pool.wallets[0]
+
+
+def test_round_robin_cycles_through_every_wallet(pool):
+    picked = [pool.reserve(ROUND_ROBIN) for _ in range(2 * len(pool))]
+
+    assert picked == pool.wallets * 2
+    assert [wallet.pending for wallet in pool] == [2] * len(pool)
+    with pytest.raises(ValueError, match="Unknown sender selection strategy"):
+        pool.reserve("random")
+
+
+def test_concurrent_checkouts_are_all_returned(pool):
+    def send(_):
+        with pool.acquire() as wallet:
+            return wallet.address
+
+    with ThreadPoolExecutor(8) as executor:
+        used = list(executor.map(send, range(500)))
+
+    assert set(used) <= set(pool.addresses)
+    assert [wallet.pending for wallet in pool] == [0] * len(pool)
+    # The stale heap entries left behind are bounded
+    assert len(pool._heap) <= 4 * len(pool) + 1
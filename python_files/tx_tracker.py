@@ -0,0 +1,175 @@
+import asyncio
+import time
+from dataclasses import dataclass
+from typing import Callable, Dict, Iterable, Optional
+
+from python_files.constants import (
+    MAX_NUM_OF_BLOCKS_UNTIL_TX_SHOULD_BE_EXECUTED,
+    ROUND_DURATION_IN_SEC,
+    TX_STATUS_BATCH_SIZE,
+    TX_STATUS_MAX_POLL_INTERVAL_IN_SEC,
+    TX_STATUS_MIN_POLL_INTERVAL_IN_SEC,
+    TX_STATUS_NOT_FOUND_GRACE_IN_SEC,
+)
+from python_files.gateway_client import GatewayClient, GatewayError, TransactionNotFound, gateway_client
+from python_files.logger import logger
+
+PENDING_STATUS = "pending"
+EXPIRED_STATUS = "expired"
+
+
+class TransactionTimeout(Exception):
+    pass
+
+
+@dataclass
+class _Tracked:
+    future: asyncio.Future
+    tracked_at: float
+    rounds: int = 0
+
+
+class TransactionTracker:
+    """
+    Watches many transaction hashes at once until each leaves the "pending" status.
+
+    `track` returns a future per hash resolving to its final status ("success", "fail",
+    "invalid", or "expired" when the gateway still does not know it `not_found_grace` seconds
+    after it was tracked, enough for it to propagate and be indexed). A single background
+    task polls in rounds: every round queries up to `batch_size` pending hashes concurrently
+    over the gateway's pooled session, oldest first. The wait between rounds starts at
+    `min_interval`, doubles while no transaction completes and resets as soon as one does.
+
+    In `simulator` mode each round first generates one block for all pending transactions, the
+    wait does not grow and each round counts as `ROUND_DURATION_IN_SEC` towards the grace.
+    A transaction still pending after `max_rounds` of its rounds fails with `TransactionTimeout`.
+    """
+
+    def __init__(
+            self,
+            gateway: GatewayClient = gateway_client,
+            simulator: bool = False,
+            max_rounds: Optional[int] = None,
+            batch_size: int = TX_STATUS_BATCH_SIZE,
+            min_interval: float = TX_STATUS_MIN_POLL_INTERVAL_IN_SEC,
+            max_interval: float = TX_STATUS_MAX_POLL_INTERVAL_IN_SEC,
+            not_found_grace: float = TX_STATUS_NOT_FOUND_GRACE_IN_SEC,
+            clock: Callable[[], float] = time.monotonic,
+    ) -> None:
+        self.gateway = gateway
+        self.simulator = simulator
+        if max_rounds is None and simulator:
+            max_rounds = MAX_NUM_OF_BLOCKS_UNTIL_TX_SHOULD_BE_EXECUTED
+        self.max_rounds = max_rounds
+        self.batch_size = batch_size
+        self.min_interval = min_interval
+        self.max_interval = max_interval
+        self.not_found_grace = not_found_grace
+        self.clock = clock
+        self.rounds = 0
+        self.queries = 0
+        # Insertion ordered; polled hashes are moved to the back so every hash gets its turn
+        self._tracked: Dict[str, _Tracked] = {}
+        self._task: Optional[asyncio.Task] = None
+
+    def track(self, tx_hash: str) -> asyncio.Future:
+        tracked = self._tracked.get(tx_hash)
+        if tracked is None:
+            tracked = _Tracked(asyncio.get_running_loop().create_future(), self.clock())
+            self._tracked[tx_hash] = tracked
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._run())
+        return tracked.future
+
+    async def wait_for(self, tx_hashes: Iterable[str]) -> Dict[str, str]:
+        """
+        Tracks every hash and returns their final statuses once all of them are known.
+        """
+        tx_hashes = list(tx_hashes)
+        statuses = await asyncio.gather(*(self.track(tx_hash) for tx_hash in tx_hashes))
+        return dict(zip(tx_hashes, statuses))
+
+    @property
+    def pending(self) -> int:
+        return len(self._tracked)
+
+    async def _run(self) -> None:
+        interval = self.min_interval
+        while True:
+            # Drop hashes whose callers gave up on them
+            for tx_hash in [tx_hash for tx_hash, tracked in self._tracked.items() if tracked.future.done()]:
+                del self._tracked[tx_hash]
+            if not self._tracked:
+                return
+
+            if self.simulator:
+                try:
+                    await self.gateway.generate_blocks(1)
+                except GatewayError as e:
+                    logger.warning(f"Could not generate a block: {e}")
+            await asyncio.sleep(interval)
+
+            batch = list(self._tracked)[:self.batch_size]
+            for tx_hash in batch:
+                self._tracked[tx_hash] = self._tracked.pop(tx_hash)
+            completed = sum(await asyncio.gather(*(self._poll(tx_hash) for tx_hash in batch)))
+            self.rounds += 1
+            self.queries += len(batch)
+
+            # Simulator blocks only advance when asked to, so waiting longer there gains nothing
+            if completed or self.simulator:
+                interval = self.min_interval
+            else:
+                interval = min(interval * 2, self.max_interval)
+            logger.info(f"Transaction status round {self.rounds}: {completed} completed, {len(self._tracked)} pending")
+
+    async def _poll(self, tx_hash: str) -> bool:
+        """
+        Queries one hash and settles its future when the answer is final; returns whether it did.
+        """
+        tracked = self._tracked[tx_hash]
+        tracked.rounds += 1
+        try:
+            status = await self.gateway.get_transaction_status(tx_hash)
+        except TransactionNotFound:
+            status = EXPIRED_STATUS if self._age(tracked) >= self.not_found_grace else PENDING_STATUS
+        except GatewayError as e:
+            logger.warning(f"Status query for {tx_hash} failed: {e}")
+            status = PENDING_STATUS
+
+        if status != PENDING_STATUS:
+            self._settle(tx_hash, result=status)
+            return True
+        if self.max_rounds is not None and tracked.rounds >= self.max_rounds:
+            self._settle(tx_hash, error=TransactionTimeout(
+                f"Transaction {tx_hash} not executed within {self.max_rounds} blocks."
+            ))
+            return True
+        return False
+
+    def _age(self, tracked: _Tracked) -> float:
+        """
+        Time since the hash was tracked: in simulator mode, the blocks generated meanwhile.
+        """
+        if self.simulator:
+            return tracked.rounds * ROUND_DURATION_IN_SEC
+        return self.clock() - tracked.tracked_at
+
+    def _settle(self, tx_hash: str, result: Optional[str] = None, error: Optional[Exception] = None) -> None:
+        tracked = self._tracked.pop(tx_hash)
+        if tracked.future.done():
+            return
+        if error is not None:
+            tracked.future.set_exception(error)
+        else:
+            logger.info(f"Transaction {tx_hash} is {result} after {tracked.rounds} round(s)")
+            tracked.future.set_result(result)
+
+    async def close(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+        for tracked in self._tracked.values():
+            tracked.future.cancel()
+        self._tracked.clear()
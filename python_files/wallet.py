@@ -2,15 +2,20 @@ import json
 from pathlib import Path
 from typing import Optional
 
-import requests
 from multiversx_sdk import UserPEM
 from multiversx_sdk.core.address import Address
 from multiversx_sdk.wallet.user_signer import UserSigner
 
+from python_files.account_cache import account_state_cache
 from python_files.config import DEFAULT_PROXY, proxy_default
+from python_files.http_client import http_client
 from python_files.logger import logger
 
 
+def _block_nonce_of(general_data: dict) -> int:
+    return (general_data.get("blockInfo") or {}).get("nonce", 0)
+
+
 class Wallet:
     def __init__(
         self, path: Optional[Path] = None, pem_content: Optional[str] = None
@@ -31,6 +36,7 @@ class Wallet:
         # Initialize the signer and address
         self.signer = UserSigner(self.user_pem.secret_key)
         self.address = self.user_pem.label
+        self._address: Optional[Address] = None
 
         logger.debug(f"Wallet address derived: {self.address}")
 
@@ -39,24 +45,27 @@ class Wallet:
         return cls(pem_content=pem_content)
 
     def public_address(self) -> str:
-        address = self.address
-        return Address.from_bech32(address).to_bech32()
+        return self.get_address().to_bech32()
 
     def get_signer(self) -> UserSigner:
         return self.signer
 
     def get_balance(self) -> int:
         address = self.public_address()
+        general_data = account_state_cache.get_or_fetch_sync(
+            ("balance", address), lambda: self._fetch_balance_data(address), _block_nonce_of
+        )
+        return general_data.get("balance")
+
+    def _fetch_balance_data(self, address: str) -> dict:
         logger.info(f"Fetching balance for address: {address}")
-        response = requests.get(f"{DEFAULT_PROXY}/address/{address}/balance")
+        response = http_client.get(f"{DEFAULT_PROXY}/address/{address}/balance")
         response.raise_for_status()
         parsed = response.json()
 
         general_data = parsed.get("data")
-        balance = general_data.get("balance")
-        logger.info(f"Retrieved balance: {balance} for address: {address}")
-
-        return balance
+        logger.info(f"Retrieved balance: {general_data.get('balance')} for address: {address}")
+        return general_data
 
     def set_balance(self, egld_amount):
         logger.info(f"Setting balance for address: {self.address} to {egld_amount}")
@@ -64,13 +73,16 @@ class Wallet:
 
         details_list = [details]
         json_structure = json.dumps(details_list)
-        req = requests.post(f"{DEFAULT_PROXY}/simulator/set-state", data=json_structure)
+        req = http_client.post(f"{DEFAULT_PROXY}/simulator/set-state", data=json_structure)
+        account_state_cache.invalidate_address(self.address)
         logger.info(f"Set balance request status: {req.status_code}")
 
         return req.text
 
     def get_address(self) -> Address:
-        return Address.from_bech32(self.address)
+        if self._address is None:
+            self._address = Address.from_bech32(self.address)
+        return self._address
 
     def get_account(self):
         account = proxy_default.get_account(self.get_address())
@@ -96,7 +108,7 @@ class Wallet:
         """
         address = self.public_address()
         logger.info(f"Checking Nonce for Address: {address}")
-        response = requests.get(f"{DEFAULT_PROXY}/address/{address}/nonce")
+        response = http_client.get(f"{DEFAULT_PROXY}/address/{address}/nonce")
         response.raise_for_status()
         nonce = response.json()["data"]["nonce"]
         logger.info(f"Address Nonce: {nonce}")
@@ -109,12 +121,19 @@ class Wallet:
         Returns:
             int: The nonce of the address.
         """
+        general_data = account_state_cache.get_or_fetch_sync(
+            ("nonce", self.address), self._fetch_nonce_data, _block_nonce_of
+        )
+        self.nonce = general_data["nonce"]
+        return self.nonce
+
+    def _fetch_nonce_data(self) -> dict:
         logger.info(f"Checking Nonce for Address: {self.address}")
-        response = requests.get(f"{DEFAULT_PROXY}/address/{self.address}/nonce")
+        response = http_client.get(f"{DEFAULT_PROXY}/address/{self.address}/nonce")
         response.raise_for_status()
-        self.nonce = response.json()["data"]["nonce"]
-        logger.info(f"Address Nonce: {self.nonce}")
-        return self.nonce
+        general_data = response.json()["data"]
+        logger.info(f"Address Nonce: {general_data['nonce']}")
+        return general_data
 
     def get_nonce_and_increment(self) -> int:
         """
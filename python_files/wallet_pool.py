@@ -0,0 +1,178 @@
+import heapq
+import itertools
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Dict, Iterator, List, Optional, Sequence, Tuple, Union
+
+from multiversx_sdk import Address, UserPEM, UserSecretKey
+from multiversx_sdk.wallet.user_signer import UserSigner
+
+from python_files.constants import WALLETS_FOLDER
+from python_files.logger import logger
+from utils.bech32_codec import encode_bech32_addresses
+
+# Below this many files, parsing inline is faster than starting worker processes
+PROCESS_POOL_MIN_FILES = 32
+
+ROUND_ROBIN = "round_robin"
+LEAST_PENDING = "least_pending"
+
+
+def _parse_pem_file(path: str) -> List[Tuple[int, bytes, bytes]]:
+    """
+    Returns `(index, secret key, public key)` for every key in a PEM file. Runs in a worker process.
+    """
+    return [
+        (index, pem.secret_key.buffer, pem.public_key.buffer)
+        for index, pem in enumerate(UserPEM.from_file_all(Path(path)))
+    ]
+
+
+@dataclass(eq=False)
+class PooledWallet:
+    """
+    A key from a PEM file with its address forms precomputed; the signer is built on first use.
+    """
+    path: Path
+    index: int
+    address: str
+    public_key: bytes
+    secret_key: bytes = field(repr=False)
+    pending: int = 0
+    _signer: Optional[UserSigner] = field(default=None, repr=False)
+    _address: Optional[Address] = field(default=None, repr=False)
+
+    @property
+    def signer(self) -> UserSigner:
+        if self._signer is None:
+            self._signer = UserSigner(UserSecretKey(self.secret_key))
+        return self._signer
+
+    def get_signer(self) -> UserSigner:
+        return self.signer
+
+    def get_address(self) -> Address:
+        if self._address is None:
+            self._address = Address(self.public_key, "erd")
+        return self._address
+
+    def public_address(self) -> str:
+        return self.address
+
+
+class WalletPool:
+    """
+    Every key found in a folder of PEM files, including files holding several keys,
+    ready to be used as senders.
+
+    Files are parsed in a process pool when there are many of them, and all bech32
+    addresses are encoded in one batch. Senders are handed out round-robin or to the
+    wallet with the fewest pending transactions; `acquire` counts a wallet as pending
+    until the caller is done with it.
+    """
+
+    def __init__(self, wallets: Sequence[PooledWallet]) -> None:
+        if not wallets:
+            raise ValueError("A wallet pool needs at least one wallet")
+        self.wallets = list(wallets)
+        self._by_address: Dict[str, PooledWallet] = {wallet.address: wallet for wallet in self.wallets}
+        self._round_robin = itertools.cycle(self.wallets)
+        self._positions = {id(wallet): position for position, wallet in enumerate(self.wallets)}
+        self._lock = threading.Lock()
+        # (pending, position) entries; entries whose count no longer matches the wallet are stale
+        self._heap = [(wallet.pending, position) for position, wallet in enumerate(self.wallets)]
+        heapq.heapify(self._heap)
+
+    @classmethod
+    def from_folder(
+            cls,
+            folder: Union[str, Path] = WALLETS_FOLDER,
+            pattern: str = "*.pem",
+            workers: Optional[int] = None,
+    ) -> "WalletPool":
+        paths = sorted(Path(folder).expanduser().glob(pattern))
+        if not paths:
+            raise FileNotFoundError(f"No PEM files matching {pattern} in {folder}")
+
+        if len(paths) < PROCESS_POOL_MIN_FILES:
+            parsed = [_parse_pem_file(str(path)) for path in paths]
+        else:
+            workers = workers or os.cpu_count() or 1
+            with ProcessPoolExecutor(max_workers=workers) as pool:
+                chunk_size = max(1, len(paths) // (workers * 4))
+                parsed = list(pool.map(_parse_pem_file, [str(path) for path in paths], chunksize=chunk_size))
+
+        keys = [(path, index, secret_key, public_key) for path, entries in zip(paths, parsed)
+                for index, secret_key, public_key in entries]
+        addresses = encode_bech32_addresses(b"".join(public_key for _, _, _, public_key in keys))
+        wallets = [
+            PooledWallet(path=path, index=index, address=address, public_key=public_key, secret_key=secret_key)
+            for (path, index, secret_key, public_key), address in zip(keys, addresses)
+        ]
+        logger.info(f"Loaded {len(wallets)} wallet(s) from {len(paths)} PEM file(s) in {folder}")
+        return cls(wallets)
+
+    def __len__(self) -> int:
+        return len(self.wallets)
+
+    def __iter__(self) -> Iterator[PooledWallet]:
+        return iter(self.wallets)
+
+    def get(self, address: str) -> Optional[PooledWallet]:
+        return self._by_address.get(address)
+
+    @property
+    def addresses(self) -> List[str]:
+        return [wallet.address for wallet in self.wallets]
+
+    def next_round_robin(self) -> PooledWallet:
+        with self._lock:
+            return next(self._round_robin)
+
+    def least_pending(self) -> PooledWallet:
+        with self._lock:
+            return self.wallets[self._peek_least_pending()]
+
+    def _peek_least_pending(self) -> int:
+        while True:
+            pending, position = self._heap[0]
+            if pending == self.wallets[position].pending:
+                return position
+            heapq.heappop(self._heap)
+
+    def _change_pending(self, wallet: PooledWallet, delta: int) -> None:
+        wallet.pending += delta
+        heapq.heappush(self._heap, (wallet.pending, self._positions[id(wallet)]))
+        if len(self._heap) > 4 * len(self.wallets):
+            self._heap = [(wallet.pending, position) for position, wallet in enumerate(self.wallets)]
+            heapq.heapify(self._heap)
+
+    def reserve(self, strategy: str = LEAST_PENDING) -> PooledWallet:
+        """
+        Picks a sender and counts one more pending transaction on it; pair with `release`.
+        """
+        with self._lock:
+            if strategy == ROUND_ROBIN:
+                wallet = next(self._round_robin)
+            elif strategy == LEAST_PENDING:
+                wallet = self.wallets[self._peek_least_pending()]
+            else:
+                raise ValueError(f"Unknown sender selection strategy {strategy!r}")
+            self._change_pending(wallet, 1)
+            return wallet
+
+    def release(self, wallet: PooledWallet) -> None:
+        with self._lock:
+            self._change_pending(wallet, -1)
+
+    @contextmanager
+    def acquire(self, strategy: str = LEAST_PENDING) -> Iterator[PooledWallet]:
+        wallet = self.reserve(strategy)
+        try:
+            yield wallet
+        finally:
+            self.release(wallet)
@@ -0,0 +1,68 @@
+"""
+Production entry point: serves the airdrop app with Hypercorn, in one or more worker processes.
+`python main.py` still starts the single-process debug server for development.
+
+Worker processes share nothing by default, and two workers allocating nonces on their own
+would hand out the same nonces, while a job submitted to one worker would be unknown to the
+others. More than one worker therefore needs NONCE_DB_PATH and JOB_STORE_PATH, SQLite files
+through which they share nonce allocations and airdrop jobs. Each worker still keeps its own
+caches and broadcaster, so service mode (SIGNER_PEM_PATH set) runs with a single worker.
+
+Usage:
+    NONCE_DB_PATH=nonces.db JOB_STORE_PATH=jobs.db python serve.py --workers 4 --bind 0.0.0.0:5000 --uvloop
+"""
+import argparse
+import importlib.util
+import sys
+
+from hypercorn.config import Config
+from hypercorn.run import run
+
+from python_files.config import JOB_STORE_PATH, NONCE_DB_PATH, SERVICE_BIND, SERVICE_WORKERS, SIGNER_PEM_PATH
+from python_files.logger import logger
+
+
+def build_config(args) -> Config:
+    config = Config()
+    config.application_path = "main:app"
+    config.bind = args.bind
+    config.workers = args.workers
+    config.keep_alive_timeout = args.keep_alive
+    config.graceful_timeout = args.graceful_timeout
+    config.backlog = args.backlog
+    config.accesslog = "-" if args.access_log else None
+    config.errorlog = "-"
+    if args.uvloop:
+        if importlib.util.find_spec("uvloop") is None:
+            logger.warning("uvloop is not installed (pip install uvloop); using the asyncio event loop")
+        else:
+            config.worker_class = "uvloop"
+    return config
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--bind", nargs="+", default=[SERVICE_BIND], help="host:port to listen on")
+    parser.add_argument("--workers", type=int, default=SERVICE_WORKERS, help="Worker processes")
+    parser.add_argument("--uvloop", action="store_true", help="Run the workers on uvloop when it is installed")
+    parser.add_argument("--keep-alive", type=float, default=30, help="Idle keep-alive timeout in seconds")
+    parser.add_argument("--graceful-timeout", type=float, default=30, help="Seconds to let requests finish on shutdown")
+    parser.add_argument("--backlog", type=int, default=2048)
+    parser.add_argument("--access-log", action="store_true", help="Log every request to stdout")
+    args = parser.parse_args()
+
+    if SIGNER_PEM_PATH and args.workers > 1:
+        logger.warning("Service mode broadcasts from a single process; starting a single worker")
+        args.workers = 1
+    if args.workers > 1 and not NONCE_DB_PATH:
+        parser.error("--workers above 1 needs NONCE_DB_PATH, so the workers do not hand out the same nonces")
+    if args.workers > 1 and not JOB_STORE_PATH:
+        parser.error("--workers above 1 needs JOB_STORE_PATH, so every worker can answer for every job")
+
+    config = build_config(args)
+    logger.info(f"Serving on {', '.join(config.bind)} with {config.workers} {config.worker_class} worker(s)")
+    sys.exit(run(config))
+
+
+if __name__ == "__main__":
+    main()
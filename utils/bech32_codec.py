@@ -0,0 +1,225 @@
+import base64
+from dataclasses import dataclass, field
+from typing import Dict, List, Sequence
+
+try:
+    import numpy
+except ImportError:  # NumPy only speeds up large batches
+    numpy = None
+
+BECH32_CHARSET = "qpzry9x8gf2tvdw0s3jn54khce6mua7l"
+BECH32_CONST = 1
+ADDRESS_LENGTH = 32
+# 32 bytes are 256 bits, carried by 52 five-bit groups (4 padding bits), followed by a 6 group checksum
+DATA_GROUPS = 52
+CHECKSUM_GROUPS = 6
+DEFAULT_HRP = "erd"
+# Below this many addresses the pure Python loop beats NumPy's setup cost
+NUMPY_MIN_BATCH = 256
+
+_GENERATOR = (0x3B6A57B2, 0x26508E6D, 0x1EA119FA, 0x3D4233DD, 0x2A1462B3)
+_VALUES = bytes.maketrans(BECH32_CHARSET.encode(), bytes(range(32)))
+_BASE32_DIGITS = str.maketrans(BECH32_CHARSET, "0123456789abcdefghijklmnopqrstuv")
+# RFC 4648 base32 uses the same MSB-first 5-bit grouping, only with another alphabet
+_FROM_RFC4648 = bytes.maketrans(b"ABCDEFGHIJKLMNOPQRSTUVWXYZ234567", BECH32_CHARSET.encode())
+_VALID_CHARACTERS = frozenset(BECH32_CHARSET)
+
+
+def _feedback_table():
+    """
+    XOR of the generator terms selected by each possible value of the five bits shifted out per step.
+    """
+    table = []
+    for top in range(32):
+        value = 0
+        for bit in range(5):
+            if (top >> bit) & 1:
+                value ^= _GENERATOR[bit]
+        table.append(value)
+    return tuple(table)
+
+
+_POLYMOD_TABLE = _feedback_table()
+
+
+def _polymod(values, checksum: int = 1) -> int:
+    table = _POLYMOD_TABLE
+    for value in values:
+        checksum = ((checksum & 0x1FFFFFF) << 5) ^ value ^ table[checksum >> 25]
+    return checksum
+
+
+def _hrp_state(hrp: str) -> int:
+    """
+    Polymod state after the expanded human-readable part; it is the same for every address.
+    """
+    expanded = [ord(char) >> 5 for char in hrp] + [0] + [ord(char) & 31 for char in hrp]
+    return _polymod(expanded)
+
+
+@dataclass
+class BulkDecodeResult:
+    """
+    Decoded addresses as one contiguous buffer of 32-byte rows, in input order.
+    Rows of invalid addresses are left zeroed; their indices are set in the `invalid`
+    bitmap (LSB first) and explained in `errors`.
+    """
+    count: int
+    buffer: bytearray
+    invalid: bytearray
+    errors: Dict[int, str] = field(default_factory=dict)
+
+    @property
+    def all_valid(self) -> bool:
+        return not self.errors
+
+    def is_valid(self, index: int) -> bool:
+        return not (self.invalid[index >> 3] >> (index & 7)) & 1
+
+    def row(self, index: int) -> bytes:
+        return bytes(self.buffer[index * ADDRESS_LENGTH:(index + 1) * ADDRESS_LENGTH])
+
+    def hexes(self) -> List[str]:
+        """
+        Hex of every row, with None for invalid addresses (same contract as `bech32_to_hex`).
+        """
+        hex_buffer = self.buffer.hex()
+        step = 2 * ADDRESS_LENGTH
+        return [
+            hex_buffer[index * step:(index + 1) * step] if index not in self.errors else None
+            for index in range(self.count)
+        ]
+
+    def as_numpy(self):
+        if numpy is None:
+            raise RuntimeError("NumPy is not installed")
+        return numpy.frombuffer(self.buffer, dtype=numpy.uint8).reshape(self.count, ADDRESS_LENGTH)
+
+    def _mark_invalid(self, index: int, reason: str) -> None:
+        self.invalid[index >> 3] |= 1 << (index & 7)
+        self.errors[index] = reason
+
+
+def _check_shape(address, prefix: str, expected_length: int):
+    """
+    Returns the lowercase address or the reason it cannot be decoded.
+    """
+    if not isinstance(address, str):
+        return None, "not a string"
+    if len(address) != expected_length:
+        return None, f"invalid length {len(address)}, expected {expected_length}"
+    if not address.islower():
+        if not address.isupper():
+            return None, "mixed case"
+        address = address.lower()
+    if not address.startswith(prefix):
+        return None, f"invalid prefix, expected {prefix!r}"
+    if not _VALID_CHARACTERS.issuperset(address[len(prefix):]):
+        return None, "invalid character"
+    return address, None
+
+
+def _decode_python(addresses: Sequence[str], prefix: str, hrp_state: int, result: BulkDecodeResult) -> None:
+    expected_length = len(prefix) + DATA_GROUPS + CHECKSUM_GROUPS
+    buffer = result.buffer
+    for index, address in enumerate(addresses):
+        address, error = _check_shape(address, prefix, expected_length)
+        if error:
+            result._mark_invalid(index, error)
+            continue
+
+        data = address[len(prefix):]
+        if _polymod(data.encode().translate(_VALUES), hrp_state) != BECH32_CONST:
+            result._mark_invalid(index, "invalid checksum")
+            continue
+
+        payload = int(data[:DATA_GROUPS].translate(_BASE32_DIGITS), 32)
+        if payload & 0xF:
+            result._mark_invalid(index, "non-zero padding")
+            continue
+        offset = index * ADDRESS_LENGTH
+        buffer[offset:offset + ADDRESS_LENGTH] = (payload >> 4).to_bytes(ADDRESS_LENGTH, "big")
+
+
+def _decode_numpy(addresses: Sequence[str], prefix: str, hrp_state: int, result: BulkDecodeResult) -> None:
+    """
+    Same as `_decode_python`, but the checksum and bit regrouping run column by column over all rows.
+    """
+    expected_length = len(prefix) + DATA_GROUPS + CHECKSUM_GROUPS
+    rows = []
+    normalized = []
+    for index, address in enumerate(addresses):
+        address, error = _check_shape(address, prefix, expected_length)
+        if error:
+            result._mark_invalid(index, error)
+        else:
+            rows.append(index)
+            normalized.append(address[len(prefix):])
+    if not rows:
+        return
+
+    raw = numpy.frombuffer("".join(normalized).encode(), dtype=numpy.uint8)
+    lookup = numpy.frombuffer(bytes(range(256)).translate(_VALUES), dtype=numpy.uint8)
+    values = lookup[raw].reshape(len(rows), DATA_GROUPS + CHECKSUM_GROUPS).astype(numpy.uint32)
+
+    table = numpy.array(_POLYMOD_TABLE, dtype=numpy.uint32)
+    checksum = numpy.full(len(rows), hrp_state, dtype=numpy.uint32)
+    for column in range(DATA_GROUPS + CHECKSUM_GROUPS):
+        checksum = ((checksum & 0x1FFFFFF) << 5) ^ values[:, column] ^ table[checksum >> 25]
+
+    # 48 groups -> 30 bytes in blocks of 8 groups / 5 bytes, then 4 groups -> 2 bytes + 4 padding bits
+    blocks = values[:, :48].reshape(len(rows), 6, 8).astype(numpy.uint64)
+    packed = numpy.zeros((len(rows), 6), dtype=numpy.uint64)
+    for group in range(8):
+        packed = (packed << numpy.uint64(5)) | blocks[:, :, group]
+    output = numpy.zeros((len(rows), ADDRESS_LENGTH), dtype=numpy.uint8)
+    for byte in range(5):
+        output[:, byte:30:5] = (packed >> numpy.uint64(8 * (4 - byte))) & numpy.uint64(0xFF)
+    tail = values[:, 48:52]
+    tail_bits = (tail[:, 0] << 15) | (tail[:, 1] << 10) | (tail[:, 2] << 5) | tail[:, 3]
+    output[:, 30] = (tail_bits >> 12) & 0xFF
+    output[:, 31] = (tail_bits >> 4) & 0xFF
+    padding = tail_bits & 0xF
+
+    buffer = numpy.frombuffer(result.buffer, dtype=numpy.uint8).reshape(result.count, ADDRESS_LENGTH)
+    row_indices = numpy.array(rows)
+    ok = (checksum == BECH32_CONST) & (padding == 0)
+    buffer[row_indices[ok]] = output[ok]
+    for position in numpy.flatnonzero(~ok):
+        reason = "invalid checksum" if checksum[position] != BECH32_CONST else "non-zero padding"
+        result._mark_invalid(rows[position], reason)
+
+
+def decode_bech32_addresses(addresses: Sequence[str], hrp: str = DEFAULT_HRP) -> BulkDecodeResult:
+    """
+    Decodes and validates a list of bech32 addresses in one pass.
+    Never raises for bad input; every invalid entry is reported in the result instead.
+    """
+    count = len(addresses)
+    result = BulkDecodeResult(
+        count=count, buffer=bytearray(count * ADDRESS_LENGTH), invalid=bytearray((count + 7) // 8)
+    )
+    decode = _decode_numpy if numpy is not None and count >= NUMPY_MIN_BATCH else _decode_python
+    decode(addresses, hrp + "1", _hrp_state(hrp), result)
+    return result
+
+
+def encode_bech32_addresses(buffer: bytes, hrp: str = DEFAULT_HRP) -> List[str]:
+    """
+    Encodes a buffer of consecutive 32-byte public keys into bech32 addresses.
+    """
+    if len(buffer) % ADDRESS_LENGTH:
+        raise ValueError(f"Buffer length {len(buffer)} is not a multiple of {ADDRESS_LENGTH}")
+    prefix = hrp + "1"
+    hrp_state = _hrp_state(hrp)
+    view = memoryview(buffer)
+    addresses = []
+    for offset in range(0, len(buffer), ADDRESS_LENGTH):
+        # 32 bytes encode to 52 groups, the last one zero-padded, followed by "===="
+        data = base64.b32encode(view[offset:offset + ADDRESS_LENGTH])[:DATA_GROUPS].translate(_FROM_RFC4648)
+        checksum = _polymod(bytes(CHECKSUM_GROUPS), _polymod(data.translate(_VALUES), hrp_state)) ^ BECH32_CONST
+        checksum_groups = "".join(
+            BECH32_CHARSET[(checksum >> 5 * (5 - group)) & 31] for group in range(CHECKSUM_GROUPS)
+        )
+        addresses.append(prefix + data.decode() + checksum_groups)
+    return addresses
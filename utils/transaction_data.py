@@ -0,0 +1,91 @@
+from itertools import chain
+from typing import Iterator, Sequence
+
+MULTI_ESDT_NFT_TRANSFER = "MultiESDTNFTTransfer"
+SMART_SAVE_FUNCTION = "smartSave"
+WRAPPED_EGLD_TOKEN_IDENTIFIER = "WEGLD-a28c59"
+
+# Number of token transfers carried by every smartSave call: wrapped EGLD + the airdropped ESDT
+SMART_SAVE_TRANSFERS_HEX = "02"
+ADDRESS_HEX_LENGTH = 64
+
+
+def int_to_even_hex(value: int) -> str:
+    """
+    Encodes an unsigned integer the way BigUint arguments are encoded in a data field:
+    zero is an empty argument, anything else is padded to an even number of hex characters.
+    """
+    if value < 0:
+        raise ValueError(f"Cannot encode negative value {value}")
+    if value == 0:
+        return ""
+    hex_value = format(value, "x")
+    return hex_value if len(hex_value) % 2 == 0 else "0" + hex_value
+
+
+def _checked_address_hex(address_hex: str) -> str:
+    if len(address_hex) != ADDRESS_HEX_LENGTH:
+        raise ValueError(f"Invalid address hex {address_hex!r}: expected {ADDRESS_HEX_LENGTH} characters")
+    return address_hex
+
+
+def _receiver_arguments(receiver_hexes: Sequence[str], amounts: Sequence[int]) -> Iterator[str]:
+    """
+    Streams the `<receiver>@<amount>` argument pairs of a smartSave call.
+    """
+    if len(receiver_hexes) != len(amounts):
+        raise ValueError(
+            f"Got {len(receiver_hexes)} receivers but {len(amounts)} amounts"
+        )
+    for receiver_hex, amount in zip(receiver_hexes, amounts):
+        yield _checked_address_hex(receiver_hex)
+        yield int_to_even_hex(int(amount))
+
+
+def smart_save_header_arguments(
+        contract_hex: str,
+        token_identifier: str,
+        esdt_amount: int,
+        wrapped_egld_amount: int,
+        service_hex: str,
+        wrapped_egld_identifier: str = WRAPPED_EGLD_TOKEN_IDENTIFIER,
+) -> list:
+    """
+    Returns the arguments preceding the receiver list:
+    MultiESDTNFTTransfer@<contract>@02@<wegld>@@<wegld_amount>@<token>@@<esdt_amount>@smartSave@<service>
+    """
+    return [
+        MULTI_ESDT_NFT_TRANSFER,
+        _checked_address_hex(contract_hex),
+        SMART_SAVE_TRANSFERS_HEX,
+        wrapped_egld_identifier.encode("utf-8").hex(),
+        "",  # nonce of a fungible token is always empty
+        int_to_even_hex(int(wrapped_egld_amount)),
+        token_identifier.encode("utf-8").hex(),
+        "",
+        int_to_even_hex(int(esdt_amount)),
+        SMART_SAVE_FUNCTION.encode("utf-8").hex(),
+        _checked_address_hex(service_hex),
+    ]
+
+
+def encode_smart_save_data(
+        contract_hex: str,
+        service_hex: str,
+        token_identifier: str,
+        esdt_amount: int,
+        wrapped_egld_amount: int,
+        receiver_hexes: Sequence[str],
+        amounts: Sequence[int],
+        wrapped_egld_identifier: str = WRAPPED_EGLD_TOKEN_IDENTIFIER,
+) -> str:
+    """
+    Builds the `data` field of a MultiESDTNFTTransfer transaction calling smartSave.
+
+    The header and the receiver/amount pairs are streamed into a single join, so the
+    field is assembled in one buffer sized up front instead of through repeated concatenation.
+    """
+    header = smart_save_header_arguments(
+        contract_hex, token_identifier, esdt_amount, wrapped_egld_amount, service_hex, wrapped_egld_identifier
+    )
+    return "@".join(chain(header, _receiver_arguments(receiver_hexes, amounts)))